@@ -1,15 +1,26 @@
 import argparse
+import asyncio
 import json
+import sys
+import time
+from pathlib import Path
 from backend.services.ai import AIClient
+from backend.services.config import ConfigError
 from backend.services.storage import LocalStorage
 from backend.services.git_local import LocalGit
+from backend.services.change_tracker import get_change_tracker
 from backend.services.test_runner import TestRunner
+from backend.services.playwright_gen import PlaywrightGenerator
 from backend.services.schemas import TestCase
+from backend.services.format_service import get_formatter_service
+from backend.services.http_pool import get_http_registry
+from backend.services.bulk import BulkPipeline, Checkpoint, checkpoint_path, read_jsonl_file
 
 
 def main():
 	parser = argparse.ArgumentParser(description="AI Test Assistant CLI")
-	parser.add_argument("--requirements", type=str, required=True, help="Текстовые требования")
+	parser.add_argument("--requirements", type=str, help="Текстовые требования")
+	parser.add_argument("--cases-file", type=str, help="JSON с тест-кейсами ({\"test_cases\": [...]}) для пакетной генерации кода")
 	parser.add_argument("--out", type=str, default="generated", help="Корневая папка для файлов")
 	parser.add_argument("--lang", type=str, default="ru", help="Язык тест-кейсов (ru/en)")
 	parser.add_argument("--format", type=str, default="json", choices=["json", "markdown"], help="Формат тест-кейсов")
@@ -17,52 +28,201 @@ def main():
 	parser.add_argument("--push", action="store_true", help="Сделать git commit и push")
 	parser.add_argument("--ai-provider", type=str, choices=["openai", "ollama"], help="Провайдер ИИ. По умолчанию берется из окружения.")
 	parser.add_argument("--ai-model", type=str, help="Модель ИИ. По умолчанию берется из окружения.")
+	parser.add_argument("--bulk", type=str, help="JSONL с описаниями фич ({\"id\", \"description\"} в строке) для пакетной обработки")
+	parser.add_argument("--bulk-output", type=str, help="Куда писать JSONL с результатами (по умолчанию stdout)")
+	parser.add_argument("--checkpoint", type=str, help="Файл контрольной точки для --bulk (по умолчанию в BULK_CHECKPOINT_DIR по имени входного файла)")
+	parser.add_argument("--stream", action="store_true", help="Выводить тест-кейсы по мере генерации и сразу запускать генерацию их кода")
 	args = parser.parse_args()
+	if not args.requirements and not args.cases_file and not args.bulk:
+		parser.error("Укажите --requirements, --cases-file или --bulk")
 
-	ai = AIClient(provider=args.ai_provider, model=args.ai_model)
+	try:
+		ai = AIClient(provider=args.ai_provider, model=args.ai_model)
+	except ConfigError as exc:
+		parser.error(str(exc))
 	storage = LocalStorage()
+	if args.bulk:
+		asyncio_run(run_bulk(args, ai, storage))
+		return
+	asyncio_run(run_pipeline(args, ai, storage))
+
+
+class StageTimer:
+	"""Время этапов конвейера: начало — первый старт, конец — последнее завершение"""
+
+	def __init__(self) -> None:
+		self.started = time.perf_counter()
+		self.stages: dict[str, list[float]] = {}
+
+	def begin(self, name: str) -> None:
+		now = time.perf_counter() - self.started
+		span = self.stages.setdefault(name, [now, now])
+		span[0] = min(span[0], now)
+
+	def end(self, name: str) -> None:
+		self.stages[name][1] = time.perf_counter() - self.started
+
+	def report(self) -> None:
+		total = time.perf_counter() - self.started
+		print("Timing:")
+		for name, (begin, end) in self.stages.items():
+			print(f"  {name:<12} {end - begin:7.2f}s  (t+{begin:.2f}s .. t+{end:.2f}s)")
+		print(f"  {'total':<12} {total:7.2f}s")
+
+
+async def run_pipeline(args, ai: AIClient, storage: LocalStorage) -> None:
+	"""Весь сценарий CLI в одном event loop.
+
+	Демо-приложение генерируется параллельно с тест-кейсами и кодом; код для каждого
+	тест-кейса запрашивается, как только кейс получен (с лимитом провайдера), файлы
+	пишутся по мере готовности.
+	"""
+	timer = StageTimer()
+	generator = PlaywrightGenerator()
+	code_tasks: list[asyncio.Task] = []
+	demo_task = None
+	try:
+		if args.requirements:
+			timer.begin("demo_app")
+			demo_task = asyncio.create_task(generate_demo(ai, args.requirements, args.out, storage, timer))
+
+		# 1) Test cases — генерация кода стартует для каждого кейса сразу
+		def start_code(case: TestCase) -> None:
+			if not code_tasks:
+				timer.begin("test_code")
+			code_tasks.append(asyncio.create_task(generator.generate_item(len(code_tasks), case, args.target, ai)))
+
+		if args.cases_file:
+			for case in load_cases_file(args.cases_file):
+				start_code(case)
+		else:
+			timer.begin("test_cases")
+			cases: list[TestCase] = []
+			if args.stream:
+				async for case in ai.stream_test_cases(args.requirements, args.lang):
+					cases.append(case)
+					print_case(len(cases), case)
+					start_code(case)
+				md = AIClient.test_cases_markdown(cases) if args.format == "markdown" else None
+			else:
+				cases, md = await ai.generate_test_cases(args.requirements, args.lang, want_markdown=(args.format == "markdown"))
+				for case in cases:
+					start_code(case)
+			if not cases:
+				start_code(TestCase(title="Автотест", steps=["Открыть /"], expected="Страница загружается"))
+			if args.format == "markdown" and md:
+				storage.save_file(f"{args.out}/test_cases.md", md)
+			else:
+				data = {"test_cases": [c.model_dump() for c in cases]}
+				storage.save_file(f"{args.out}/test_cases.json", json.dumps(data, ensure_ascii=False, indent=2))
+			timer.end("test_cases")
+
+		# 2) Test code — файлы пишутся в порядке готовности
+		failed = 0
+		used: set[str] = set()
+		for fut in asyncio.as_completed(code_tasks):
+			item = await fut
+			if item.error:
+				failed += 1
+				print(f"[{item.index + 1}] {item.title}: ошибка: {item.error}")
+				continue
+			filename = item.suggested_filename or f"test_{item.index}"
+			if filename in used:
+				stem, dot, ext = filename.partition(".")
+				filename = f"{stem}_{item.index}{dot}{ext}"
+			used.add(filename)
+			path = test_path(args.out, args.target, filename)
+			storage.save_file(path, item.code or "")
+			print(f"[{item.index + 1}] {item.title}: {path}")
+		if code_tasks:
+			timer.end("test_code")
+
+		# 3) Demo app
+		if demo_task is not None:
+			await demo_task
+
+		# 4) Optional git push
+		if args.push:
+			timer.begin("git_push")
+			message = "feat: generated tests and demo" if args.requirements else "feat: generated tests"
+			sha = await asyncio.to_thread(push_session_files, storage, args.out, message)
+			timer.end("git_push")
+			print("Pushed commit:", sha)
+	finally:
+		for task in [*code_tasks, *([demo_task] if demo_task else [])]:
+			task.cancel()
+		await get_formatter_service().stop()
+		await get_http_registry().aclose()
+
+	print(f"Done. {len(code_tasks) - failed}/{len(code_tasks)} test files saved under:", args.out)
+	timer.report()
+
+
+async def generate_demo(ai: AIClient, requirements: str, out: str, storage: LocalStorage, timer: StageTimer) -> None:
+	try:
+		files = await ai.generate_demo_app(requirements)
+		for name, content in files.items():
+			storage.save_file(f"{out}/demo_app/{name}", content)
+		print(f"Demo app: {len(files)} files under {out}/demo_app")
+	except Exception as exc:
+		print("Demo app: ошибка:", str(exc) or exc.__class__.__name__)
+	finally:
+		timer.end("demo_app")
+
+
+async def run_bulk(args, ai: AIClient, storage: LocalStorage) -> None:
+	"""Пакетная обработка JSONL; после падения повторный запуск продолжит с контрольной точки"""
+	checkpoint = Checkpoint(args.checkpoint or checkpoint_path(Path(args.bulk).stem))
+	pipeline = BulkPipeline(ai, storage, target=args.target, out=f"{args.out}/bulk", checkpoint=checkpoint)
+	output = open(args.bulk_output, "a", encoding="utf-8") if args.bulk_output else sys.stdout
+	counts: dict[str, int] = {}
+	started = time.perf_counter()
+	try:
+		async for result in pipeline.run(read_jsonl_file(args.bulk)):
+			counts[result["status"]] = counts.get(result["status"], 0) + 1
+			output.write(json.dumps(result, ensure_ascii=False) + "\n")
+			output.flush()
+		if args.push:
+			sha = await asyncio.to_thread(push_session_files, storage, args.out, "feat: generated tests (bulk)")
+			print("Pushed commit:", sha, file=sys.stderr)
+	finally:
+		if output is not sys.stdout:
+			output.close()
+		await get_formatter_service().stop()
+		await get_http_registry().aclose()
+	summary = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+	print(f"Done in {time.perf_counter() - started:.2f}s: {summary or 'нет строк'}. Checkpoint: {checkpoint.path}", file=sys.stderr)
+
+
+def push_session_files(storage: LocalStorage, out: str, message: str) -> str | None:
+	"""Коммитит только файлы, записанные в этом запуске CLI"""
+	git = LocalGit(str(storage.root / out))
+	paths = get_change_tracker().drain(git.root)
+	return git.commit_paths(paths, message=message, branch="main")
+
+
+def test_path(out: str, target: str, filename: str) -> str:
+	if target == "python":
+		return f"{out}/python_tests/{filename}"
+	return f"{out}/tests/e2e/{filename}"
+
+
+def load_cases_file(path: str) -> list[TestCase]:
+	with open(path, "r", encoding="utf-8") as f:
+		data = json.load(f)
+	items = data.get("test_cases", []) if isinstance(data, dict) else data
+	return [TestCase(**item) for item in items]
+
 
-	# 1) Test cases
-	cases, md = asyncio_run(ai.generate_test_cases(args.requirements, args.lang, want_markdown=(args.format == "markdown")))
-	if args.format == "markdown" and md:
-		storage.save_file(f"{args.out}/test_cases.md", md)
-	else:
-		data = {"test_cases": [c.model_dump() for c in cases]}
-		storage.save_file(f"{args.out}/test_cases.json", json.dumps(data, ensure_ascii=False, indent=2))
-
-	# choose first case for demo
-	tc = cases[0] if cases else TestCase(title="Автотест", steps=["Открыть /"], expected="Страница загружается")
-
-	# 2) Test code
-	if args.target == "python":
-		code = asyncio_run(ai.generate_playwright_python_code(tc, base_url=None))
-		path = f"{args.out}/python_tests/test_{tc.title.lower().replace(' ', '_')}.py"
-	elif args.target == "ts":
-		from backend.services.playwright_gen import PlaywrightGenerator
-		code = asyncio_run(PlaywrightGenerator().generate_code_from_test_case(tc, "ts", ai, None))
-		path = f"{args.out}/tests/e2e/test_{tc.title.lower().replace(' ', '_')}.spec.ts"
-	else:
-		from backend.services.playwright_gen import PlaywrightGenerator
-		code = asyncio_run(PlaywrightGenerator().generate_code_from_test_case(tc, "js", ai, None))
-		path = f"{args.out}/tests/e2e/test_{tc.title.lower().replace(' ', '_')}.spec.js"
-	storage.save_file(path, code)
-
-	# 3) Demo app
-	files = asyncio_run(ai.generate_demo_app(args.requirements))
-	for name, content in files.items():
-		storage.save_file(f"{args.out}/demo_app/{name}", content)
-
-	# 4) Optional git push
-	if args.push:
-		sha = LocalGit(args.out).add_commit_push(message="feat: generated tests and demo", branch="main")
-		print("Pushed commit:", sha)
-
-	print("Done. Files saved under:", args.out)
+def print_case(number: int, case: TestCase) -> None:
+	print(f"[{number}] {case.title}", flush=True)
+	for step in case.steps:
+		print(f"    - {step}", flush=True)
+	print(f"    => {case.expected}", flush=True)
 
 
 def asyncio_run(coro):
 	try:
-		import asyncio
 		return asyncio.run(coro)
 	except RuntimeError:
 		# If already in loop, create new loop
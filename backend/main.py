@@ -1,7 +1,8 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from backend.services.schemas import (
     GenerateTestCasesRequest,
     GenerateTestCasesResponse,
@@ -13,22 +14,85 @@ from backend.services.schemas import (
     SaveLocalResponse,
     SaveGithubRequest,
     SaveGithubResponse,
+    SaveGithubBulkRequest,
+    SaveGithubBulkResponse,
+    TestCase,
+    GenerateTestCodeBatchRequest,
+    GenerateTestCodeBatchItem,
+    GenerateTestCodeBatchResponse,
+    JobSubmitRequest,
+    JobStatusResponse,
 )
 from backend.services.ai import AIClient
-from backend.services.playwright_gen import PlaywrightGenerator
-from backend.services.github import GithubSaver
+from backend.services.playwright_gen import PlaywrightGenerator, suggested_filename
+from backend.services.github import GithubConflictError, GithubSaver
 from backend.services.storage import LocalStorage
 from backend.services.config import get_settings
 from backend.services.templates import get_template, list_templates
-from backend.services.code_formatter import CodeFormatter
+from backend.services.template_compiler import TemplateCompiler
+from backend.services.format_service import get_formatter_service
+from backend.services.test_analyzer import analyze, flagged_regions, review_code
+from backend.services.review_chunks import get_review_chunk_cache, review_chunked
 from fastapi import Body
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import json
+import logging
 import os
-from backend.services.git_local import LocalGit
+import time
+import uuid
+from backend.services.git_local import LocalGit, get_debounced_committer
+from backend.services.change_tracker import get_change_tracker
 from backend.services.test_runner import TestRunner
+from backend.services.test_runs import get_test_run_manager
+from backend.services.http_pool import get_http_registry
+from backend.services.cassette import get_cassette
+from backend.services.backends import get_backend_router
+from backend.services.rate_limit import get_rate_limiters
+from backend.services.ollama_warmup import get_ollama_warmer
+from backend.services.llm_cache import get_llm_cache
+from backend.services.singleflight import get_single_flight
+from backend.services.jobs import get_job_queue, TERMINAL_STATUSES
+from backend.services.metrics import MetricsMiddleware, get_metrics
+from backend.services.log import RequestLogMiddleware, get_logger, setup_logging, shutdown_logging
+from backend.services.bulk import BulkPipeline, Checkpoint, UploadTooLargeError, checkpoint_path, read_jsonl_file, spool_path, spool_upload
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 
 
-app = FastAPI(title="AI Test Assistant", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    # Общие пулы HTTP-соединений живут всё время работы приложения
+    registry = get_http_registry()
+    await registry.startup()
+    formatter = get_formatter_service()
+    await formatter.start()
+    backends = get_backend_router()
+    await backends.start()
+    # Модели Ollama грузятся в фоне, чтобы первый запрос не ждал загрузки весов
+    warmer = get_ollama_warmer()
+    await warmer.start()
+    jobs = get_job_queue()
+    await jobs.start()
+    try:
+        yield
+    finally:
+        await jobs.stop()
+        await get_test_run_manager().stop()
+        await warmer.stop()
+        await backends.stop()
+        await get_debounced_committer().flush()
+        await formatter.stop()
+        await registry.aclose()
+        shutdown_logging()
+
+
+logger = get_logger("backend.api")
+
+app = FastAPI(title="AI Test Assistant", version="0.1.0", lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestLogMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -65,6 +129,81 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/backends")
+def backends_stats():
+    """Бэкенды провайдеров: доступность, запросы в работе, EWMA задержки, ошибки"""
+    return get_backend_router().stats()
+
+
+@app.get("/ollama/models")
+async def ollama_models():
+    """Модели, загруженные в память бэкендов Ollama (/api/ps), и задержки холодного/тёплого обращения"""
+    return await get_ollama_warmer().report()
+
+
+@app.post("/ollama/warmup")
+async def ollama_warmup():
+    """Загрузить модели из OLLAMA_WARMUP_MODELS (или OLLAMA_MODEL) на всех бэкендах сейчас"""
+    warmer = get_ollama_warmer()
+    await warmer.warm_all()
+    return await warmer.report()
+
+
+@app.get("/rate-limits")
+def rate_limits():
+    """Лимитеры RPM/TPM по моделям: доступный запас, глубина очереди по вызывающим, время ожидания"""
+    return {"limiters": get_rate_limiters().stats()}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Счётчики попаданий/промахов кэша ответов ИИ"""
+    cache = get_llm_cache()
+    chunks = get_review_chunk_cache().stats()
+    if cache is None:
+        return {"enabled": False, "review_chunks": chunks}
+    return {"enabled": True, **cache.stats(), "review_chunks": chunks}
+
+
+@app.get("/cassette")
+def cassette_stats():
+    """Режим записи/воспроизведения HTTP-обменов и счётчики кассеты"""
+    cassette = get_cassette()
+    if cassette is None:
+        return {"mode": "off"}
+    return cassette.stats()
+
+
+@app.get("/llm/stats")
+def llm_stats():
+    """Кэш ответов ИИ и объединение одинаковых одновременных запросов"""
+    cache = get_llm_cache()
+    return {
+        "cache": {"enabled": True, **cache.stats()} if cache is not None else {"enabled": False},
+        "single_flight": get_single_flight().stats(),
+    }
+
+
+@app.get("/formatter/stats")
+def formatter_stats():
+    return get_formatter_service().stats()
+
+
+@app.delete("/cache")
+def cache_clear():
+    cache = get_llm_cache()
+    if cache is not None:
+        cache.clear()
+    get_review_chunk_cache().clear()
+    return {"status": "cleared"}
+
+
 @app.get("/templates")
 def get_templates():
     """Получить список доступных шаблонов"""
@@ -74,13 +213,27 @@ def get_templates():
 @app.post("/generate/test-cases", response_model=GenerateTestCasesResponse)
 async def generate_test_cases(payload: GenerateTestCasesRequest):
     try:
-        print(f"[DEBUG] Получен запрос на генерацию тест-кейсов: provider={payload.ai_provider}, model={payload.ai_model}")
-        ai = AIClient(provider=payload.ai_provider, model=payload.ai_model)
-        print(f"[DEBUG] AIClient создан, начинаю генерацию...")
+        started = time.perf_counter()
+        ai = AIClient(
+            provider=payload.ai_provider,
+            model=payload.ai_model,
+            use_cache=not payload.no_cache,
+            refresh_cache=payload.refresh_cache,
+        )
         cases, md = await ai.generate_test_cases(
             payload.description, payload.lang or "ru", want_markdown=(payload.format == "markdown")
         )
-        print(f"[DEBUG] Генерация завершена, получено {len(cases)} тест-кейсов")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "test_cases_generated",
+                extra={
+                    "provider": ai.provider,
+                    "model": ai.model,
+                    "description_chars": len(payload.description),
+                    "cases": len(cases),
+                    "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+                },
+            )
         return GenerateTestCasesResponse(test_cases=cases, markdown=md)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
@@ -88,60 +241,176 @@ async def generate_test_cases(payload: GenerateTestCasesRequest):
         raise HTTPException(status_code=500, detail=f"Ошибка генерации: {str(exc)}")
 
 @app.post("/git/push")
-def git_push(body: Dict[str, Any] = Body(default={})):
+async def git_push(body: Dict[str, Any] = Body(default={})):
     message = body.get("message") or "chore: generated files"
     remote = body.get("remote") or "origin"
     branch = body.get("branch") or "main"
+    # scope=session — только файлы, записанные ассистентом в этом процессе (без git add --all и status)
+    scope = (body.get("scope") or "all").lower()
+    settings = get_settings()
+    root = settings.default_repo_root
     try:
-        git = LocalGit(get_settings().default_repo_root)
-        sha = git.add_commit_push(message=message, remote_name=remote, branch=branch)
+        if scope == "session":
+            if body.get("debounce"):
+                committer = get_debounced_committer()
+                committer.schedule(root, settings.git_commit_debounce, message, remote, branch)
+                return {"scheduled": True, "pending": len(get_change_tracker().pending(root))}
+            tracker = get_change_tracker()
+            paths = tracker.drain(root)
+            try:
+                sha = await run_in_threadpool(LocalGit(root).commit_paths, paths, message, remote, branch)
+            except Exception:
+                tracker.restore(paths)
+                raise
+            return {"commit": sha, "files": len(paths)}
+        git = LocalGit(root)
+        sha = await run_in_threadpool(git.add_commit_push, message=message, remote_name=remote, branch=branch)
         return {"commit": sha}
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
+
+@app.get("/git/pending")
+def git_pending():
+    """Файлы, записанные ассистентом и ещё не закоммиченные"""
+    root = get_settings().default_repo_root
+    committer = get_debounced_committer()
+    return {
+        "pending": get_change_tracker().pending(root),
+        "scheduled": committer.scheduled(root),
+        "last_result": committer.last_result,
+    }
+
+
 @app.post("/tests/run")
-def run_tests(body: Dict[str, Any] = Body(default={})):
+async def run_tests(body: Dict[str, Any] = Body(default={})):
     kind = (body.get("kind") or "ts").lower()
     cwd = body.get("cwd")
+    manager = get_test_run_manager()
     try:
-        result = TestRunner().run(kind=kind, cwd=cwd)
-        return result
+        if body.get("parallel"):
+            # Шардированный прогон: shards (по умолчанию = CPU), timeout — на весь прогон, shard_timeout — на шард
+            async with manager.slot():
+                return await TestRunner().run_parallel(
+                    kind=kind,
+                    cwd=cwd,
+                    shards=body.get("shards"),
+                    timeout=body.get("timeout"),
+                    shard_timeout=body.get("shard_timeout"),
+                )
+        run = manager.start(kind=kind, cwd=cwd, timeout=body.get("timeout"))
+        return await manager.wait(run)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+def _test_run_or_404(run_id: str):
+    run = get_test_run_manager().get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Прогон не найден")
+    return run
+
+
+@app.post("/tests/runs")
+async def start_test_run(body: Dict[str, Any] = Body(default={})):
+    """Запуск прогона в фоне: ответ сразу, вывод — через /tests/runs/{id}/stream"""
+    run = get_test_run_manager().start(
+        kind=(body.get("kind") or "ts").lower(),
+        cwd=body.get("cwd"),
+        timeout=body.get("timeout"),
+    )
+    return run.info()
+
+
+@app.get("/tests/runs")
+def list_test_runs():
+    return get_test_run_manager().list_runs()
+
+
+@app.get("/tests/runs/{run_id}")
+def get_test_run(run_id: str):
+    """Статус прогона и сохранённый вывод (конец вывода, не больше TEST_RUN_OUTPUT_LIMIT байт)"""
+    return _test_run_or_404(run_id).result()
+
+
+@app.get("/tests/runs/{run_id}/stream")
+async def stream_test_run(run_id: str, after: int = 0):
+    """Вывод прогона построчно (SSE): события line с номером строки, в конце — done со статусом.
+
+    after — номер последней полученной строки, чтобы продолжить после переподключения.
+    """
+    run = _test_run_or_404(run_id)
+
+    async def events():
+        async for seq, stream, text in run.follow(after):
+            yield _sse("line", {"seq": seq, "stream": stream, "text": text})
+        yield _sse("done", run.info())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/tests/runs/{run_id}/cancel")
+async def cancel_test_run(run_id: str):
+    """Отмена прогона (в очереди или идущего); ответ — после завершения процессов"""
+    run = _test_run_or_404(run_id)
+    get_test_run_manager().cancel(run_id)
+    if run.task is not None:
+        await asyncio.wait({run.task}, timeout=15)
+    return run.info()
+
+
+def _resolve_test_case(payload: GenerateTestCodeRequest) -> TestCase:
+    """Тест-кейс из запроса или из шаблона, если он указан"""
+    if payload.template:
+        template = get_template(payload.template)
+        if not template:
+            raise HTTPException(status_code=400, detail=f"Шаблон '{payload.template}' не найден")
+        return template.generate_test_case(payload.template_params or {})
+    if payload.test_case is None:
+        raise HTTPException(status_code=400, detail="Укажите test_case или template")
+    return payload.test_case
+
+
+def _use_rules(template: str | None, mode: str | None) -> bool:
+    """Генерировать ли код компилятором шаблонов вместо ИИ"""
+    if mode == "ai":
+        return False
+    if mode == "rules" and not TemplateCompiler.supports(template):
+        raise HTTPException(status_code=400, detail="Режим rules требует шаблон (auth, form, list, crud)")
+    return TemplateCompiler.supports(template)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @app.post("/generate/test-code", response_model=GenerateTestCodeResponse)
 async def generate_test_code(payload: GenerateTestCodeRequest):
     try:
         # Использование шаблона, если указан
-        test_case = payload.test_case
-        if payload.template:
-            template = get_template(payload.template)
-            if template:
-                template_params = payload.template_params or {}
-                test_case = template.generate_test_case(template_params)
-            else:
-                raise HTTPException(status_code=400, detail=f"Шаблон '{payload.template}' не найден")
-        
-        ai = AIClient(provider=payload.ai_provider, model=payload.ai_model)
+        test_case = _resolve_test_case(payload)
         language = (payload.language or "ts").lower()
         
-        if language == "python":
-            code = await ai.generate_playwright_python_code(test_case, base_url=payload.base_url)
-            filename = "test_" + test_case.title.lower().replace(" ", "_") + ".py"
+        if _use_rules(payload.template, payload.generation_mode):
+            # Шаблон компилируется в код напрямую, без запроса к ИИ
+            code = TemplateCompiler().compile(payload.template, payload.template_params or {}, language, payload.base_url)
         else:
-            generator = PlaywrightGenerator()
-            code = await generator.generate_code_from_test_case(
+            ai = AIClient(
+                provider=payload.ai_provider,
+                model=payload.ai_model,
+                use_cache=not payload.no_cache,
+                refresh_cache=payload.refresh_cache,
+            )
+            code = await PlaywrightGenerator().generate_for_language(
                 test_case=test_case,
                 language=language,
                 ai_client=ai,
                 base_url=payload.base_url,
             )
-            ext = "ts" if language == "ts" else "js"
-            filename = "test_" + test_case.title.lower().replace(" ", "_") + f".spec.{ext}"
+        filename = suggested_filename(test_case, language)
         
-        # Форматирование кода
-        code = CodeFormatter.format_code(code, language)
+        # Форматирование кода (тёплый prettier / black в процессе, вне event loop)
+        code = await get_formatter_service().format(code, language)
         
         # optionally save
         if payload.target_path:
@@ -156,12 +425,241 @@ async def generate_test_code(payload: GenerateTestCodeRequest):
         raise HTTPException(status_code=500, detail=f"Ошибка генерации кода: {str(exc)}")
 
 
+def _batch_test_cases(payload: GenerateTestCodeBatchRequest) -> list[TestCase]:
+    """Список тест-кейсов пакета: явный или шаблон x матрица параметров"""
+    if payload.template:
+        template = get_template(payload.template)
+        if not template:
+            raise HTTPException(status_code=400, detail=f"Шаблон '{payload.template}' не найден")
+        base_params = payload.template_params or {}
+        matrix = payload.template_matrix or [{}]
+        return [template.generate_test_case({**base_params, **params}) for params in matrix]
+    if not payload.test_cases:
+        raise HTTPException(status_code=400, detail="Укажите test_cases или template")
+    return payload.test_cases
+
+
+async def _compile_batch(payload: GenerateTestCodeBatchRequest, test_cases: list[TestCase], language: str):
+    compiler = TemplateCompiler()
+    base_params = payload.template_params or {}
+    for index, (params, test_case) in enumerate(zip(payload.template_matrix or [{}], test_cases)):
+        item = GenerateTestCodeBatchItem(
+            index=index,
+            title=test_case.title,
+            suggested_filename=suggested_filename(test_case, language),
+        )
+        try:
+            code = compiler.compile(payload.template, {**base_params, **params}, language, payload.base_url)
+            item.code = await get_formatter_service().format(code, language)
+        except Exception as exc:
+            item.error = str(exc) or exc.__class__.__name__
+        yield item
+
+
+@app.post("/generate/test-code/batch", response_model=GenerateTestCodeBatchResponse)
+async def generate_test_code_batch(payload: GenerateTestCodeBatchRequest):
+    """Пакетная генерация кода с ограничением параллельности на провайдера"""
+    test_cases = _batch_test_cases(payload)
+    language = (payload.language or "ts").lower()
+    use_rules = _use_rules(payload.template, payload.generation_mode)
+    ai = None
+    if not use_rules:
+        try:
+            ai = AIClient(
+                provider=payload.ai_provider,
+                model=payload.ai_model,
+                use_cache=not payload.no_cache,
+                refresh_cache=payload.refresh_cache,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    storage = LocalStorage() if payload.target_dir else None
+    used_names: set[str] = set()
+
+    def save(item: GenerateTestCodeBatchItem) -> None:
+        if storage is None or item.code is None:
+            return
+        name = item.suggested_filename or f"test_{item.index}"
+        if name in used_names:
+            stem, dot, ext = name.partition(".")
+            name = f"{stem}_{item.index}{dot}{ext}"
+        used_names.add(name)
+        item.suggested_filename = name
+        try:
+            item.path = storage.save_file(os.path.join(payload.target_dir, name), item.code)
+        except Exception as exc:
+            item.error = f"Ошибка сохранения: {str(exc)}"
+
+    if use_rules:
+        results = _compile_batch(payload, test_cases, language)
+    else:
+        pack_size = payload.pack_size or get_settings().codegen_pack_size
+        results = PlaywrightGenerator().generate_batch(test_cases, language, ai, base_url=payload.base_url, pack_size=pack_size)
+
+    if payload.stream:
+        async def events():
+            succeeded = failed = 0
+            async for item in results:
+                save(item)
+                if item.error:
+                    failed += 1
+                else:
+                    succeeded += 1
+                yield _sse("item", item.model_dump())
+            yield _sse("done", {"succeeded": succeeded, "failed": failed})
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    items: list[GenerateTestCodeBatchItem] = []
+    async for item in results:
+        save(item)
+        items.append(item)
+    failed = sum(1 for i in items if i.error)
+    return GenerateTestCodeBatchResponse(items=items, succeeded=len(items) - failed, failed=failed)
+
+
+@app.post("/generate/test-cases/stream")
+async def generate_test_cases_stream(payload: GenerateTestCasesRequest):
+    """SSE: событие test_case на каждый готовый тест-кейс, затем done"""
+    try:
+        ai = AIClient(
+            provider=payload.ai_provider,
+            model=payload.ai_model,
+            use_cache=not payload.no_cache,
+            refresh_cache=payload.refresh_cache,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    async def events():
+        cases: list[TestCase] = []
+        try:
+            async for case in ai.stream_test_cases(payload.description, payload.lang or "ru"):
+                cases.append(case)
+                yield _sse("test_case", case.model_dump())
+            md = AIClient.test_cases_markdown(cases) if payload.format == "markdown" else None
+            yield _sse("done", {"count": len(cases), "markdown": md})
+        except Exception as exc:
+            yield _sse("error", {"detail": f"Ошибка генерации: {str(exc)}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/generate/test-code/stream")
+async def generate_test_code_stream(payload: GenerateTestCodeRequest):
+    """SSE: события chunk с фрагментами кода, затем done с отформатированным файлом"""
+    test_case = _resolve_test_case(payload)
+    language = (payload.language or "ts").lower()
+    use_rules = _use_rules(payload.template, payload.generation_mode)
+    ai = None
+    if not use_rules:
+        try:
+            ai = AIClient(
+                provider=payload.ai_provider,
+                model=payload.ai_model,
+                use_cache=not payload.no_cache,
+                refresh_cache=payload.refresh_cache,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    async def events():
+        parts: list[str] = []
+        try:
+            if use_rules:
+                code = TemplateCompiler().compile(payload.template, payload.template_params or {}, language, payload.base_url)
+                yield _sse("chunk", {"delta": code})
+            else:
+                async for delta in ai.stream_playwright_code(test_case, language=language, base_url=payload.base_url):
+                    parts.append(delta)
+                    yield _sse("chunk", {"delta": delta})
+                code = "".join(parts).strip()
+                if language != "python":
+                    code = PlaywrightGenerator.with_header(code, language)
+            code = await get_formatter_service().format(code, language)
+            if payload.target_path:
+                LocalStorage().save_file(payload.target_path, code)
+            yield _sse("done", {"code": code, "suggested_filename": suggested_filename(test_case, language)})
+        except Exception as exc:
+            yield _sse("error", {"detail": f"Ошибка генерации кода: {str(exc)}"})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/generate/bulk")
+async def generate_bulk(
+    request: Request,
+    run_id: Optional[str] = None,
+    target: str = "ts",
+    out: str = "generated/bulk",
+    ai_provider: Optional[str] = None,
+    ai_model: Optional[str] = None,
+):
+    """Пакетная обработка описаний фич из JSONL в теле запроса.
+
+    Строка входа: {"id"?, "description", "lang"?, "target"?, "base_url"?}. Ответ — JSONL
+    с результатом по каждой строке в порядке готовности. Повторная загрузка с тем же
+    run_id пропускает уже обработанные описания.
+    """
+    if target not in ("ts", "js", "python"):
+        raise HTTPException(status_code=400, detail="target должен быть ts, js или python")
+    try:
+        ai = AIClient(provider=ai_provider, model=ai_model)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    limit = get_settings().bulk_max_upload_bytes
+    if int(request.headers.get("content-length") or 0) > limit:
+        raise HTTPException(status_code=413, detail=f"Тело запроса больше {limit} байт (BULK_MAX_UPLOAD_BYTES)")
+    run_id = run_id or uuid.uuid4().hex
+    checkpoint = await run_in_threadpool(Checkpoint, checkpoint_path(run_id))
+    # Тело сохраняется на диск по частям и читается конвейером построчно — в памяти не держится.
+    # Читать тело прямо из ответа нельзя: пока идёт StreamingResponse, сервер сам слушает receive()
+    spool = spool_path(checkpoint)
+    try:
+        await spool_upload(request.stream(), spool, limit)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    pipeline = BulkPipeline(ai, LocalStorage(), target=target, out=out, checkpoint=checkpoint)
+
+    async def lines():
+        try:
+            async for result in pipeline.run(read_jsonl_file(str(spool))):
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        except Exception as exc:
+            yield json.dumps({"status": "error", "error": str(exc)}, ensure_ascii=False) + "\n"
+        finally:
+            spool.unlink(missing_ok=True)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Run-Id": run_id})
+
+
 @app.post("/review/test", response_model=ReviewTestResponse)
 async def review_test(payload: ReviewTestRequest):
+    """Ревью автотеста: по умолчанию локальный анализатор без ИИ.
+
+    escalate=true — дополнительно ИИ, но только по фрагментам с найденными проблемами;
+    mode=ai — ревью всего файла через ИИ; mode=chunked — через ИИ по тестам, параллельно.
+    """
+    language = (payload.language or "").lower() or None
+    if payload.mode == "local":
+        local = review_code(payload.code, language)
+        if not payload.escalate or not local.suggestions:
+            return local
     try:
-        ai = AIClient()
-        result = await ai.review_test_code(payload.code)
-        return result
+        ai = AIClient(use_cache=not payload.no_cache, refresh_cache=payload.refresh_cache)
+        if payload.mode == "ai":
+            return await ai.review_test_code(payload.code)
+        if payload.mode == "chunked":
+            return await review_chunked(ai, payload.code, language)
+        findings = analyze(payload.code, language)
+        regions = flagged_regions(payload.code, findings)
+        remote = await ai.review_test_regions(regions, [s.title for s in local.suggestions])
+        return ReviewTestResponse(
+            summary=f"{local.summary} {remote.summary}".strip(),
+            score=min(local.score, remote.score),
+            suggestions=[*local.suggestions, *remote.suggestions],
+            source="local+ai",
+        )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
     except Exception as exc:
@@ -193,6 +691,26 @@ async def generate_demo_app(body: Dict[str, Any] = Body(...)):
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+@app.post("/save/github/bulk", response_model=SaveGithubBulkResponse)
+async def save_github_bulk(payload: SaveGithubBulkRequest):
+    """Сохранить несколько файлов одним коммитом (Git Data API)"""
+    settings = get_settings()
+    try:
+        saver = GithubSaver(settings.github_token)
+        res = await saver.save_files(
+            owner=payload.owner,
+            repo=payload.repo,
+            files={f.path: f.content for f in payload.files},
+            message=payload.message or "chore: add/update autogenerated tests",
+            branch=payload.branch or "main",
+        )
+        return SaveGithubBulkResponse(**res)
+    except GithubConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 @app.post("/save/github", response_model=SaveGithubResponse)
 async def save_github(payload: SaveGithubRequest):
     settings = get_settings()
@@ -215,3 +733,91 @@ async def save_github(payload: SaveGithubRequest):
         raise HTTPException(status_code=400, detail=str(exc))
 
 
+# Фоновые задачи: тело задачи — это тело соответствующего эндпоинта
+async def _job_generate_test_cases(payload: Dict[str, Any]):
+    return (await generate_test_cases(GenerateTestCasesRequest(**payload))).model_dump()
+
+
+async def _job_generate_test_code(payload: Dict[str, Any]):
+    return (await generate_test_code(GenerateTestCodeRequest(**payload))).model_dump()
+
+
+async def _job_generate_test_code_batch(payload: Dict[str, Any]):
+    request = GenerateTestCodeBatchRequest(**{**payload, "stream": False})
+    return (await generate_test_code_batch(request)).model_dump()
+
+
+async def _job_review_test(payload: Dict[str, Any]):
+    return (await review_test(ReviewTestRequest(**payload))).model_dump()
+
+
+async def _job_run_tests(payload: Dict[str, Any]):
+    return await run_tests(payload)
+
+
+async def _job_git_push(payload: Dict[str, Any]):
+    return await git_push(payload)
+
+
+async def _job_generate_demo_app(payload: Dict[str, Any]):
+    return await generate_demo_app(payload)
+
+
+_job_queue = get_job_queue()
+_job_queue.register("generate_test_cases", _job_generate_test_cases)
+_job_queue.register("generate_test_code", _job_generate_test_code)
+_job_queue.register("generate_test_code_batch", _job_generate_test_code_batch)
+_job_queue.register("review_test", _job_review_test)
+# Прогон тестов и git push не повторяются автоматически после прерывания (побочные эффекты)
+_job_queue.register("run_tests", _job_run_tests, restartable=False)
+_job_queue.register("git_push", _job_git_push, restartable=False)
+_job_queue.register("generate_demo_app", _job_generate_demo_app)
+
+
+def _job_response(job: Dict[str, Any]) -> JobStatusResponse:
+    return JobStatusResponse(**{k: job[k] for k in JobStatusResponse.model_fields if k in job})
+
+
+@app.post("/jobs", response_model=JobStatusResponse, status_code=202)
+async def submit_job(payload: JobSubmitRequest):
+    """Поставить долгую операцию в очередь; результат забирается по id"""
+    try:
+        job_id = await _job_queue.submit(payload.kind, payload.payload, payload.priority)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    job = await run_in_threadpool(_job_queue.store.get, job_id)
+    return _job_response(job)
+
+
+@app.get("/jobs")
+async def list_jobs(status: str | None = None, limit: int = 50):
+    jobs = await run_in_threadpool(_job_queue.store.list, status, limit)
+    return {"jobs": [_job_response({**j, "result": None}) for j in jobs]}
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    job = await run_in_threadpool(_job_queue.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return _job_response({**job, "result": None})
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await run_in_threadpool(_job_queue.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    if job["status"] not in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Задача ещё не завершена (status={job['status']})")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=422, detail=job["error"] or job["status"])
+    return job["result"]
+
+
+@app.post("/jobs/{job_id}/cancel", response_model=JobStatusResponse)
+async def cancel_job(job_id: str):
+    job = await _job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return _job_response({**job, "result": None})
@@ -1,19 +1,84 @@
 import base64
 import json
-from typing import List
+import logging
+import math
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, List, TypeVar
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception, wait_exponential_jitter
 from backend.services.config import get_settings
+from backend.services.http_pool import get_http_registry, OPENAI_DEFAULT_BASE_URL
+from backend.services.backends import BackendPool, Backend, get_backend_router, is_backend_failure
+from backend.services.resilience import hedged, is_retryable, get_latency_tracker, retry_after_seconds, wait_retry_after
+from backend.services.llm_cache import LLMCache, get_llm_cache
+from backend.services.json_stream import JsonArrayItemParser
+from backend.services.singleflight import get_single_flight
 from backend.services.schemas import TestCase, ReviewTestResponse, ReviewSuggestion
+from backend.services.metrics import LLM_HEDGES, LLM_LATENCY, LLM_RETRIES, LLM_TOKENS
+from backend.services.log import get_logger
+from backend.services.ollama_warmup import keep_alive
+from backend.services.rate_limit import estimate_tokens, get_rate_limiters
+
+
+logger = get_logger("backend.ai")
+
+T = TypeVar("T")
+
+# Фактический расход токенов текущего вызова (словарь общий и для задач, порождённых хеджированием)
+_usage_var: ContextVar[Dict[str, int] | None] = ContextVar("llm_usage", default=None)
+
+
+def _retry_stop(retry_state) -> bool:
+	"""Не больше LLM_RETRY_ATTEMPTS попыток и не дольше LLM_RETRY_DEADLINE секунд на все попытки"""
+	settings = get_settings()
+	elapsed = retry_state.seconds_since_start or 0.0
+	return retry_state.attempt_number >= settings.llm_retry_attempts or elapsed >= settings.llm_retry_deadline
+
+
+def _count_retry(retry_state) -> None:
+	client = retry_state.args[0]
+	LLM_RETRIES.inc(provider=client.provider, model=client.model)
+	logger.warning(
+		"llm_retry",
+		extra={"provider": client.provider, "model": client.model, "attempt": retry_state.attempt_number, "error": str(retry_state.outcome.exception())},
+	)
+
+
+def _require_text(content: str) -> str:
+	if not content.strip():
+		raise ValueError("Пустой ответ модели")
+	return content
+
+
+def _review_score(value: Any, default: int = 70) -> int:
+	"""Оценка ревью 0-100; модель может вернуть "85/100" или "85.5" — берём первое число"""
+	if isinstance(value, (int, float)) and not isinstance(value, bool):
+		number = float(value)
+	else:
+		match = re.match(r"\s*(-?\d+(?:[.,]\d+)?)", str(value or ""))
+		if match is None:
+			return default
+		number = float(match.group(1).replace(",", "."))
+	if not math.isfinite(number):
+		return default
+	return max(0, min(100, round(number)))
 
 
 class AIClient:
-	def __init__(self, provider: str | None = None, model: str | None = None) -> None:
+	def __init__(
+		self,
+		provider: str | None = None,
+		model: str | None = None,
+		use_cache: bool = True,
+		refresh_cache: bool = False,
+	) -> None:
 		self.settings = get_settings()
 		self.provider = (provider or self.settings.ai_provider or "openai").lower()
 		if self.provider not in {"openai", "ollama"}:
 			raise ValueError(f"Unsupported AI provider '{self.provider}'. Используйте 'openai' или 'ollama'.")
-		self.base_url = self.settings.openai_base_url or "https://api.openai.com/v1"
+		self.base_url = self.settings.openai_base_url or OPENAI_DEFAULT_BASE_URL
 		# Ollama не требует ключа, но нуждается в корректном базовом URL
 		self.ollama_base_url = (self.settings.ollama_base_url or "http://localhost:11434").rstrip("/")
 		self.api_key = self.settings.openai_api_key
@@ -24,6 +89,9 @@ class AIClient:
 			self.model = self.settings.ollama_model
 		else:
 			self.model = self.settings.openai_model
+		# use_cache=False — не читать и не писать кэш; refresh_cache=True — не читать, но перезаписать
+		self.use_cache = use_cache
+		self.refresh_cache = refresh_cache
 
 	def _headers(self) -> dict:
 		if self.provider == "openai":
@@ -36,8 +104,145 @@ class AIClient:
 		# Ollama does not require auth
 		return {"Content-Type": "application/json"}
 
-	@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=8))
 	async def _chat(self, messages: List[dict], response_format: str | None = None) -> str:
+		return await self._chat_parsed(messages, _require_text, response_format)
+
+	async def _chat_parsed(self, messages: List[dict], parse: Callable[[str], T], response_format: str | None = None) -> T:
+		"""Ответ модели, разобранный parse. В кэш попадает только ответ, который удалось разобрать:
+		битый JSON не возвращается из кэша при повторных запросах, а запрашивается заново.
+		"""
+		key = LLMCache.make_key(self.provider, self.model, messages, response_format)
+		cache = get_llm_cache()
+		if cache is not None and not self.use_cache:
+			cache.counters["bypassed"] += 1
+			cache = None
+		if cache is not None and not self.refresh_cache:
+			cached = await cache.get(key)
+			if cached is not None:
+				try:
+					return parse(cached)
+				except Exception:
+					# Запись, сделанная до проверки разбора, — удаляем и спрашиваем модель заново
+					await cache.delete(key)
+		# Одинаковые одновременные запросы разделяют один вызов модели
+		content = await get_single_flight().do(key, lambda: self._chat_upstream(messages, response_format))
+		result = parse(content)
+		if cache is not None:
+			await cache.set(key, content)
+		return result
+
+	# Повторяются только временные сбои (таймауты, сеть, 429, 5xx) с учётом Retry-After;
+	# 4xx, ошибки разбора и открытый circuit breaker пробрасываются сразу
+	@retry(
+		retry=retry_if_exception(is_retryable),
+		stop=_retry_stop,
+		wait=wait_retry_after(wait_exponential_jitter(initial=1, max=8), max_wait=30.0),
+		before_sleep=_count_retry,
+		reraise=True,
+	)
+	async def _chat_upstream(self, messages: List[dict], response_format: str | None = None) -> str:
+		limiter = get_rate_limiters().get(self.provider, self.model)
+		estimated = estimate_tokens(messages) + self.settings.llm_completion_token_estimate
+		await limiter.acquire(estimated)
+		usage: Dict[str, int] = {}
+		_usage_var.set(usage)
+		started = time.perf_counter()
+		outcome = "error"
+		content = ""
+		try:
+			content = await self._chat_request(messages, response_format)
+			outcome = "ok"
+			return content
+		except httpx.HTTPStatusError as exc:
+			if exc.response.status_code == 429:
+				limiter.penalize(retry_after_seconds(exc) or 1.0)
+			raise
+		finally:
+			limiter.settle(estimated, usage.get("total"))
+			elapsed = time.perf_counter() - started
+			LLM_LATENCY.observe(elapsed, provider=self.provider, model=self.model, mode="chat", outcome=outcome)
+			if outcome == "ok":
+				get_latency_tracker().record(self.provider, self.model, elapsed)
+			if logger.isEnabledFor(logging.DEBUG):
+				logger.debug(
+					"llm_call",
+					extra={
+						"provider": self.provider,
+						"model": self.model,
+						"outcome": outcome,
+						"elapsed_ms": round(elapsed * 1000, 2),
+						"prompt_chars": sum(len(str(m.get("content", ""))) for m in messages),
+						"response_chars": len(content),
+					},
+				)
+
+	def _record_usage(self, prompt_tokens: int | None, completion_tokens: int | None) -> None:
+		usage = _usage_var.get()
+		if usage is not None:
+			usage["total"] = usage.get("total", 0) + (prompt_tokens or 0) + (completion_tokens or 0)
+		if prompt_tokens:
+			LLM_TOKENS.inc(prompt_tokens, provider=self.provider, model=self.model, type="prompt")
+		if completion_tokens:
+			LLM_TOKENS.inc(completion_tokens, provider=self.provider, model=self.model, type="completion")
+
+	def _hedge_delay(self) -> float | None:
+		"""Через сколько секунд без ответа отправлять запасной запрос: p95 задержки, но не меньше минимума"""
+		if not self.settings.llm_hedge_enabled:
+			return None
+		p95 = get_latency_tracker().quantile(self.provider, self.model, 0.95)
+		if p95 is None:
+			return None
+		return max(p95, self.settings.llm_hedge_min_delay)
+
+	async def _chat_request(self, messages: List[dict], response_format: str | None = None) -> str:
+		pool = get_backend_router().pool(self.provider)
+		candidates = pool.candidates()
+		delay = self._hedge_delay()
+		if delay is None:
+			return await self._chat_failover(pool, candidates, messages, response_format)
+		# Запасной запрос в первую очередь идёт на другой бэкенд
+		backup = candidates[1:] + candidates[:1]
+		content, winner = await hedged(
+			lambda: self._chat_failover(pool, candidates, messages, response_format),
+			lambda: self._chat_hedge(pool, backup, messages, response_format),
+			delay,
+		)
+		LLM_HEDGES.inc(provider=self.provider, model=self.model, winner=winner)
+		return content
+
+	async def _chat_hedge(self, pool: BackendPool, candidates: List[Backend], messages: List[dict], response_format: str | None) -> str:
+		"""Запасной запрос хеджа — это отдельный вызов провайдера, поэтому он тоже проходит через лимитер"""
+		limiter = get_rate_limiters().get(self.provider, self.model)
+		estimated = estimate_tokens(messages) + self.settings.llm_completion_token_estimate
+		await limiter.acquire(estimated)
+		# Своя запись расхода: задача хеджа работает в копии контекста и не смешивает токены с основным вызовом
+		usage: Dict[str, int] = {}
+		_usage_var.set(usage)
+		try:
+			return await self._chat_failover(pool, candidates, messages, response_format)
+		except httpx.HTTPStatusError as exc:
+			if exc.response.status_code == 429:
+				limiter.penalize(retry_after_seconds(exc) or 1.0)
+			raise
+		finally:
+			limiter.settle(estimated, usage.get("total"))
+
+	async def _chat_failover(self, pool: BackendPool, candidates: List[Backend], messages: List[dict], response_format: str | None) -> str:
+		"""Запрос к наименее загруженному бэкенду провайдера; при сбое сервера — к следующему"""
+		last_exc: Exception | None = None
+		for backend in candidates:
+			try:
+				async with pool.track(backend):
+					return await self._chat_backend(backend.url, messages, response_format)
+			except Exception as exc:
+				if not is_backend_failure(exc):
+					raise
+				last_exc = exc
+				logger.warning("backend_failover", extra={"provider": self.provider, "backend": backend.url, "error": str(exc) or exc.__class__.__name__})
+		assert last_exc is not None
+		raise last_exc
+
+	async def _chat_backend(self, base_url: str, messages: List[dict], response_format: str | None = None) -> str:
 		if self.provider == "openai":
 			payload: dict = {
 				"model": self.model,
@@ -46,14 +251,16 @@ class AIClient:
 			}
 			if response_format == "json":
 				payload["response_format"] = {"type": "json_object"}
-			async with httpx.AsyncClient(timeout=60.0) as client:
-				resp = await client.post(f"{self.base_url}/chat/completions", headers=self._headers(), json=payload)
-				resp.raise_for_status()
-				data = resp.json()
-				return data["choices"][0]["message"]["content"]
+			client = get_http_registry().openai(base_url)
+			resp = await client.post(f"{base_url}/chat/completions", headers=self._headers(), json=payload, timeout=60.0)
+			resp.raise_for_status()
+			data = resp.json()
+			usage = data.get("usage") or {}
+			self._record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+			return data["choices"][0]["message"]["content"]
 		# Ollama chat
 		model = self.model or self.settings.ollama_model
-		base = self.ollama_base_url
+		base = base_url
 		ollama_payload = {
 			"model": model,
 			"messages": messages,
@@ -62,24 +269,148 @@ class AIClient:
 			},
 			"stream": False,
 		}
+		if keep_alive() is not None:
+			ollama_payload["keep_alive"] = keep_alive()
 		if response_format == "json":
 			ollama_payload["format"] = "json"
-		print(f"[DEBUG] Отправка запроса к Ollama: {base}/api/chat, model={model}")
-		async with httpx.AsyncClient(timeout=120.0) as client:
-			resp = await client.post(f"{base}/api/chat", headers=self._headers(), json=ollama_payload)
-			print(f"[DEBUG] Ответ от Ollama получен, статус: {resp.status_code}")
+		client = get_http_registry().ollama(base)
+		resp = await client.post(f"{base}/api/chat", headers=self._headers(), json=ollama_payload, timeout=120.0)
+		resp.raise_for_status()
+		data = resp.json()
+		self._record_usage(data.get("prompt_eval_count"), data.get("eval_count"))
+		# Ollama returns {"message":{"role":"assistant","content":"..."}}
+		if "message" in data and "content" in data["message"]:
+			return data["message"]["content"]
+		# Fallback if choices-like
+		if "choices" in data:
+			return data["choices"][0]["message"]["content"]
+		return str(data)
+
+	async def _chat_stream(
+		self,
+		messages: List[dict],
+		response_format: str | None = None,
+		validate: Callable[[str], Any] = _require_text,
+	) -> AsyncIterator[str]:
+		"""Потоковый вариант _chat: отдаёт фрагменты ответа. Полный ответ попадает в кэш, если проходит validate."""
+		cache = get_llm_cache()
+		if cache is not None and not self.use_cache:
+			cache.counters["bypassed"] += 1
+			cache = None
+		key = LLMCache.make_key(self.provider, self.model, messages, response_format)
+		if cache is not None and not self.refresh_cache:
+			cached = await cache.get(key)
+			if cached is not None:
+				try:
+					validate(cached)
+				except Exception:
+					await cache.delete(key)
+				else:
+					yield cached
+					return
+		parts: List[str] = []
+		limiter = get_rate_limiters().get(self.provider, self.model)
+		estimated = estimate_tokens(messages) + self.settings.llm_completion_token_estimate
+		await limiter.acquire(estimated)
+		usage: Dict[str, int] = {}
+		_usage_var.set(usage)
+		started = time.perf_counter()
+		outcome = "error"
+		try:
+			async for delta in self._chat_stream_upstream(messages, response_format):
+				parts.append(delta)
+				yield delta
+			outcome = "ok"
+		finally:
+			limiter.settle(estimated, usage.get("total"))
+			LLM_LATENCY.observe(time.perf_counter() - started, provider=self.provider, model=self.model, mode="stream", outcome=outcome)
+		if cache is not None:
+			content = "".join(parts)
+			try:
+				validate(content)
+			except Exception:
+				return
+			await cache.set(key, content)
+
+	async def _chat_stream_upstream(self, messages: List[dict], response_format: str | None = None) -> AsyncIterator[str]:
+		"""Поток от выбранного бэкенда; на другой бэкенд переключаемся, только пока не отдано ни одного фрагмента"""
+		pool = get_backend_router().pool(self.provider)
+		last_exc: Exception | None = None
+		for backend in pool.candidates():
+			started = False
+			try:
+				async with pool.track(backend):
+					async for delta in self._chat_stream_backend(backend.url, messages, response_format):
+						started = True
+						yield delta
+				return
+			except Exception as exc:
+				if started or not is_backend_failure(exc):
+					raise
+				last_exc = exc
+				logger.warning("backend_failover", extra={"provider": self.provider, "backend": backend.url, "error": str(exc) or exc.__class__.__name__})
+		assert last_exc is not None
+		raise last_exc
+
+	async def _chat_stream_backend(self, base_url: str, messages: List[dict], response_format: str | None = None) -> AsyncIterator[str]:
+		if self.provider == "openai":
+			payload: dict = {
+				"model": self.model,
+				"messages": messages,
+				"temperature": 0.2,
+				"stream": True,
+			}
+			if response_format == "json":
+				payload["response_format"] = {"type": "json_object"}
+			client = get_http_registry().openai(base_url)
+			async with client.stream("POST", f"{base_url}/chat/completions", headers=self._headers(), json=payload, timeout=60.0) as resp:
+				resp.raise_for_status()
+				# OpenAI отдаёт SSE: строки вида "data: {...}" и финальное "data: [DONE]"
+				async for line in resp.aiter_lines():
+					if not line.startswith("data:"):
+						continue
+					raw = line[5:].strip()
+					if raw == "[DONE]":
+						break
+					chunk = json.loads(raw)
+					# usage приходит, только если сервер отдаёт его в потоке (stream_options.include_usage)
+					usage = chunk.get("usage") or {}
+					self._record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+					choices = chunk.get("choices") or []
+					delta = (choices[0].get("delta") or {}).get("content") if choices else None
+					if delta:
+						yield delta
+			return
+		# Ollama отдаёт NDJSON: по объекту {"message":{"content":"..."},"done":false} на строку
+		model = self.model or self.settings.ollama_model
+		base = base_url
+		ollama_payload = {
+			"model": model,
+			"messages": messages,
+			"options": {
+				"temperature": 0.2,
+			},
+			"stream": True,
+		}
+		if keep_alive() is not None:
+			ollama_payload["keep_alive"] = keep_alive()
+		if response_format == "json":
+			ollama_payload["format"] = "json"
+		client = get_http_registry().ollama(base)
+		async with client.stream("POST", f"{base}/api/chat", headers=self._headers(), json=ollama_payload, timeout=120.0) as resp:
 			resp.raise_for_status()
-			data = resp.json()
-			print(f"[DEBUG] Данные от Ollama распарсены")
-			# Ollama returns {"message":{"role":"assistant","content":"..."}}
-			if "message" in data and "content" in data["message"]:
-				return data["message"]["content"]
-			# Fallback if choices-like
-			if "choices" in data:
-				return data["choices"][0]["message"]["content"]
-			return str(data)
+			async for line in resp.aiter_lines():
+				if not line.strip():
+					continue
+				chunk = json.loads(line)
+				delta = (chunk.get("message") or {}).get("content")
+				if delta:
+					yield delta
+				if chunk.get("done"):
+					self._record_usage(chunk.get("prompt_eval_count"), chunk.get("eval_count"))
+					break
 
-	async def generate_test_cases(self, description: str, lang: str = "ru", want_markdown: bool = False) -> tuple[list[TestCase], str | None]:
+	def _test_cases_messages(self, description: str, lang: str) -> List[dict]:
 		examples = {
 			"ru": {
 				"positive": {
@@ -118,30 +449,48 @@ class AIClient:
 			f"Важно: шаги должны быть конкретными и проверяемыми, ожидаемый результат — четким."
 		)
 		user = f"Описание фичи:\n{description}"
-		content = await self._chat(
-			[
-				{"role": "system", "content": system},
-				{"role": "user", "content": user},
-			],
-			response_format="json",
-		)
+		return [
+			{"role": "system", "content": system},
+			{"role": "user", "content": user},
+		]
+
+	@classmethod
+	def _parse_test_cases(cls, content: str) -> List[TestCase]:
 		data = json.loads(content)
-		items = data.get("test_cases", [])
-		result: List[TestCase] = []
-		for item in items:
-			title = item.get("title") or "Тест"
-			steps = [s for s in item.get("steps", []) if isinstance(s, str)]
-			expected = item.get("expected") or ""
-			result.append(TestCase(title=title, steps=steps, expected=expected))
+		if not isinstance(data, dict) or not isinstance(data.get("test_cases", []), list):
+			raise ValueError("Ответ модели без списка test_cases")
+		return [cls._parse_test_case(item) for item in data.get("test_cases", [])]
+
+	@staticmethod
+	def _parse_test_case(item: dict) -> TestCase:
+		title = item.get("title") or "Тест"
+		steps = [s for s in item.get("steps", []) if isinstance(s, str)]
+		expected = item.get("expected") or ""
+		return TestCase(title=title, steps=steps, expected=expected)
+
+	@staticmethod
+	def test_cases_markdown(cases: List[TestCase]) -> str:
+		md_parts = []
+		for c in cases:
+			md_parts.append(f"### {c.title}\n\n- Шаги:\n" + "\n".join([f"  - {s}" for s in c.steps]) + f"\n\n- Ожидаемо: {c.expected}\n")
+		return "\n".join(md_parts)
+
+	async def generate_test_cases(self, description: str, lang: str = "ru", want_markdown: bool = False) -> tuple[list[TestCase], str | None]:
+		result: List[TestCase] = await self._chat_parsed(self._test_cases_messages(description, lang), self._parse_test_cases, response_format="json")
 		md: str | None = None
 		if want_markdown:
-			md_parts = []
-			for c in result:
-				md_parts.append(f"### {c.title}\n\n- Шаги:\n" + "\n".join([f"  - {s}" for s in c.steps]) + f"\n\n- Ожидаемо: {c.expected}\n")
-			md = "\n".join(md_parts)
+			md = self.test_cases_markdown(result)
 		return result, md
 
-	async def generate_playwright_code(self, test_case: TestCase, language: str = "ts", base_url: str | None = None) -> str:
+	async def stream_test_cases(self, description: str, lang: str = "ru") -> AsyncIterator[TestCase]:
+		"""Потоковая генерация: отдаёт каждый TestCase, как только его JSON-объект закрылся"""
+		parser = JsonArrayItemParser()
+		async for delta in self._chat_stream(self._test_cases_messages(description, lang), response_format="json", validate=self._parse_test_cases):
+			for item in parser.feed(delta):
+				if isinstance(item, dict):
+					yield self._parse_test_case(item)
+
+	def _playwright_messages(self, test_case: TestCase, language: str, base_url: str | None) -> List[dict]:
 		lang_name = "TypeScript" if language == "ts" else "JavaScript"
 		
 		# Few-shot примеры для стабильных локаторов
@@ -195,15 +544,72 @@ test('Успешная авторизация', async ({ page }) => {
 			ensure_ascii=False,
 			indent=2,
 		)
-		code = await self._chat(
-			[
-				{"role": "system", "content": system},
-				{"role": "user", "content": user},
-			]
-		)
+		return [
+			{"role": "system", "content": system},
+			{"role": "user", "content": user},
+		]
+
+	async def generate_playwright_code(self, test_case: TestCase, language: str = "ts", base_url: str | None = None) -> str:
+		code = await self._chat(self._playwright_messages(test_case, language, base_url))
 		return code.strip()
 
-	async def generate_playwright_python_code(self, test_case: TestCase, base_url: str | None = None) -> str:
+	def _playwright_pack_messages(self, test_cases: List[TestCase], language: str, base_url: str | None) -> List[dict]:
+		"""Несколько тест-кейсов в одном запросе: системный промпт с примером отправляется один раз на пачку"""
+		if language == "python":
+			single = self._playwright_python_messages(test_cases[0], base_url)
+		else:
+			single = self._playwright_messages(test_cases[0], language, base_url)
+		system = single[0]["content"] + (
+			"\nНа вход дан список тест-кейсов. Для КАЖДОГО тест-кейса сгенерируй отдельный самостоятельный файл теста со всеми импортами. "
+			"Верни JSON: {\"files\":[{\"index\":0,\"code\":\"...\"}]}, где index — номер тест-кейса во входном списке."
+		)
+		user = json.dumps(
+			{
+				"test_cases": [{"index": i, **tc.model_dump()} for i, tc in enumerate(test_cases)],
+				"language": language,
+				"base_url": base_url,
+			},
+			ensure_ascii=False,
+			indent=2,
+		)
+		return [
+			{"role": "system", "content": system},
+			{"role": "user", "content": user},
+		]
+
+	async def generate_playwright_code_pack(self, test_cases: List[TestCase], language: str = "ts", base_url: str | None = None) -> List[str | None]:
+		"""Код для нескольких тест-кейсов одним запросом.
+
+		Возвращает список в порядке test_cases; None — для кейсов, которых нет в ответе
+		(ответ обрезан, не JSON, пустой код): их нужно сгенерировать отдельно.
+		"""
+		try:
+			return await self._chat_parsed(
+				self._playwright_pack_messages(test_cases, language, base_url),
+				lambda content: self._parse_code_pack(content, len(test_cases)),
+				response_format="json",
+			)
+		except ValueError:
+			return [None] * len(test_cases)
+
+	@staticmethod
+	def _parse_code_pack(content: str, count: int) -> List[str | None]:
+		"""Код по индексам кейсов; ValueError, если из ответа не удалось выделить ни одного файла"""
+		result: List[str | None] = [None] * count
+		data = json.loads(content)
+		files = data.get("files") if isinstance(data, dict) else None
+		for position, item in enumerate(files if isinstance(files, list) else []):
+			if not isinstance(item, dict):
+				continue
+			index = item.get("index", position)
+			code = item.get("code")
+			if isinstance(index, int) and 0 <= index < len(result) and result[index] is None and isinstance(code, str) and code.strip():
+				result[index] = code.strip()
+		if all(code is None for code in result):
+			raise ValueError("В ответе модели нет кода ни для одного тест-кейса")
+		return result
+
+	def _playwright_python_messages(self, test_case: TestCase, base_url: str | None) -> List[dict]:
 		example_py = """import pytest
 from playwright.sync_api import Page, expect
 
@@ -241,14 +647,24 @@ def test_successful_login(page: Page):
 			ensure_ascii=False,
 			indent=2,
 		)
-		code = await self._chat(
-			[
-				{"role": "system", "content": system},
-				{"role": "user", "content": user},
-			]
-		)
+		return [
+			{"role": "system", "content": system},
+			{"role": "user", "content": user},
+		]
+
+	async def generate_playwright_python_code(self, test_case: TestCase, base_url: str | None = None) -> str:
+		code = await self._chat(self._playwright_python_messages(test_case, base_url))
 		return code.strip()
 
+	async def stream_playwright_code(self, test_case: TestCase, language: str = "ts", base_url: str | None = None) -> AsyncIterator[str]:
+		"""Потоковая генерация кода автотеста: отдаёт фрагменты текста по мере генерации"""
+		if language == "python":
+			messages = self._playwright_python_messages(test_case, base_url)
+		else:
+			messages = self._playwright_messages(test_case, language, base_url)
+		async for delta in self._chat_stream(messages):
+			yield delta
+
 	async def generate_demo_app(self, description: str) -> dict:
 		system = (
 			"Создай минимальное веб-приложение (index.html, script.js, styles.css) для демонстрации сценария. "
@@ -284,24 +700,72 @@ def test_successful_login(page: Page):
 			"{\"summary\":\"...\",\"score\":0-100,\"suggestions\":[{\"title\":\"...\",\"comment\":\"...\",\"diff\":\"...\"}]}."
 		)
 		user = code
-		content = await self._chat(
+		return await self._chat_parsed(
 			[
 				{"role": "system", "content": system},
 				{"role": "user", "content": user},
 			],
+			self._parse_review,
 			response_format="json",
 		)
+
+	async def review_test_regions(self, regions: List[tuple[int, int, str]], problems: List[str]) -> ReviewTestResponse:
+		"""Ревью только фрагментов с найденными локальным анализатором проблемами (строки пронумерованы)"""
+		system = (
+			"Ты — код-ревьюер тестов на Playwright. Тебе даны только фрагменты файла с номерами строк "
+			"и проблемы, найденные статическим анализом. Проверь эти фрагменты: подтверди или уточни проблемы, "
+			"найди другие проблемы стабильности в этих строках и предложи исправления. Не делай выводов о коде вне фрагментов. Верни JSON: "
+			"{\"summary\":\"...\",\"score\":0-100,\"suggestions\":[{\"title\":\"...\",\"comment\":\"...\",\"diff\":\"...\",\"line\":0}]}."
+		)
+		fragments = "\n\n".join(f"Строки {start}-{end}:\n{text}" for start, end, text in regions)
+		user = "Найденные проблемы:\n" + "\n".join(f"- {p}" for p in problems) + f"\n\nФрагменты:\n{fragments}"
+		return await self._chat_parsed(
+			[
+				{"role": "system", "content": system},
+				{"role": "user", "content": user},
+			],
+			self._parse_review,
+			response_format="json",
+		)
+
+	async def review_test_unit(self, context: str, unit: str) -> ReviewTestResponse:
+		"""Ревью одного теста; общая часть файла передаётся только для контекста.
+
+		Номера строк — внутри теста, с 1: промпт не зависит от положения теста в файле,
+		поэтому неизменённые тесты при повторном ревью берутся из кэша ответов.
+		"""
+		system = (
+			"Ты — код-ревьюер тестов на Playwright. Тебе дан один тест (строки пронумерованы с 1) и, для контекста, "
+			"общая часть файла: импорты, фикстуры, хуки. Проверь только тест: проблемы стабильности, плохие локаторы, "
+			"отсутствующие ожидания и проверки. Верни JSON: "
+			"{\"summary\":\"...\",\"score\":0-100,\"suggestions\":[{\"title\":\"...\",\"comment\":\"...\",\"diff\":\"...\",\"line\":0}]}, "
+			"где line — номер строки внутри теста."
+		)
+		numbered = "\n".join(f"{n:>4}| {line}" for n, line in enumerate(unit.splitlines(), start=1))
+		user = f"Общая часть файла:\n{context or '(нет)'}\n\nТест:\n{numbered}"
+		return await self._chat_parsed(
+			[
+				{"role": "system", "content": system},
+				{"role": "user", "content": user},
+			],
+			self._parse_review,
+			response_format="json",
+		)
+
+	@staticmethod
+	def _parse_review(content: str) -> ReviewTestResponse:
 		data = json.loads(content)
 		suggestions = [
 			ReviewSuggestion(
 				title=item.get("title") or "Предложение",
 				comment=item.get("comment") or "",
 				diff=item.get("diff"),
+				line=item.get("line") if isinstance(item.get("line"), int) else None,
 			)
 			for item in data.get("suggestions", [])
 		]
-		score = data.get("score", 70)
+		score = _review_score(data.get("score"))
 		summary = data.get("summary", "")
-		return ReviewTestResponse(summary=summary, score=score, suggestions=suggestions)
+		return ReviewTestResponse(summary=summary, score=score, suggestions=suggestions, source="ai")
 
 
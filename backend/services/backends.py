@@ -0,0 +1,216 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+import httpx
+from backend.services.cassette import replaying
+from backend.services.config import get_settings
+from backend.services.http_pool import get_http_registry, OPENAI_DEFAULT_BASE_URL
+from backend.services.resilience import CircuitBreaker, CircuitOpenError
+
+
+def _split_urls(value: str | None) -> List[str]:
+	return [u.strip().rstrip("/") for u in (value or "").split(",") if u.strip()]
+
+
+def backend_urls(provider: str) -> List[str]:
+	"""Базовые URL провайдера: список из *_BASE_URLS или единственный *_BASE_URL"""
+	settings = get_settings()
+	if provider == "ollama":
+		return _split_urls(settings.ollama_base_urls) or [(settings.ollama_base_url or "http://localhost:11434").rstrip("/")]
+	return _split_urls(settings.openai_base_urls) or [(settings.openai_base_url or OPENAI_DEFAULT_BASE_URL).rstrip("/")]
+
+
+def is_backend_failure(exc: BaseException) -> bool:
+	"""Сбой сервера, а не запроса: имеет смысл попробовать другой бэкенд"""
+	if isinstance(exc, httpx.HTTPStatusError):
+		return exc.response.status_code >= 500 or exc.response.status_code == 429
+	return isinstance(exc, (httpx.TransportError, httpx.TimeoutException, CircuitOpenError))
+
+
+class Backend:
+	"""Один экземпляр провайдера (например, отдельная машина с Ollama) и его статистика"""
+
+	def __init__(self, provider: str, url: str, alpha: float, breaker: CircuitBreaker) -> None:
+		self.provider = provider
+		self.url = url
+		self.alpha = alpha
+		self.breaker = breaker
+		self.healthy = True
+		self.outstanding = 0
+		self.ewma_latency: float | None = None
+		self.requests = 0
+		self.failures = 0
+		self.consecutive_failures = 0
+		self.last_error: str | None = None
+		self.last_probe: float | None = None
+		self.probe_latency: float | None = None
+
+	def score(self, strategy: str) -> tuple:
+		latency = self.ewma_latency or 0.0
+		if strategy == "ewma":
+			# Задержка с поправкой на очередь: занятый быстрый бэкенд уступает свободному
+			return (latency * (self.outstanding + 1), self.outstanding)
+		return (self.outstanding, latency)
+
+	def record_success(self, elapsed: float | None = None) -> None:
+		if elapsed is not None:
+			self.ewma_latency = elapsed if self.ewma_latency is None else self.alpha * elapsed + (1 - self.alpha) * self.ewma_latency
+		self.consecutive_failures = 0
+		self.healthy = True
+		self.breaker.record_success()
+
+	def record_failure(self, exc: BaseException) -> None:
+		self.failures += 1
+		self.consecutive_failures += 1
+		self.last_error = str(exc) or exc.__class__.__name__
+		self.breaker.record_failure()
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"url": self.url,
+			"healthy": self.healthy,
+			"circuit": self.breaker.state,
+			"outstanding": self.outstanding,
+			"ewma_latency_ms": round(self.ewma_latency * 1000, 2) if self.ewma_latency is not None else None,
+			"requests": self.requests,
+			"failures": self.failures,
+			"consecutive_failures": self.consecutive_failures,
+			"last_error": self.last_error,
+			"last_probe": self.last_probe,
+			"probe_latency_ms": round(self.probe_latency * 1000, 2) if self.probe_latency is not None else None,
+		}
+
+
+class BackendPool:
+	"""Набор бэкендов одного провайдера: выбор наименее загруженного, пассивные и активные проверки"""
+
+	def __init__(
+		self,
+		provider: str,
+		urls: List[str],
+		strategy: str = "least_outstanding",
+		alpha: float = 0.3,
+		failure_threshold: int = 5,
+		reset_timeout: float = 30.0,
+	) -> None:
+		self.provider = provider
+		self.strategy = strategy
+		self.backends = [Backend(provider, url, alpha, CircuitBreaker(failure_threshold, reset_timeout)) for url in urls]
+
+	def candidates(self) -> List[Backend]:
+		"""Бэкенды с незамкнутым автоматом в порядке предпочтения; если таких нет — отказ без запроса.
+
+		Не прошедшие фоновую проверку пропускаются, пока есть здоровые; если нездоровы все — пробуются они.
+		"""
+		ranked = [b for b in sorted(self.backends, key=lambda b: b.score(self.strategy)) if b.breaker.state != "open"]
+		if not ranked:
+			raise CircuitOpenError(f"Все бэкенды {self.provider} временно недоступны (circuit breaker open)")
+		return [b for b in ranked if b.healthy] or ranked
+
+	@asynccontextmanager
+	async def track(self, backend: Backend) -> AsyncIterator[Backend]:
+		backend.breaker.acquire()
+		backend.outstanding += 1
+		backend.requests += 1
+		started = time.perf_counter()
+		try:
+			yield backend
+		except Exception as exc:
+			if is_backend_failure(exc):
+				backend.record_failure(exc)
+			else:
+				# Ответ 4xx или ошибка разбора — сервер жив, но и успехом для автомата это не считается
+				backend.breaker.release()
+			raise
+		except BaseException:
+			# Отмена (например, проигравший хедж) ничего не говорит о здоровье бэкенда
+			backend.breaker.release()
+			raise
+		else:
+			backend.record_success(time.perf_counter() - started)
+		finally:
+			backend.outstanding -= 1
+
+	async def probe(self, headers: Dict[str, str] | None = None) -> None:
+		"""Активная проверка: Ollama — /api/tags, OpenAI-совместимые — /models"""
+		path = "/api/tags" if self.provider == "ollama" else "/models"
+
+		async def one(backend: Backend) -> None:
+			client = get_http_registry().ollama(backend.url) if self.provider == "ollama" else get_http_registry().openai(backend.url)
+			backend.last_probe = time.time()
+			started = time.perf_counter()
+			# Проверка меняет только признак здоровья: автомат управляется реальными вызовами
+			try:
+				resp = await client.get(f"{backend.url}{path}", headers=headers or {}, timeout=5.0)
+				resp.raise_for_status()
+			except Exception as exc:
+				backend.healthy = False
+				backend.last_error = str(exc) or exc.__class__.__name__
+				return
+			backend.healthy = True
+			backend.probe_latency = time.perf_counter() - started
+
+		await asyncio.gather(*(one(b) for b in self.backends))
+
+	def stats(self) -> Dict[str, Any]:
+		return {"strategy": self.strategy, "backends": [b.stats() for b in self.backends]}
+
+
+class BackendRouter:
+	"""Пулы бэкендов по провайдерам и фоновые проверки их здоровья"""
+
+	def __init__(self) -> None:
+		self.pools: Dict[str, BackendPool] = {}
+		self._task: asyncio.Task | None = None
+
+	def pool(self, provider: str) -> BackendPool:
+		pool = self.pools.get(provider)
+		if pool is None:
+			settings = get_settings()
+			pool = BackendPool(
+				provider,
+				backend_urls(provider),
+				strategy=settings.backend_routing,
+				failure_threshold=settings.circuit_failure_threshold,
+				reset_timeout=settings.circuit_reset_timeout,
+			)
+			self.pools[provider] = pool
+		return pool
+
+	async def probe_all(self) -> None:
+		"""Проверяются провайдер по умолчанию и все провайдеры с несколькими бэкендами"""
+		settings = get_settings()
+		headers = {"Authorization": f"Bearer {settings.openai_api_key}"} if settings.openai_api_key else {}
+		tasks = []
+		for provider in ("openai", "ollama"):
+			pool = self.pool(provider)
+			if provider == settings.ai_provider or len(pool.backends) > 1:
+				tasks.append(pool.probe(headers if provider == "openai" else None))
+		await asyncio.gather(*tasks, return_exceptions=True)
+
+	async def _probe_loop(self, interval: float) -> None:
+		while True:
+			await self.probe_all()
+			await asyncio.sleep(interval)
+
+	async def start(self) -> None:
+		interval = get_settings().backend_health_interval
+		if self._task is None and interval > 0 and not replaying():
+			self._task = asyncio.create_task(self._probe_loop(interval))
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+
+	def stats(self) -> Dict[str, Any]:
+		return {provider: self.pool(provider).stats() for provider in ("openai", "ollama")}
+
+
+_router = BackendRouter()
+
+
+def get_backend_router() -> BackendRouter:
+	return _router
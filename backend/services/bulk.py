@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Set
+from backend.services.ai import AIClient
+from backend.services.config import get_settings
+from backend.services.playwright_gen import PlaywrightGenerator
+from backend.services.storage import LocalStorage
+
+
+_DONE = object()
+
+
+def item_id(item: Dict[str, Any]) -> str:
+	"""Идентификатор описания: поле id или хэш текста (стабилен между перезапусками)"""
+	if item.get("id") not in (None, ""):
+		return str(item["id"])
+	return hashlib.sha256(str(item.get("description", "")).encode("utf-8")).hexdigest()[:16]
+
+
+def checkpoint_path(run_id: str) -> Path:
+	safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in run_id) or "default"
+	return Path(get_settings().bulk_checkpoint_dir) / f"{safe}.jsonl"
+
+
+class Checkpoint:
+	"""Список успешно обработанных описаний (JSONL, дописывается после каждого элемента)"""
+
+	def __init__(self, path: str | Path) -> None:
+		self.path = Path(path)
+		self.done: Set[str] = set()
+		if self.path.exists():
+			with self.path.open("r", encoding="utf-8") as f:
+				for line in f:
+					try:
+						self.done.add(json.loads(line)["id"])
+					except (json.JSONDecodeError, KeyError, TypeError):
+						# Последняя строка могла оборваться при падении процесса
+						continue
+
+	def mark(self, item_id: str) -> None:
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		with self.path.open("a", encoding="utf-8") as f:
+			f.write(json.dumps({"id": item_id, "at": time.time()}) + "\n")
+		self.done.add(item_id)
+
+
+class UploadTooLargeError(ValueError):
+	"""Тело пакетной загрузки больше BULK_MAX_UPLOAD_BYTES"""
+
+
+def spool_path(checkpoint: Checkpoint) -> Path:
+	"""Свой файл на каждую загрузку: параллельные загрузки с одним run_id не затирают вход друг друга"""
+	return checkpoint.path.with_name(f"{checkpoint.path.stem}.{uuid.uuid4().hex}.input.jsonl")
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], path: Path, limit: int) -> int:
+	"""Пишет поток на диск вне event loop'а; при превышении limit байт файл удаляется и бросается UploadTooLargeError"""
+	await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+	f = await asyncio.to_thread(path.open, "wb")
+	size = 0
+	try:
+		async for chunk in chunks:
+			size += len(chunk)
+			if size > limit:
+				raise UploadTooLargeError(f"Тело запроса больше {limit} байт (BULK_MAX_UPLOAD_BYTES)")
+			await asyncio.to_thread(f.write, chunk)
+	except BaseException:
+		await asyncio.to_thread(f.close)
+		path.unlink(missing_ok=True)
+		raise
+	await asyncio.to_thread(f.close)
+	return size
+
+
+async def read_jsonl_file(path: str) -> AsyncIterator[bytes]:
+	"""Читает файл построчно, не загружая его целиком"""
+	f = await asyncio.to_thread(open, path, "rb")
+	try:
+		while True:
+			line = await asyncio.to_thread(f.readline)
+			if not line:
+				break
+			yield line
+	finally:
+		f.close()
+
+
+class BulkPipeline:
+	"""Конвейер для большого числа описаний фич.
+
+	Чтение JSONL → ограниченная очередь → обработчики (тест-кейсы, код, форматирование,
+	сохранение) → очередь результатов. Когда обработчики заняты, очередь заполняется и
+	чтение входа приостанавливается. Успешные элементы отмечаются в контрольной точке,
+	при повторном запуске они пропускаются.
+	"""
+
+	def __init__(
+		self,
+		ai: AIClient,
+		storage: LocalStorage,
+		target: str = "ts",
+		out: str = "generated/bulk",
+		workers: int | None = None,
+		checkpoint: Checkpoint | None = None,
+	) -> None:
+		self.ai = ai
+		self.storage = storage
+		self.target = target
+		self.out = out.strip("/") or "generated/bulk"
+		self.workers = max(1, workers or get_settings().bulk_workers)
+		self.checkpoint = checkpoint
+		self.generator = PlaywrightGenerator()
+
+	async def run(self, lines: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+		"""Результаты в порядке готовности, по одному словарю на входную строку"""
+		inbox: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+		results: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+
+		async def reader() -> None:
+			number = 0
+			async for raw in lines:
+				number += 1
+				if not raw.strip():
+					continue
+				await inbox.put((number, raw))
+			for _ in range(self.workers):
+				await inbox.put(_DONE)
+
+		async def worker() -> None:
+			cancelled = False
+			try:
+				while True:
+					job = await inbox.get()
+					if job is _DONE:
+						return
+					await results.put(await self._process(*job))
+			except asyncio.CancelledError:
+				cancelled = True
+				raise
+			finally:
+				# Даже упавший обработчик сообщает о завершении, иначе run() ждал бы его вечно
+				if not cancelled:
+					await results.put(_DONE)
+
+		read_task = asyncio.create_task(reader())
+		workers = [asyncio.create_task(worker()) for _ in range(self.workers)]
+		tasks = [read_task, *workers]
+		finished = 0
+		try:
+			while finished < self.workers:
+				# Ошибка чтения входа (например, обрыв загрузки) — пробрасываем сразу: обработчики её не дождутся
+				if read_task.done() and not read_task.cancelled() and read_task.exception() is not None:
+					raise read_task.exception()
+				getter = asyncio.ensure_future(results.get())
+				try:
+					await asyncio.wait([getter] if read_task.done() else [getter, read_task], return_when=asyncio.FIRST_COMPLETED)
+				finally:
+					if not getter.done():
+						getter.cancel()
+				if not getter.done():
+					continue
+				result = getter.result()
+				if result is _DONE:
+					finished += 1
+					continue
+				if result["status"] == "ok" and self.checkpoint is not None:
+					await asyncio.to_thread(self.checkpoint.mark, result["id"])
+				yield result
+			await asyncio.wait(workers)
+			for task in workers:
+				if not task.cancelled() and task.exception() is not None:
+					raise task.exception()
+			await read_task
+		finally:
+			for task in tasks:
+				task.cancel()
+			await asyncio.gather(*tasks, return_exceptions=True)
+
+	async def _process(self, line: int, raw: bytes) -> Dict[str, Any]:
+		started = time.perf_counter()
+		try:
+			item = json.loads(raw)
+			if isinstance(item, str):
+				item = {"description": item}
+		except json.JSONDecodeError as exc:
+			return {"line": line, "id": None, "status": "error", "error": f"Некорректный JSON: {exc}"}
+		if not isinstance(item, dict):
+			return {"line": line, "id": None, "status": "error", "error": "Строка должна быть JSON-объектом или строкой с описанием"}
+		result: Dict[str, Any] = {"line": line, "id": None}
+		try:
+			key = result["id"] = item_id(item)
+			if self.checkpoint is not None and key in self.checkpoint.done:
+				return {**result, "status": "skipped"}
+			description = str(item.get("description") or "").strip()
+			if not description:
+				return {**result, "status": "error", "error": "Пустое поле description"}
+			target = item.get("target") or self.target
+			base = f"{self.out}/{key}"
+			cases, _ = await self.ai.generate_test_cases(description, item.get("lang") or "ru")
+			data = {"test_cases": [c.model_dump() for c in cases]}
+			files = [self.storage.save_file(f"{base}/test_cases.json", json.dumps(data, ensure_ascii=False, indent=2))]
+			errors = []
+			items = await asyncio.gather(
+				*(self.generator.generate_item(i, tc, target, self.ai, item.get("base_url")) for i, tc in enumerate(cases))
+			)
+			for code_item in items:
+				if code_item.error:
+					errors.append({"index": code_item.index, "title": code_item.title, "error": code_item.error})
+					continue
+				folder = "python_tests" if target == "python" else "tests/e2e"
+				files.append(self.storage.save_file(f"{base}/{folder}/{code_item.index:03d}_{code_item.suggested_filename}", code_item.code or ""))
+		except Exception as exc:
+			return {**result, "status": "error", "error": str(exc) or exc.__class__.__name__}
+		return {
+			**result,
+			"status": "ok" if not errors else "partial",
+			"test_cases": len(cases),
+			"files": files,
+			"errors": errors,
+			"duration": round(time.perf_counter() - started, 3),
+		}
@@ -0,0 +1,164 @@
+import base64
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import parse_qsl, urlencode
+import httpx
+from backend.services.config import get_settings
+
+
+MODES = ("off", "record", "replay", "auto")
+
+# Заголовки ответа, которые имеют значение для backend; остальные (и все заголовки запроса, включая токены) не сохраняются
+_KEPT_HEADERS = ("content-type", "retry-after")
+
+
+class CassetteMissError(httpx.RequestError):
+	"""В кассете нет ответа на запрос (режим replay). Не считается сбоем сети: повторов и переключения бэкенда нет"""
+
+
+def request_key(request: httpx.Request) -> str:
+	"""Метод, путь без хоста (бэкенды взаимозаменяемы), отсортированные параметры и хэш тела (JSON — без учёта порядка ключей)"""
+	body = request.content
+	try:
+		body = json.dumps(json.loads(body), ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+	except ValueError:
+		pass
+	query = urlencode(sorted(parse_qsl(request.url.query.decode("ascii", "replace"), keep_blank_values=True)))
+	digest = hashlib.sha256(body).hexdigest()[:24] if body else "-"
+	return f"{request.method} {request.url.path}{'?' + query if query else ''} {digest}"
+
+
+class Cassette:
+	"""Записанные пары запрос/ответ в JSONL (одна строка на обмен).
+
+	Одинаковые запросы с разными ответами (GET до и после записи файла в GitHub) воспроизводятся
+	по порядку, после последнего повторяется последний ответ.
+	"""
+
+	def __init__(self, path: str, mode: str) -> None:
+		if mode not in MODES:
+			raise ValueError(f"Неизвестный режим кассеты: {mode} (ожидается {', '.join(MODES)})")
+		self.path = Path(path)
+		self.mode = mode
+		self._entries: Dict[str, List[Dict[str, Any]]] = {}
+		self._positions: Dict[str, int] = {}
+		self._lock = threading.Lock()
+		self._truncated = False
+		self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "recorded": 0}
+		if mode in ("replay", "auto"):
+			self._load()
+
+	def _load(self) -> None:
+		if not self.path.exists():
+			return
+		with self.path.open(encoding="utf-8") as f:
+			for line in f:
+				if line.strip():
+					entry = json.loads(line)
+					self._entries.setdefault(entry["key"], []).append(entry)
+
+	def lookup(self, key: str) -> Dict[str, Any] | None:
+		with self._lock:
+			entries = self._entries.get(key)
+			if not entries:
+				self.counters["misses"] += 1
+				return None
+			position = self._positions.get(key, 0)
+			self._positions[key] = position + 1
+			self.counters["hits"] += 1
+			return entries[min(position, len(entries) - 1)]
+
+	def record(self, key: str, request: httpx.Request, response: httpx.Response, body: bytes) -> None:
+		entry: Dict[str, Any] = {
+			"key": key,
+			"url": str(request.url.copy_with(query=None)),
+			"status": response.status_code,
+			"headers": {k: v for k, v in response.headers.items() if k.lower() in _KEPT_HEADERS},
+		}
+		try:
+			entry["body"] = body.decode("utf-8")
+		except UnicodeDecodeError:
+			entry["body_b64"] = base64.b64encode(body).decode("ascii")
+		line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+		with self._lock:
+			self.path.parent.mkdir(parents=True, exist_ok=True)
+			# record начинает кассету заново, auto дописывает недостающие ответы
+			write_mode = "w" if self.mode == "record" and not self._truncated else "a"
+			self._truncated = True
+			with self.path.open(write_mode, encoding="utf-8") as f:
+				f.write(line)
+			self._entries.setdefault(key, []).append(entry)
+			self.counters["recorded"] += 1
+
+	@staticmethod
+	def response(entry: Dict[str, Any], request: httpx.Request) -> httpx.Response:
+		body = base64.b64decode(entry["body_b64"]) if "body_b64" in entry else entry.get("body", "").encode("utf-8")
+		return httpx.Response(entry["status"], headers=entry.get("headers") or {}, content=body, request=request)
+
+	def stats(self) -> Dict[str, Any]:
+		return {"mode": self.mode, "path": str(self.path), "entries": sum(len(v) for v in self._entries.values()), **self.counters}
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+	"""Транспорт httpx поверх кассеты: replay отвечает из файла без сети, record пишет ответы сети в файл.
+
+	Ответ читается целиком, поэтому потоковые ответы (SSE, NDJSON) при воспроизведении приходят одним куском.
+	"""
+
+	def __init__(self, cassette: Cassette, inner: httpx.AsyncBaseTransport | None) -> None:
+		self.cassette = cassette
+		self.inner = inner
+
+	async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+		await request.aread()
+		key = request_key(request)
+		if self.cassette.mode != "record":
+			entry = self.cassette.lookup(key)
+			if entry is not None:
+				return Cassette.response(entry, request)
+			if self.inner is None:
+				raise CassetteMissError(f"Нет записи в кассете {self.cassette.path}: {key}", request=request)
+		assert self.inner is not None
+		response = await self.inner.handle_async_request(request)
+		try:
+			body = await response.aread()
+		finally:
+			await response.aclose()
+		self.cassette.record(key, request, response, body)
+		headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+		return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+	async def aclose(self) -> None:
+		if self.inner is not None:
+			await self.inner.aclose()
+
+
+_cassette: Cassette | None = None
+
+
+def get_cassette() -> Cassette | None:
+	"""Общая кассета приложения или None, если запись/воспроизведение выключены (CASSETTE_MODE=off)"""
+	global _cassette
+	settings = get_settings()
+	if settings.cassette_mode == "off":
+		return None
+	if _cassette is None:
+		_cassette = Cassette(settings.cassette_path, settings.cassette_mode)
+	return _cassette
+
+
+def replaying() -> bool:
+	"""Только воспроизведение: сети нет, фоновые проверки бэкендов и прогрев моделей не нужны"""
+	return get_settings().cassette_mode == "replay"
+
+
+def cassette_transport(limits: httpx.Limits, http2: bool) -> httpx.AsyncBaseTransport | None:
+	"""Транспорт для клиентов реестра HTTP: None — обычный сетевой транспорт httpx"""
+	cassette = get_cassette()
+	if cassette is None:
+		return None
+	inner = None if cassette.mode == "replay" else httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+	return CassetteTransport(cassette, inner)
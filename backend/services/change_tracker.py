@@ -0,0 +1,42 @@
+import threading
+from pathlib import Path
+from typing import List, Set
+
+
+class ChangeTracker:
+	"""Файлы, записанные ассистентом (через LocalStorage) и ещё не закоммиченные"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._pending: Set[Path] = set()
+
+	def record(self, path: str | Path) -> None:
+		with self._lock:
+			self._pending.add(Path(path).resolve())
+
+	def pending(self, root: str | Path | None = None) -> List[str]:
+		with self._lock:
+			return sorted(str(p) for p in self._pending if root is None or self._under(p, Path(root).resolve()))
+
+	def drain(self, root: str | Path) -> List[str]:
+		"""Забирает ожидающие файлы внутри root; файлы вне root остаются в очереди"""
+		base = Path(root).resolve()
+		with self._lock:
+			taken = {p for p in self._pending if self._under(p, base)}
+			self._pending -= taken
+		return sorted(str(p) for p in taken)
+
+	def restore(self, paths: List[str]) -> None:
+		with self._lock:
+			self._pending.update(Path(p) for p in paths)
+
+	@staticmethod
+	def _under(path: Path, root: Path) -> bool:
+		return path == root or root in path.parents
+
+
+_tracker = ChangeTracker()
+
+
+def get_change_tracker() -> ChangeTracker:
+	return _tracker
@@ -0,0 +1,26 @@
+import asyncio
+from typing import Dict
+from weakref import WeakKeyDictionary
+from backend.services.config import get_settings
+
+
+# Семафоры привязаны к event loop, поэтому храним отдельный набор на каждый loop
+_limiters: "WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = WeakKeyDictionary()
+
+
+def provider_concurrency(provider: str) -> int:
+	settings = get_settings()
+	if provider == "ollama":
+		return max(1, settings.ollama_max_concurrency)
+	return max(1, settings.openai_max_concurrency)
+
+
+def provider_limiter(provider: str) -> asyncio.Semaphore:
+	"""Общий на процесс семафор, ограничивающий число параллельных запросов к провайдеру ИИ"""
+	loop = asyncio.get_running_loop()
+	per_loop = _limiters.setdefault(loop, {})
+	sem = per_loop.get(provider)
+	if sem is None:
+		sem = asyncio.Semaphore(provider_concurrency(provider))
+		per_loop[provider] = sem
+	return sem
@@ -1,5 +1,7 @@
+import json
 import os
 from functools import lru_cache
+from typing import Dict
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -8,19 +10,131 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+class ConfigError(ValueError):
+	"""Некорректное значение переменной окружения"""
+
+
+def parse_rate_limits(raw: str) -> Dict[str, Dict[str, float]]:
+	"""Разбирает LLM_RATE_LIMITS один раз при загрузке настроек; при ошибке — понятное сообщение"""
+	if not raw.strip():
+		return {}
+	try:
+		data = json.loads(raw)
+	except json.JSONDecodeError as exc:
+		raise ConfigError(f"LLM_RATE_LIMITS: некорректный JSON ({exc})") from None
+	if not isinstance(data, dict):
+		raise ConfigError('LLM_RATE_LIMITS: ожидается объект вида {"openai:gpt-4o": {"rpm": 500, "tpm": 30000}}')
+	limits: Dict[str, Dict[str, float]] = {}
+	for key, value in data.items():
+		if ":" not in key or not isinstance(value, dict):
+			raise ConfigError(f'LLM_RATE_LIMITS: ключ "{key}" должен быть вида "провайдер:модель" со значением {{"rpm": ..., "tpm": ...}}')
+		unknown = set(value) - {"rpm", "tpm"}
+		if unknown:
+			raise ConfigError(f'LLM_RATE_LIMITS["{key}"]: неизвестные поля {sorted(unknown)}, допустимы rpm и tpm')
+		for name, number in value.items():
+			if isinstance(number, bool) or not isinstance(number, (int, float)) or number < 0:
+				raise ConfigError(f'LLM_RATE_LIMITS["{key}"].{name}: ожидается неотрицательное число, получено {number!r}')
+		limits[key] = {name: float(number) for name, number in value.items()}
+	return limits
+
+
 class Settings(BaseModel):
 	openai_api_key: str | None = os.getenv("OPENAI_API_KEY")
 	openai_base_url: str | None = os.getenv("OPENAI_BASE_URL")
 	openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 	github_token: str | None = os.getenv("GITHUB_TOKEN")
+	github_api_base: str = os.getenv("GITHUB_API_BASE", "https://api.github.com")
+	github_max_concurrency: int = int(os.getenv("GITHUB_MAX_CONCURRENCY", "8"))
 	default_repo_root: str = os.getenv("DEFAULT_REPO_ROOT", ".")
+	# Пауза (сек.) перед коммитом накопленных файлов в режиме /git/push scope=session, debounce=true
+	git_commit_debounce: float = float(os.getenv("GIT_COMMIT_DEBOUNCE", "2.0"))
 	ai_provider: str = os.getenv("AI_PROVIDER", "openai")  # openai | ollama
 	ollama_base_url: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 	ollama_model: str = os.getenv("OLLAMA_MODEL", "llama3")
+	# Несколько бэкендов провайдера через запятую (иначе используется *_BASE_URL)
+	ollama_base_urls: str = os.getenv("OLLAMA_BASE_URLS", "")
+	openai_base_urls: str = os.getenv("OPENAI_BASE_URLS", "")
+	# Ollama: сколько держать модель в памяти после запроса ("30m", секунды, -1 — всегда; пусто — по умолчанию сервера),
+	# прогрев моделей при старте (по умолчанию OLLAMA_MODEL) и период пинга, не дающего им выгрузиться (0 — только при старте)
+	ollama_keep_alive: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+	ollama_warmup: bool = os.getenv("OLLAMA_WARMUP", "true").lower() in ("1", "true", "yes")
+	ollama_warmup_models: str = os.getenv("OLLAMA_WARMUP_MODELS", "")
+	ollama_keep_warm_interval: float = float(os.getenv("OLLAMA_KEEP_WARM_INTERVAL", "600"))
+	ollama_warmup_timeout: float = float(os.getenv("OLLAMA_WARMUP_TIMEOUT", "300"))
+	# Выбор бэкенда: least_outstanding (меньше всего запросов в работе) или ewma (средняя задержка с учётом очереди)
+	backend_routing: str = os.getenv("BACKEND_ROUTING", "least_outstanding")
+	# Период фоновой проверки бэкендов (сек.): не прошедший проверку не выбирается, пока есть здоровые; 0 — без фоновых проверок
+	backend_health_interval: float = float(os.getenv("BACKEND_HEALTH_INTERVAL", "15"))
+	# Повторы запросов к ИИ: только временные сбои, не больше N попыток и общего срока (сек.)
+	llm_retry_attempts: int = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+	llm_retry_deadline: float = float(os.getenv("LLM_RETRY_DEADLINE", "180"))
+	# Circuit breaker бэкенда: после N сбоев подряд запросы отклоняются сразу на reset секунд
+	circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+	circuit_reset_timeout: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+	# Хеджирование: запасной запрос, если ответа нет дольше p95 задержки (но не раньше min_delay)
+	llm_hedge_enabled: bool = os.getenv("LLM_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+	llm_hedge_min_delay: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2.0"))
+	# Лимиты запросов и токенов в минуту (0 — без ограничения) и переопределения по моделям в JSON:
+	# {"openai:gpt-4o": {"rpm": 500, "tpm": 30000}}
+	openai_rpm: float = float(os.getenv("OPENAI_RPM", "0"))
+	openai_tpm: float = float(os.getenv("OPENAI_TPM", "0"))
+	ollama_rpm: float = float(os.getenv("OLLAMA_RPM", "0"))
+	ollama_tpm: float = float(os.getenv("OLLAMA_TPM", "0"))
+	# Разбирается в get_settings(): ошибка в LLM_RATE_LIMITS не должна ломать импорт модуля
+	llm_rate_limits: Dict[str, Dict[str, float]] = {}
+	# Сколько токенов ответа закладывать заранее; после ответа расход уточняется по usage
+	llm_completion_token_estimate: int = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "512"))
+	# Пулы HTTP-соединений (общие на всё приложение, по одному на базовый URL)
+	http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+	http_max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+	http_keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+	http_timeout: float = float(os.getenv("HTTP_TIMEOUT", "60"))
+	openai_http2: bool = os.getenv("OPENAI_HTTP2", "true").lower() in ("1", "true", "yes")
+	# Кассета HTTP-обменов с LLM и GitHub: off | record (записать заново) | replay (только из файла, без сети) |
+	# auto (ответ из кассеты, если есть, иначе запрос в сеть с дозаписью)
+	cassette_mode: str = os.getenv("CASSETTE_MODE", "off").strip().lower()
+	cassette_path: str = os.getenv("CASSETTE_PATH", "cassettes/default.jsonl")
+	# Кэш ответов LLM (память + SQLite)
+	llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+	llm_cache_path: str = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+	llm_cache_memory_entries: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+	llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+	llm_cache_ttl: float = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+	# Кэш ревью по тестам (mode=chunked): ключ — текст теста и модель, работает и при LLM_CACHE_ENABLED=false
+	review_chunk_cache_path: str = os.getenv("REVIEW_CHUNK_CACHE_PATH", ".cache/review_chunks.sqlite3")
+	# Максимум параллельных запросов к провайдеру при пакетной генерации
+	openai_max_concurrency: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+	ollama_max_concurrency: int = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))
+	# Сколько тест-кейсов отправлять в одном запросе при пакетной генерации кода (1 — по запросу на кейс)
+	codegen_pack_size: int = int(os.getenv("CODEGEN_PACK_SIZE", "1"))
+	# Фоновые задачи (очередь в SQLite, общая для всех процессов uvicorn)
+	jobs_db_path: str = os.getenv("JOBS_DB_PATH", ".cache/jobs.sqlite3")
+	job_workers: int = int(os.getenv("JOB_WORKERS", "2"))
+	job_lease_seconds: float = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+	job_poll_interval: float = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+	# Прогоны тестов: сколько одновременно, таймаут прогона (сек., 0 — без ограничения),
+	# сколько байт вывода хранить на прогон (остаётся конец) и сколько завершённых прогонов помнить
+	test_run_max_concurrency: int = int(os.getenv("TEST_RUN_MAX_CONCURRENCY", "2"))
+	test_run_timeout: float = float(os.getenv("TEST_RUN_TIMEOUT", "1800"))
+	test_run_output_limit: int = int(os.getenv("TEST_RUN_OUTPUT_LIMIT", "1000000"))
+	test_run_history: int = int(os.getenv("TEST_RUN_HISTORY", "50"))
+	# Сервис форматирования: тёплый prettier (Node) и black через Python API
+	formatter_work_dir: str = os.getenv("FORMATTER_WORK_DIR", ".cache/formatter")
+	formatter_timeout: float = float(os.getenv("FORMATTER_TIMEOUT", "10"))
+	prettier_node_path: str = os.getenv("PRETTIER_NODE_PATH", "")
+	# Пакетная обработка JSONL: число параллельных обработчиков, каталог контрольных точек
+	# и предельный размер тела /generate/bulk (байт)
+	bulk_workers: int = int(os.getenv("BULK_WORKERS", "4"))
+	bulk_checkpoint_dir: str = os.getenv("BULK_CHECKPOINT_DIR", ".cache/bulk")
+	bulk_max_upload_bytes: int = int(os.getenv("BULK_MAX_UPLOAD_BYTES", str(256 * 1024 * 1024)))
+	# Логирование: JSON-строки в stdout через очередь. LOG_LEVEL=off — выключено,
+	# LOG_SAMPLE_RATE — доля записей ниже WARNING, которые попадают в вывод
+	log_level: str = os.getenv("LOG_LEVEL", "INFO")
+	log_sample_rate: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
 
 
 @lru_cache
 def get_settings() -> Settings:
-	return Settings()
+	return Settings(llm_rate_limits=parse_rate_limits(os.getenv("LLM_RATE_LIMITS", "")))
 
 
@@ -0,0 +1,329 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import signal
+import subprocess
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Tuple
+from backend.services.code_formatter import CodeFormatter
+from backend.services.config import get_settings
+from backend.services.metrics import FORMATTER_LATENCY
+
+
+# Воркер prettier: читает по строке JSON {"id", "items": [{"code", "parser"}]} и отвечает {"id", "results"}
+PRETTIER_WORKER_JS = r"""
+const readline = require('readline');
+let prettier;
+try {
+  prettier = require('prettier');
+} catch (e) {
+  process.stdout.write(JSON.stringify({ ready: false, error: String(e && e.message || e) }) + '\n');
+  process.exit(1);
+}
+process.stdout.write(JSON.stringify({ ready: true, version: prettier.version }) + '\n');
+const rl = readline.createInterface({ input: process.stdin });
+rl.on('line', async (line) => {
+  let req;
+  try { req = JSON.parse(line); } catch (e) { return; }
+  const results = [];
+  for (const item of req.items) {
+    try {
+      results.push({ formatted: await prettier.format(item.code, { parser: item.parser }) });
+    } catch (e) {
+      results.push({ error: String(e && e.message || e) });
+    }
+  }
+  process.stdout.write(JSON.stringify({ id: req.id, results }) + '\n');
+});
+"""
+
+PRETTIER_PARSERS = {"ts": "typescript", "typescript": "typescript", "js": "babel", "javascript": "babel"}
+
+
+def _black_module():
+	try:
+		import black
+	except ImportError:
+		return None
+	return black
+
+
+class PrettierWorker:
+	"""Долгоживущий процесс Node с загруженным prettier"""
+
+	def __init__(self, node_path: List[str]) -> None:
+		self.node_path = node_path
+		self.proc: asyncio.subprocess.Process | None = None
+		self.available = True
+		self._ids = itertools.count(1)
+		self._pending: Dict[int, asyncio.Future] = {}
+		self._reader: asyncio.Task | None = None
+		self._start_lock = asyncio.Lock()
+
+	async def _start(self) -> bool:
+		node = shutil.which("node")
+		if not node:
+			return False
+		script = Path(get_settings().formatter_work_dir) / "prettier_worker.js"
+		script.parent.mkdir(parents=True, exist_ok=True)
+		script.write_text(PRETTIER_WORKER_JS, encoding="utf-8")
+		env = dict(os.environ)
+		env["NODE_PATH"] = os.pathsep.join(self.node_path + ([env["NODE_PATH"]] if env.get("NODE_PATH") else []))
+		self.proc = await asyncio.create_subprocess_exec(
+			node,
+			str(script),
+			stdin=asyncio.subprocess.PIPE,
+			stdout=asyncio.subprocess.PIPE,
+			stderr=asyncio.subprocess.DEVNULL,
+			env=env,
+			limit=64 * 1024 * 1024,
+		)
+		try:
+			hello = json.loads(await asyncio.wait_for(self.proc.stdout.readline(), timeout=15.0) or b"{}")
+		except (asyncio.TimeoutError, json.JSONDecodeError):
+			hello = {}
+		if not hello.get("ready"):
+			await self.close()
+			return False
+		self._reader = asyncio.create_task(self._read_loop())
+		return True
+
+	async def _read_loop(self) -> None:
+		assert self.proc is not None and self.proc.stdout is not None
+		exited = False
+		try:
+			while True:
+				line = await self.proc.stdout.readline()
+				if not line:
+					exited = True
+					break
+				msg = json.loads(line)
+				fut = self._pending.pop(msg.get("id"), None)
+				if fut is not None and not fut.done():
+					fut.set_result(msg.get("results", []))
+		finally:
+			# Ожидающие запросы уйдут в запасной путь; если процесс завершился, воркер будет перезапущен.
+			# При отмене (остановка loop'а) ссылка на процесс остаётся, чтобы close()/kill() его завершили
+			for fut in self._pending.values():
+				if not fut.done():
+					fut.set_exception(RuntimeError("prettier worker exited"))
+			self._pending = {}
+			if exited:
+				self.proc = None
+
+	async def format_many(self, items: List[Tuple[str, str]]) -> List[dict]:
+		"""items: [(code, parser)] -> [{"formatted": ...} | {"error": ...}]"""
+		async with self._start_lock:
+			if self.proc is None or self.proc.returncode is not None:
+				if not self.available or not await self._start():
+					self.available = False
+					raise RuntimeError("prettier worker is not available")
+		assert self.proc is not None and self.proc.stdin is not None
+		req_id = next(self._ids)
+		fut: asyncio.Future = asyncio.get_running_loop().create_future()
+		self._pending[req_id] = fut
+		line = json.dumps({"id": req_id, "items": [{"code": c, "parser": p} for c, p in items]}, ensure_ascii=False)
+		try:
+			self.proc.stdin.write(line.encode("utf-8") + b"\n")
+			await self.proc.stdin.drain()
+			return await asyncio.wait_for(fut, timeout=get_settings().formatter_timeout)
+		finally:
+			# По таймауту или отмене ответ уже не нужен — запись о запросе не должна копиться
+			self._pending.pop(req_id, None)
+
+	async def close(self) -> None:
+		proc, self.proc = self.proc, None
+		if self._reader is not None:
+			self._reader.cancel()
+			self._reader = None
+		if proc is not None and proc.returncode is None:
+			proc.kill()
+			await proc.wait()
+
+	def kill(self) -> None:
+		"""Завершает процесс без ожидания: event loop, в котором он запущен, уже закрыт"""
+		proc, self.proc = self.proc, None
+		self._reader = None
+		self._pending = {}
+		if proc is not None and proc.returncode is None:
+			try:
+				os.kill(proc.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+			except OSError:
+				pass
+
+
+class FormatterService:
+	"""Форматирование кода без запуска процесса на каждый файл.
+
+	TS/JS форматирует один тёплый процесс prettier, Python — black через его Python API.
+	Запросы, пришедшие в пределах короткого окна, отправляются одной пачкой; работа идёт вне
+	event loop; результат кэшируется по хэшу содержимого.
+	"""
+
+	def __init__(self, node_path: List[str] | None = None, batch_window: float = 0.005, max_batch: int = 32, cache_size: int = 1024) -> None:
+		self.node_path = node_path
+		self.batch_window = batch_window
+		self.max_batch = max_batch
+		self.cache_size = cache_size
+		self._cache: "OrderedDict[str, str]" = OrderedDict()
+		self._queue: asyncio.Queue | None = None
+		self._batcher: asyncio.Task | None = None
+		self._prettier: PrettierWorker | None = None
+		self._loop: asyncio.AbstractEventLoop | None = None
+		self.counters: Dict[str, int] = {"requests": 0, "cache_hits": 0, "batches": 0, "fallbacks": 0}
+
+	@staticmethod
+	def _key(code: str, language: str) -> str:
+		return hashlib.sha256(f"{language}\0{code}".encode("utf-8")).hexdigest()
+
+	def _remember(self, language: str, code: str, formatted: str) -> None:
+		# Отформатированный код тоже запоминаем: повторное форматирование вернёт его как есть
+		for source in (code, formatted):
+			key = self._key(source, language)
+			self._cache[key] = formatted
+			self._cache.move_to_end(key)
+		while len(self._cache) > self.cache_size:
+			self._cache.popitem(last=False)
+
+	async def start(self) -> None:
+		loop = asyncio.get_running_loop()
+		if self._loop is loop and self._batcher is not None:
+			return
+		if self._loop is not None and self._loop is not loop:
+			# Предыдущий event loop (например, в CLI) закрыт без stop(): цикл пачек отбрасываем, процесс prettier завершаем
+			self._batcher = None
+			if self._prettier is not None:
+				self._prettier.kill()
+			self._prettier = None
+		# Без await до создания очереди: параллельные вызовы не запустят второй цикл пачек
+		self._loop = loop
+		self._queue = asyncio.Queue()
+		self._batcher = asyncio.create_task(self._batch_loop())
+
+	async def stop(self) -> None:
+		if self._batcher is not None:
+			self._batcher.cancel()
+			await asyncio.gather(self._batcher, return_exceptions=True)
+			self._batcher = None
+		if self._prettier is not None:
+			await self._prettier.close()
+			self._prettier = None
+		self._loop = None
+
+	@staticmethod
+	def _discover_node_path() -> List[str]:
+		settings = get_settings()
+		paths = [p for p in settings.prettier_node_path.split(os.pathsep) if p]
+		paths.append(str(Path("tests") / "node_modules"))
+		npm = shutil.which("npm")
+		if npm:
+			try:
+				root = subprocess.run([npm, "root", "-g"], capture_output=True, text=True, timeout=10).stdout.strip()
+				if root:
+					paths.append(root)
+			except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+				pass
+		return [str(Path(p).resolve()) for p in paths]
+
+	async def format(self, code: str, language: str) -> str:
+		lang = (language or "").lower()
+		if lang not in PRETTIER_PARSERS and lang != "python":
+			return code
+		self.counters["requests"] += 1
+		key = self._key(code, lang)
+		cached = self._cache.get(key)
+		if cached is not None:
+			self._cache.move_to_end(key)
+			self.counters["cache_hits"] += 1
+			return cached
+		await self.start()
+		assert self._queue is not None
+		fut: asyncio.Future = asyncio.get_running_loop().create_future()
+		await self._queue.put((code, lang, fut))
+		formatted = await fut
+		self._remember(lang, code, formatted)
+		return formatted
+
+	async def _batch_loop(self) -> None:
+		assert self._queue is not None
+		while True:
+			batch = [await self._queue.get()]
+			deadline = asyncio.get_running_loop().time() + self.batch_window
+			while len(batch) < self.max_batch:
+				timeout = deadline - asyncio.get_running_loop().time()
+				if timeout <= 0:
+					break
+				try:
+					batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+				except asyncio.TimeoutError:
+					break
+			self.counters["batches"] += 1
+			py = [item for item in batch if item[1] == "python"]
+			web = [item for item in batch if item[1] != "python"]
+			await asyncio.gather(self._run_python(py), self._run_prettier(web), return_exceptions=True)
+
+	async def _run_python(self, batch: list) -> None:
+		if not batch:
+			return
+		try:
+			with FORMATTER_LATENCY.time(backend="black"):
+				results = await asyncio.to_thread(self._format_python_batch, [code for code, _, _ in batch])
+		except Exception as exc:
+			results = [exc] * len(batch)
+		for (code, _, fut), result in zip(batch, results):
+			if not fut.done():
+				fut.set_result(code if isinstance(result, Exception) else result)
+
+	def _format_python_batch(self, codes: List[str]) -> List[str]:
+		black = _black_module()
+		if black is None:
+			self.counters["fallbacks"] += len(codes)
+			return [CodeFormatter.format_python(code) for code in codes]
+		mode = black.Mode()
+		out = []
+		for code in codes:
+			try:
+				out.append(black.format_str(code, mode=mode))
+			except Exception:
+				out.append(code)
+		return out
+
+	async def _run_prettier(self, batch: list) -> None:
+		if not batch:
+			return
+		try:
+			if self._prettier is None:
+				# Поиск prettier и запуск воркера — при первой пачке TS/JS, из единственного цикла пачек
+				if self.node_path is None:
+					self.node_path = await asyncio.to_thread(self._discover_node_path)
+				self._prettier = PrettierWorker(self.node_path)
+			with FORMATTER_LATENCY.time(backend="prettier"):
+				results = await self._prettier.format_many([(code, PRETTIER_PARSERS[lang]) for code, lang, _ in batch])
+		except Exception:
+			# Нет node/prettier или воркер упал — прежний путь через отдельный процесс
+			self.counters["fallbacks"] += len(batch)
+			with FORMATTER_LATENCY.time(backend="subprocess"):
+				results = await asyncio.gather(
+					*(asyncio.to_thread(CodeFormatter.format_code, code, lang) for code, lang, _ in batch)
+				)
+			results = [{"formatted": r} for r in results]
+		for (code, _, fut), result in zip(batch, results):
+			if not fut.done():
+				fut.set_result(result.get("formatted") or code)
+
+	def stats(self) -> Dict[str, int]:
+		return {**self.counters, "cache_entries": len(self._cache)}
+
+
+_service: FormatterService | None = None
+
+
+def get_formatter_service() -> FormatterService:
+	global _service
+	if _service is None:
+		_service = FormatterService()
+	return _service
@@ -1,6 +1,18 @@
-from typing import Optional
-from git import Repo
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from git import Actor, Repo
+from git.exc import GitCommandError
 from pathlib import Path
+from backend.services.change_tracker import get_change_tracker
+from backend.services.log import get_logger
+from backend.services.metrics import GIT_LATENCY
+
+
+logger = get_logger("backend.git")
+
+# После стольких неудачных отложенных коммитов подряд файлы снимаются с очереди
+COMMIT_ATTEMPTS = 3
 
 
 class LocalGit:
@@ -12,9 +24,73 @@ class LocalGit:
 			self.repo = Repo(self.root)
 
 	def add_commit_push(self, message: str = "chore: generated files", remote_name: str = "origin", branch: str = "main") -> str:
-		self.repo.git.add(all=True)
-		if self.repo.is_dirty(index=True, working_tree=True, untracked_files=True):
-			self.repo.index.commit(message)
+		with GIT_LATENCY.time(operation="commit_all"):
+			self.repo.git.add(all=True)
+			if self.repo.is_dirty(index=True, working_tree=True, untracked_files=True):
+				self.repo.index.commit(message)
+		self._push(remote_name, branch)
+		return self.repo.head.commit.hexsha
+
+	def commit_paths(
+		self,
+		paths: List[str],
+		message: str = "chore: generated files",
+		remote_name: str = "origin",
+		branch: str = "main",
+		push: bool = True,
+	) -> Optional[str]:
+		"""Коммит только указанных файлов, без сканирования всего рабочего дерева.
+
+		Возвращает sha нового коммита или None, если в этих файлах нет изменений.
+		"""
+		# Игнорируемые и удалённые неотслеживаемые файлы git не добавит никогда — из-за них не должен падать весь коммит
+		rejected = set(self.rejected_paths(paths))
+		rel = [str(Path(p).resolve().relative_to(self.root)) for p in paths if p not in rejected]
+		if not rel:
+			return None
+		with GIT_LATENCY.time(operation="commit_paths"):
+			self.repo.git.add("--", *rel)
+			try:
+				# Код возврата 1 — есть проиндексированные изменения в этих путях
+				self.repo.git.diff("--cached", "--quiet", "--", *rel)
+				return None
+			except GitCommandError as exc:
+				if exc.status != 1:
+					raise
+			# Автор как у index.commit: из конфига git, иначе пользователь@хост
+			author = Actor.author(self.repo.config_reader())
+			committer = Actor.committer(self.repo.config_reader())
+			with self.repo.git.custom_environment(
+				GIT_AUTHOR_NAME=author.name,
+				GIT_AUTHOR_EMAIL=author.email,
+				GIT_COMMITTER_NAME=committer.name,
+				GIT_COMMITTER_EMAIL=committer.email,
+			):
+				# --only: в коммит попадут только эти пути, даже если в индексе есть что-то ещё
+				self.repo.git.commit("-m", message, "--only", "--", *rel)
+		if push:
+			self._push(remote_name, branch)
+		return self.repo.head.commit.hexsha
+
+	def rejected_paths(self, paths: List[str]) -> List[str]:
+		"""Пути, которые нельзя закоммитить: вне репозитория, в .gitignore, удалённые и не отслеживаемые git"""
+		inside = {p: Path(p).resolve().relative_to(self.root).as_posix() for p in paths if self._inside(p)}
+		rejected = [p for p in paths if p not in inside]
+		if not inside:
+			return rejected
+		missing = [rel for rel in inside.values() if not (self.root / rel).exists()]
+		# Пути — буквально, а не шаблоны; отслеживаемые файлы в список игнорируемых не попадают
+		with self.repo.git.custom_environment(GIT_LITERAL_PATHSPECS="1"):
+			ignored = set(self.repo.git.ls_files("-z", "--others", "--ignored", "--exclude-standard", "--", *inside.values()).split("\0"))
+			tracked = set(self.repo.git.ls_files("-z", "--", *missing).split("\0")) if missing else set()
+		bad = ignored | (set(missing) - tracked)
+		return rejected + [p for p, rel in inside.items() if rel in bad]
+
+	def _inside(self, path: str) -> bool:
+		full = Path(path).resolve()
+		return self.root in full.parents
+
+	def _push(self, remote_name: str, branch: str) -> None:
 		# Ensure branch exists
 		if self.repo.active_branch.name != branch:
 			try:
@@ -22,10 +98,119 @@ class LocalGit:
 			except Exception:
 				self.repo.git.checkout("-b", branch)
 		try:
-			self.repo.git.push(remote_name, branch, set_upstream=True)
+			with GIT_LATENCY.time(operation="push"):
+				self.repo.git.push(remote_name, branch, set_upstream=True)
 		except Exception:
 			# Maybe remote is not set; user should configure remote beforehand
 			pass
-		return self.repo.head.commit.hexsha
 
 
+class _PendingCommit:
+	"""Отложенный коммит одного репозитория: параметры последнего запроса и задача, которая его выполнит"""
+
+	__slots__ = ("repo_root", "delay", "message", "remote_name", "branch", "last_request", "failures", "task")
+
+	def __init__(self, repo_root: str) -> None:
+		self.repo_root = repo_root
+		self.delay = 0.0
+		self.message = ""
+		self.remote_name = "origin"
+		self.branch = "main"
+		self.last_request = 0.0
+		self.failures = 0
+		self.task: asyncio.Task | None = None
+
+
+class DebouncedCommitter:
+	"""Собирает записанные ассистентом файлы и коммитит их одним коммитом после паузы в записи.
+
+	Ожидание и коммит — отдельно для каждого репозитория.
+	"""
+
+	def __init__(self) -> None:
+		self._repos: Dict[str, _PendingCommit] = {}
+		self.last_result: Dict[str, Any] | None = None
+
+	@staticmethod
+	def _key(repo_root: str) -> str:
+		return str(Path(repo_root).resolve())
+
+	def schedule(self, repo_root: str, delay: float, message: str, remote_name: str = "origin", branch: str = "main") -> None:
+		key = self._key(repo_root)
+		pending = self._repos.get(key)
+		if pending is None:
+			pending = self._repos[key] = _PendingCommit(repo_root)
+		pending.last_request = time.monotonic()
+		pending.delay = delay
+		pending.message = message
+		pending.remote_name = remote_name
+		pending.branch = branch
+		if pending.task is None or pending.task.done():
+			pending.task = asyncio.create_task(self._run(pending))
+
+	def scheduled(self, repo_root: str | None = None) -> bool:
+		repos = self._repos.values() if repo_root is None else filter(None, [self._repos.get(self._key(repo_root))])
+		return any(p.task is not None and not p.task.done() for p in repos)
+
+	async def flush(self) -> None:
+		tasks = []
+		for pending in self._repos.values():
+			if pending.task is not None and not pending.task.done():
+				pending.last_request = 0.0
+				tasks.append(pending.task)
+		await asyncio.gather(*tasks, return_exceptions=True)
+
+	async def _run(self, pending: _PendingCommit) -> None:
+		tracker = get_change_tracker()
+		while True:
+			# Каждый новый запрос сдвигает момент коммита на delay секунд вперёд
+			while True:
+				remaining = pending.last_request + pending.delay - time.monotonic()
+				if remaining <= 0:
+					break
+				await asyncio.sleep(remaining)
+			requested = pending.last_request
+			failed = await self._commit(pending, tracker.drain(pending.repo_root))
+			# Файлы, записанные во время коммита, и новые запросы попадают в следующий коммит
+			if pending.last_request == requested and (failed or not tracker.pending(pending.repo_root)):
+				return
+
+	async def _commit(self, pending: _PendingCommit, paths: List[str]) -> bool:
+		"""Коммит файлов; при ошибке файлы возвращаются в очередь (не больше COMMIT_ATTEMPTS раз подряд).
+
+		Пути, которые git не примет никогда (.gitignore, удалённые), в коммит не идут и попадают в skipped.
+		True — коммит не удался.
+		"""
+		if not paths:
+			return False
+
+		def commit() -> Tuple[Optional[str], List[str]]:
+			git = LocalGit(pending.repo_root)
+			skipped = git.rejected_paths(paths)
+			committable = [p for p in paths if p not in skipped]
+			return git.commit_paths(committable, pending.message, pending.remote_name, pending.branch), skipped
+
+		try:
+			sha, skipped = await asyncio.to_thread(commit)
+		except Exception as exc:
+			pending.failures += 1
+			result: Dict[str, Any] = {"repo": pending.repo_root, "error": str(exc), "files": len(paths), "attempt": pending.failures, "at": time.time()}
+			if pending.failures < COMMIT_ATTEMPTS:
+				get_change_tracker().restore(paths)
+			else:
+				# Повторять бесполезно: иначе эти файлы валили бы каждый следующий коммит сессии
+				pending.failures = 0
+				result["dropped"] = paths
+			self.last_result = result
+			logger.warning("debounced_commit_failed", extra={k: v for k, v in result.items() if k != "at"})
+			return True
+		pending.failures = 0
+		self.last_result = {"repo": pending.repo_root, "commit": sha, "files": len(paths) - len(skipped), "skipped": skipped, "at": time.time()}
+		return False
+
+
+_committer = DebouncedCommitter()
+
+
+def get_debounced_committer() -> DebouncedCommitter:
+	return _committer
@@ -1,15 +1,38 @@
+import asyncio
 import base64
+import time
 from typing import Any, Dict
 import httpx
 from backend.services.config import get_settings
+from backend.services.http_pool import get_http_registry
+from backend.services.metrics import GITHUB_LATENCY
+
+
+# Сколько раз пересобирать коммит, если ветку успели обновить между чтением и записью ref
+REF_UPDATE_ATTEMPTS = 3
+
+
+class GithubConflictError(RuntimeError):
+	"""Ветка всё время менялась во время сохранения: коммит не fast-forward"""
 
 
 class GithubSaver:
-	def __init__(self, token: str | None) -> None:
+	def __init__(self, token: str | None, api_base: str | None = None) -> None:
 		if not token:
 			raise RuntimeError("GITHUB_TOKEN is not configured")
 		self.token = token
-		self.api_base = "https://api.github.com"
+		self.api_base = (api_base or get_settings().github_api_base).rstrip("/")
+
+	async def _request(self, operation: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+		client = get_http_registry().github(self.api_base)
+		started = time.perf_counter()
+		status = "error"
+		try:
+			resp = await client.request(method, url, headers=self._headers(), timeout=30.0, **kwargs)
+			status = str(resp.status_code)
+			return resp
+		finally:
+			GITHUB_LATENCY.observe(time.perf_counter() - started, operation=operation, status=status)
 
 	def _headers(self) -> dict:
 		return {
@@ -19,13 +42,12 @@ class GithubSaver:
 
 	async def get_file_sha(self, owner: str, repo: str, path: str, branch: str) -> str | None:
 		url = f"{self.api_base}/repos/{owner}/{repo}/contents/{path}?ref={branch}"
-		async with httpx.AsyncClient(timeout=30.0) as client:
-			resp = await client.get(url, headers=self._headers())
-			if resp.status_code == 404:
-				return None
-			resp.raise_for_status()
-			data = resp.json()
-			return data.get("sha")
+		resp = await self._request("get_contents", "GET", url)
+		if resp.status_code == 404:
+			return None
+		resp.raise_for_status()
+		data = resp.json()
+		return data.get("sha")
 
 	async def create_or_update_file(
 		self,
@@ -45,9 +67,75 @@ class GithubSaver:
 		}
 		if sha:
 			body["sha"] = sha
-		async with httpx.AsyncClient(timeout=30.0) as client:
-			resp = await client.put(url, headers=self._headers(), json=body)
+		resp = await self._request("put_contents", "PUT", url, json=body)
+		resp.raise_for_status()
+		return resp.json()
+
+	async def save_files(
+		self,
+		owner: str,
+		repo: str,
+		files: Dict[str, str],
+		message: str,
+		branch: str = "main",
+	) -> Dict[str, Any]:
+		"""Сохраняет много файлов одним коммитом через Git Data API (blobs → tree → commit → ref)"""
+		repo_url = f"{self.api_base}/repos/{owner}/{repo}/git"
+		limiter = asyncio.Semaphore(max(1, get_settings().github_max_concurrency))
+
+		async def upload(content: str) -> str:
+			async with limiter:
+				resp = await self._request(
+					"create_blob",
+					"POST",
+					f"{repo_url}/blobs",
+					json={"content": base64.b64encode(content.encode("utf-8")).decode("ascii"), "encoding": "base64"},
+				)
+				resp.raise_for_status()
+				return resp.json()["sha"]
+
+		paths = list(files)
+		blob_shas = await asyncio.gather(*(upload(files[p]) for p in paths))
+		entries = [{"path": p, "mode": "100644", "type": "blob", "sha": sha} for p, sha in zip(paths, blob_shas)]
+
+		for attempt in range(1, REF_UPDATE_ATTEMPTS + 1):
+			# Blobs не зависят от ветки; tree и commit собираются от свежей головы на каждой попытке
+			resp = await self._request("get_ref", "GET", f"{repo_url}/ref/heads/{branch}")
 			resp.raise_for_status()
-			return resp.json()
+			parent_sha = resp.json()["object"]["sha"]
+			resp = await self._request("get_commit", "GET", f"{repo_url}/commits/{parent_sha}")
+			resp.raise_for_status()
+			base_tree = resp.json()["tree"]["sha"]
 
+			resp = await self._request("create_tree", "POST", f"{repo_url}/trees", json={"base_tree": base_tree, "tree": entries})
+			resp.raise_for_status()
+			tree_sha = resp.json()["sha"]
 
+			resp = await self._request(
+				"create_commit",
+				"POST",
+				f"{repo_url}/commits",
+				json={"message": message, "tree": tree_sha, "parents": [parent_sha]},
+			)
+			resp.raise_for_status()
+			commit = resp.json()
+
+			resp = await self._request(
+				"update_ref",
+				"PATCH",
+				f"{repo_url}/refs/heads/{branch}",
+				json={"sha": commit["sha"], "force": False},
+			)
+			if resp.status_code == 422 and "fast forward" in resp.text.lower():
+				# Кто-то успел запушить в ветку — повторяем от новой головы
+				continue
+			resp.raise_for_status()
+			return {
+				"commit_sha": commit["sha"],
+				"tree_sha": tree_sha,
+				"html_url": commit.get("html_url"),
+				"files": [{"path": p, "sha": sha} for p, sha in zip(paths, blob_shas)],
+			}
+		raise GithubConflictError(
+			f"Ветка {branch} в {owner}/{repo} обновлялась во время сохранения ({REF_UPDATE_ATTEMPTS} попытки); повторите запрос"
+		)
@@ -0,0 +1,92 @@
+import asyncio
+from typing import Dict, Tuple
+import httpx
+from backend.services.cassette import cassette_transport
+from backend.services.config import get_settings
+from backend.services.log import get_logger
+
+
+logger = get_logger("backend.http")
+
+OPENAI_DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+def _http2_available() -> bool:
+	try:
+		import h2  # noqa: F401
+	except ImportError:
+		return False
+	return True
+
+
+class HttpClientRegistry:
+	"""Реестр долгоживущих httpx.AsyncClient: один пул соединений на базовый URL провайдера"""
+
+	def __init__(self) -> None:
+		# Соединения httpx привязаны к event loop'у: CLI и тесты запускают несколько loop'ов подряд,
+		# поэтому у каждого loop'а свои клиенты, а закрываются они только из своего loop'а (aclose)
+		self._clients: Dict[asyncio.AbstractEventLoop | None, Dict[Tuple[str, bool], httpx.AsyncClient]] = {}
+
+	def _limits(self) -> httpx.Limits:
+		settings = get_settings()
+		return httpx.Limits(
+			max_connections=settings.http_max_connections,
+			max_keepalive_connections=settings.http_max_keepalive_connections,
+			keepalive_expiry=settings.http_keepalive_expiry,
+		)
+
+	def _loop_clients(self) -> Dict[Tuple[str, bool], httpx.AsyncClient]:
+		try:
+			loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+		except RuntimeError:
+			loop = None
+		for other in [l for l in self._clients if l is not None and l.is_closed()]:
+			# loop завершился без aclose() — закрыть его соединения штатно уже нельзя
+			logger.warning("http_clients_abandoned", extra={"clients": len(self._clients.pop(other))})
+		return self._clients.setdefault(loop, {})
+
+	def get(self, base_url: str, http2: bool = False) -> httpx.AsyncClient:
+		"""Клиент для базового URL; создаётся при первом обращении и переиспользуется"""
+		clients = self._loop_clients()
+		http2 = http2 and _http2_available()
+		key = (base_url.rstrip("/"), http2)
+		client = clients.get(key)
+		if client is None or client.is_closed:
+			limits = self._limits()
+			client = httpx.AsyncClient(
+				limits=limits,
+				http2=http2,
+				timeout=httpx.Timeout(get_settings().http_timeout),
+				transport=cassette_transport(limits, http2),
+			)
+			clients[key] = client
+		return client
+
+	def openai(self, base_url: str | None = None) -> httpx.AsyncClient:
+		return self.get(base_url or OPENAI_DEFAULT_BASE_URL, http2=get_settings().openai_http2)
+
+	def ollama(self, base_url: str) -> httpx.AsyncClient:
+		# Ollama обычно работает по http:// без TLS, HTTP/2 там не поддерживается
+		return self.get(base_url)
+
+	def github(self, api_base: str) -> httpx.AsyncClient:
+		return self.get(api_base)
+
+	async def startup(self) -> None:
+		"""Заранее создаёт пулы для настроенных провайдеров (вызывается при старте FastAPI)"""
+		settings = get_settings()
+		self.openai(settings.openai_base_url)
+		self.ollama(settings.ollama_base_url)
+
+	async def aclose(self) -> None:
+		"""Закрывает клиентов текущего loop'а; вызывается перед его завершением (остановка FastAPI, конец CLI)"""
+		clients = list(self._clients.pop(asyncio.get_running_loop(), {}).values())
+		clients += self._clients.pop(None, {}).values()
+		await asyncio.gather(*(c.aclose() for c in clients if not c.is_closed), return_exceptions=True)
+
+
+_registry = HttpClientRegistry()
+
+
+def get_http_registry() -> HttpClientRegistry:
+	return _registry
@@ -0,0 +1,333 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Set
+from backend.services.config import get_settings
+from backend.services.log import get_logger
+from backend.services.rate_limit import caller_var
+
+
+logger = get_logger("backend.jobs")
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+TERMINAL_STATUSES = {"succeeded", "failed", "cancelled"}
+
+INTERRUPTED_ERROR = "Прервано: обработчик остановился во время выполнения, повторно задача не запускается"
+
+
+class JobStore:
+	"""Хранилище задач в SQLite. Общее для нескольких процессов uvicorn: захват задачи атомарный."""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self._lock = threading.Lock()
+		self._conn: sqlite3.Connection | None = None
+
+	def _db(self) -> sqlite3.Connection:
+		if self._conn is None:
+			Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+			conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30.0)
+			conn.row_factory = sqlite3.Row
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute(
+				"CREATE TABLE IF NOT EXISTS jobs ("
+				"id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, priority INTEGER NOT NULL DEFAULT 0, "
+				"status TEXT NOT NULL, result TEXT, error TEXT, worker TEXT, lease_until REAL, "
+				"cancel_requested INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, "
+				"created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+			)
+			conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs(status, priority DESC, created_at)")
+			self._conn = conn
+		return self._conn
+
+	@staticmethod
+	def _row(row: sqlite3.Row | None) -> Dict[str, Any] | None:
+		if row is None:
+			return None
+		data = dict(row)
+		data["payload"] = json.loads(data["payload"])
+		data["result"] = json.loads(data["result"]) if data["result"] is not None else None
+		data["cancel_requested"] = bool(data["cancel_requested"])
+		return data
+
+	def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0) -> str:
+		job_id = uuid.uuid4().hex
+		with self._lock:
+			self._db().execute(
+				"INSERT INTO jobs(id, kind, payload, priority, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+				(job_id, kind, json.dumps(payload, ensure_ascii=False), priority, time.time()),
+			)
+		return job_id
+
+	def claim(self, worker: str, lease_seconds: float) -> Dict[str, Any] | None:
+		"""Забирает самую приоритетную задачу из очереди (BEGIN IMMEDIATE — один писатель за раз)"""
+		now = time.time()
+		with self._lock:
+			db = self._db()
+			db.execute("BEGIN IMMEDIATE")
+			try:
+				row = db.execute(
+					"SELECT id FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1"
+				).fetchone()
+				if row is None:
+					db.execute("COMMIT")
+					return None
+				db.execute(
+					"UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, started_at = ?, attempts = attempts + 1 "
+					"WHERE id = ?",
+					(worker, now + lease_seconds, now, row["id"]),
+				)
+				job = db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+				db.execute("COMMIT")
+			except Exception:
+				db.execute("ROLLBACK")
+				raise
+		return self._row(job)
+
+	def extend_leases(self, worker: str, job_ids: List[str], lease_seconds: float) -> None:
+		if not job_ids:
+			return
+		marks = ",".join("?" for _ in job_ids)
+		with self._lock:
+			self._db().execute(
+				f"UPDATE jobs SET lease_until = ? WHERE worker = ? AND status = 'running' AND id IN ({marks})",
+				(time.time() + lease_seconds, worker, *job_ids),
+			)
+
+	@staticmethod
+	def _interrupt(db: sqlite3.Connection, where: str, params: tuple, restartable: Collection[str]) -> int:
+		"""Прерванные задачи: повторяемые типы — снова в очередь, остальные (git push, прогоны) — failed"""
+		kinds = tuple(restartable)
+		marks = ",".join("?" for _ in kinds)
+		db.execute(
+			f"UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_until = NULL "
+			f"WHERE status = 'running' AND cancel_requested = 0 AND {where} AND kind NOT IN ({marks})",
+			(INTERRUPTED_ERROR, time.time(), *params, *kinds),
+		)
+		cur = db.execute(
+			f"UPDATE jobs SET status = 'queued', worker = NULL, lease_until = NULL "
+			f"WHERE status = 'running' AND cancel_requested = 0 AND {where} AND kind IN ({marks})",
+			(*params, *kinds),
+		)
+		return cur.rowcount
+
+	def requeue_expired(self, restartable: Collection[str]) -> int:
+		"""Возвращает в очередь задачи, чей обработчик пропал (процесс упал или перезапущен)"""
+		now = time.time()
+		with self._lock:
+			db = self._db()
+			db.execute(
+				"UPDATE jobs SET status = 'cancelled', finished_at = ?, lease_until = NULL "
+				"WHERE status = 'running' AND lease_until < ? AND cancel_requested = 1",
+				(now, now),
+			)
+			return self._interrupt(db, "lease_until < ?", (now,), restartable)
+
+	def requeue_worker(self, worker: str, restartable: Collection[str]) -> None:
+		with self._lock:
+			self._interrupt(self._db(), "worker = ?", (worker,), restartable)
+
+	def finish(self, job_id: str, worker: str, status: str, result: Any = None, error: str | None = None) -> None:
+		"""Итог задачи записывается, только если она всё ещё за этим обработчиком (аренду могли перехватить)"""
+		with self._lock:
+			self._db().execute(
+				"UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL "
+				"WHERE id = ? AND worker = ? AND status = 'running'",
+				(status, json.dumps(result, ensure_ascii=False) if result is not None else None, error, time.time(), job_id, worker),
+			)
+
+	def request_cancel(self, job_id: str) -> Dict[str, Any] | None:
+		"""Задача в очереди отменяется сразу, выполняющаяся — помечается и прерывается своим обработчиком"""
+		with self._lock:
+			db = self._db()
+			db.execute(
+				"UPDATE jobs SET status = 'cancelled', finished_at = ?, cancel_requested = 1 WHERE id = ? AND status = 'queued'",
+				(time.time(), job_id),
+			)
+			db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+			row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+		return self._row(row)
+
+	def cancel_requested(self, job_ids: List[str]) -> List[str]:
+		if not job_ids:
+			return []
+		marks = ",".join("?" for _ in job_ids)
+		with self._lock:
+			rows = self._db().execute(
+				f"SELECT id FROM jobs WHERE cancel_requested = 1 AND id IN ({marks})", tuple(job_ids)
+			).fetchall()
+		return [r["id"] for r in rows]
+
+	def get(self, job_id: str) -> Dict[str, Any] | None:
+		with self._lock:
+			row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+		return self._row(row)
+
+	def list(self, status: str | None = None, limit: int = 50) -> List[Dict[str, Any]]:
+		with self._lock:
+			if status:
+				rows = self._db().execute(
+					"SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+				).fetchall()
+			else:
+				rows = self._db().execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+		return [self._row(r) for r in rows]
+
+
+class JobQueue:
+	"""Пул асинхронных обработчиков задач внутри процесса поверх JobStore"""
+
+	def __init__(self, store: JobStore, workers: int = 2, lease_seconds: float = 300.0, poll_interval: float = 1.0) -> None:
+		self.store = store
+		self.workers = max(1, workers)
+		self.lease_seconds = lease_seconds
+		self.poll_interval = poll_interval
+		self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+		self.handlers: Dict[str, JobHandler] = {}
+		self.restartable: Set[str] = set()
+		self._running: Dict[str, asyncio.Task] = {}
+		self._tasks: List[asyncio.Task] = []
+		self._wakeup: asyncio.Event | None = None
+		self._stopping = False
+
+	def register(self, kind: str, handler: JobHandler, restartable: bool = True) -> None:
+		"""restartable=False — задачу с побочными эффектами не повторять, если её выполнение прервалось"""
+		self.handlers[kind] = handler
+		if restartable:
+			self.restartable.add(kind)
+		else:
+			self.restartable.discard(kind)
+
+	async def start(self) -> None:
+		if self._tasks:
+			return
+		self._wakeup = asyncio.Event()
+		self._stopping = False
+		await asyncio.to_thread(self.store.requeue_expired, self.restartable)
+		self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+		self._tasks.append(asyncio.create_task(self._supervisor()))
+
+	async def stop(self) -> None:
+		self._stopping = True
+		for task in self._tasks:
+			task.cancel()
+		for task in list(self._running.values()):
+			task.cancel()
+		await asyncio.gather(*self._tasks, *self._running.values(), return_exceptions=True)
+		self._tasks = []
+		self._running = {}
+		# Незавершённые повторяемые задачи этого процесса вернутся в очередь и будут выполнены после рестарта
+		await asyncio.to_thread(self.store.requeue_worker, self.worker_id, self.restartable)
+
+	async def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0) -> str:
+		if kind not in self.handlers:
+			raise ValueError(f"Неизвестный тип задачи '{kind}'. Доступны: {', '.join(sorted(self.handlers))}")
+		job_id = await asyncio.to_thread(self.store.submit, kind, payload, priority)
+		if self._wakeup is not None:
+			self._wakeup.set()
+		return job_id
+
+	async def cancel(self, job_id: str) -> Dict[str, Any] | None:
+		job = await asyncio.to_thread(self.store.request_cancel, job_id)
+		task = self._running.get(job_id)
+		if task is not None:
+			task.cancel()
+		return job
+
+	async def _worker(self) -> None:
+		assert self._wakeup is not None
+		backoff = self.poll_interval
+		while True:
+			try:
+				job = await asyncio.to_thread(self.store.claim, self.worker_id, self.lease_seconds)
+			except sqlite3.Error as exc:
+				# Например, "database is locked" при нескольких процессах uvicorn: обработчик не должен умирать
+				logger.warning("job_claim_failed", extra={"worker": self.worker_id, "error": str(exc), "retry_in": backoff})
+				await asyncio.sleep(backoff)
+				backoff = min(backoff * 2, 30.0)
+				continue
+			backoff = self.poll_interval
+			if job is None:
+				# Задачи могут добавить другие процессы, поэтому кроме события опрашиваем базу по таймеру
+				self._wakeup.clear()
+				try:
+					await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+				except asyncio.TimeoutError:
+					pass
+				continue
+			await self._execute(job)
+
+	async def _execute(self, job: Dict[str, Any]) -> None:
+		handler = self.handlers.get(job["kind"])
+		if handler is None:
+			await self._finish(job["id"], "failed", None, f"Неизвестный тип задачи '{job['kind']}'")
+			return
+		# Вызовы ИИ внутри задачи стоят в очереди лимитера как отдельный вызывающий
+		token = caller_var.set(f"job:{job['id']}")
+		try:
+			task = asyncio.create_task(handler(job["payload"]))
+		finally:
+			caller_var.reset(token)
+		self._running[job["id"]] = task
+		try:
+			result = await task
+			await self._finish(job["id"], "succeeded", result)
+		except asyncio.CancelledError:
+			if self._stopping:
+				raise
+			await self._finish(job["id"], "cancelled", None, "Отменено пользователем")
+		except Exception as exc:
+			detail = getattr(exc, "detail", None) or str(exc) or exc.__class__.__name__
+			await self._finish(job["id"], "failed", None, str(detail))
+		finally:
+			self._running.pop(job["id"], None)
+
+	async def _finish(self, job_id: str, status: str, result: Any = None, error: str | None = None) -> None:
+		try:
+			await asyncio.to_thread(self.store.finish, job_id, self.worker_id, status, result, error)
+		except sqlite3.Error as exc:
+			# Задача останется running и после истечения аренды будет обработана как прерванная
+			logger.error("job_finish_failed", extra={"job_id": job_id, "status": status, "error": str(exc)})
+
+	async def _supervisor(self) -> None:
+		"""Продлевает аренду своих задач, подхватывает брошенные и отменяет задачи по запросу из других процессов"""
+		interval = max(self.poll_interval, min(self.lease_seconds / 3, 30.0))
+		while True:
+			await asyncio.sleep(interval)
+			ids = list(self._running)
+			try:
+				await asyncio.to_thread(self.store.extend_leases, self.worker_id, ids, self.lease_seconds)
+				cancelled = await asyncio.to_thread(self.store.cancel_requested, ids)
+				requeued = await asyncio.to_thread(self.store.requeue_expired, self.restartable)
+			except sqlite3.Error as exc:
+				logger.warning("job_supervisor_failed", extra={"worker": self.worker_id, "error": str(exc)})
+				continue
+			for job_id in cancelled:
+				task = self._running.get(job_id)
+				if task is not None:
+					task.cancel()
+			if requeued:
+				self._wakeup.set()
+
+
+_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue:
+	global _queue
+	if _queue is None:
+		settings = get_settings()
+		_queue = JobQueue(
+			JobStore(settings.jobs_db_path),
+			workers=settings.job_workers,
+			lease_seconds=settings.job_lease_seconds,
+			poll_interval=settings.job_poll_interval,
+		)
+	return _queue
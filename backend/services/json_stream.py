@@ -0,0 +1,48 @@
+import json
+from typing import Any, Iterator, List
+
+
+class JsonArrayItemParser:
+	"""Инкрементальный парсер JSON: отдаёт объекты-элементы массива, как только объект закрылся.
+
+	Подходит для ответов вида {"test_cases":[{...},{...}]} или [{...},{...}], которые приходят
+	из LLM кусками. Вложенные объекты внутри элемента не отдаются отдельно.
+	"""
+
+	def __init__(self) -> None:
+		self._stack: List[str] = []
+		self._in_string = False
+		self._escape = False
+		self._item_depth: int | None = None
+		self._item_chars: List[str] = []
+
+	def feed(self, chunk: str) -> Iterator[Any]:
+		for ch in chunk:
+			if self._item_depth is not None:
+				self._item_chars.append(ch)
+			if self._in_string:
+				if self._escape:
+					self._escape = False
+				elif ch == "\\":
+					self._escape = True
+				elif ch == '"':
+					self._in_string = False
+				continue
+			if ch == '"':
+				self._in_string = True
+			elif ch in "{[":
+				if ch == "{" and self._item_depth is None and self._stack and self._stack[-1] == "[":
+					self._item_depth = len(self._stack)
+					self._item_chars = ["{"]
+				self._stack.append(ch)
+			elif ch in "}]":
+				if self._stack:
+					self._stack.pop()
+				if ch == "}" and self._item_depth is not None and len(self._stack) == self._item_depth:
+					raw = "".join(self._item_chars)
+					self._item_depth = None
+					self._item_chars = []
+					try:
+						yield json.loads(raw)
+					except json.JSONDecodeError:
+						continue
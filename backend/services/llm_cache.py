@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List
+from backend.services.config import get_settings
+
+
+class LLMCache:
+	"""Двухуровневый кэш ответов LLM: LRU в памяти + SQLite на диске, с TTL и ограничением размера"""
+
+	def __init__(self, path: str | None, memory_entries: int = 256, max_entries: int = 5000, ttl: float = 7 * 24 * 3600) -> None:
+		self.path = path
+		self.memory_entries = memory_entries
+		self.max_entries = max_entries
+		self.ttl = ttl
+		self._memory: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+		self._lock = threading.Lock()
+		self._conn: sqlite3.Connection | None = None
+		self.counters: Dict[str, int] = {
+			"hits": 0,
+			"memory_hits": 0,
+			"disk_hits": 0,
+			"misses": 0,
+			"writes": 0,
+			"evictions": 0,
+			"bypassed": 0,
+		}
+
+	@staticmethod
+	def make_key(provider: str, model: str | None, messages: List[dict], response_format: str | None) -> str:
+		raw = json.dumps(
+			{"provider": provider, "model": model, "messages": messages, "response_format": response_format},
+			ensure_ascii=False,
+			sort_keys=True,
+			separators=(",", ":"),
+		)
+		return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+	def _db(self) -> sqlite3.Connection | None:
+		if not self.path:
+			return None
+		if self._conn is None:
+			Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+			conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute(
+				"CREATE TABLE IF NOT EXISTS llm_cache ("
+				"key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+			)
+			conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+			self._conn = conn
+		return self._conn
+
+	def _expired(self, created_at: float, now: float) -> bool:
+		return self.ttl > 0 and now - created_at > self.ttl
+
+	def _remember(self, key: str, created_at: float, value: str) -> None:
+		self._memory[key] = (created_at, value)
+		self._memory.move_to_end(key)
+		while len(self._memory) > self.memory_entries:
+			self._memory.popitem(last=False)
+
+	def _get_sync(self, key: str) -> str | None:
+		now = time.time()
+		with self._lock:
+			item = self._memory.get(key)
+			if item is not None:
+				if not self._expired(item[0], now):
+					self._memory.move_to_end(key)
+					self.counters["hits"] += 1
+					self.counters["memory_hits"] += 1
+					return item[1]
+				del self._memory[key]
+			db = self._db()
+			if db is not None:
+				row = db.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+				if row is not None:
+					value, created_at = row
+					if not self._expired(created_at, now):
+						db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+						self._remember(key, created_at, value)
+						self.counters["hits"] += 1
+						self.counters["disk_hits"] += 1
+						return value
+					db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+			self.counters["misses"] += 1
+			return None
+
+	def _set_sync(self, key: str, value: str) -> None:
+		now = time.time()
+		with self._lock:
+			self._remember(key, now, value)
+			self.counters["writes"] += 1
+			db = self._db()
+			if db is None:
+				return
+			db.execute(
+				"INSERT OR REPLACE INTO llm_cache(key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+				(key, value, now, now),
+			)
+			if self.ttl > 0:
+				db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+			(count,) = db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+			overflow = count - self.max_entries
+			if overflow > 0:
+				# Вытесняем записи, к которым дольше всего не обращались
+				db.execute(
+					"DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?)",
+					(overflow,),
+				)
+				self.counters["evictions"] += overflow
+
+	async def get(self, key: str) -> str | None:
+		if key in self._memory:
+			return self._get_sync(key)
+		return await asyncio.to_thread(self._get_sync, key)
+
+	async def set(self, key: str, value: str) -> None:
+		await asyncio.to_thread(self._set_sync, key, value)
+
+	def _delete_sync(self, key: str) -> None:
+		with self._lock:
+			self._memory.pop(key, None)
+			db = self._db()
+			if db is not None:
+				db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+	async def delete(self, key: str) -> None:
+		await asyncio.to_thread(self._delete_sync, key)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._memory.clear()
+			db = self._db()
+			if db is not None:
+				db.execute("DELETE FROM llm_cache")
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			disk_entries = 0
+			db = self._db()
+			if db is not None:
+				(disk_entries,) = db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+			lookups = self.counters["hits"] + self.counters["misses"]
+			return {
+				**self.counters,
+				"hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+				"memory_entries": len(self._memory),
+				"disk_entries": disk_entries,
+			}
+
+
+_cache: LLMCache | None = None
+
+
+def get_llm_cache() -> LLMCache | None:
+	"""Глобальный кэш ответов LLM или None, если кэш отключён (LLM_CACHE_ENABLED=false)"""
+	global _cache
+	settings = get_settings()
+	if not settings.llm_cache_enabled:
+		return None
+	if _cache is None:
+		_cache = LLMCache(
+			path=settings.llm_cache_path or None,
+			memory_entries=settings.llm_cache_memory_entries,
+			max_entries=settings.llm_cache_max_entries,
+			ttl=settings.llm_cache_ttl,
+		)
+	return _cache
@@ -0,0 +1,158 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict
+from backend.services.config import get_settings
+
+
+# Идентификатор текущего HTTP-запроса; задаётся RequestLogMiddleware и попадает в каждую запись
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Стандартные атрибуты LogRecord — всё остальное из extra=... выводится как поля JSON
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def get_logger(name: str) -> logging.Logger:
+	return logging.getLogger(name)
+
+
+class JsonFormatter(logging.Formatter):
+	"""Одна запись — одна строка JSON"""
+
+	def format(self, record: logging.LogRecord) -> str:
+		data: Dict[str, Any] = {
+			"ts": round(record.created, 3),
+			"level": record.levelname.lower(),
+			"logger": record.name,
+			"msg": record.getMessage(),
+		}
+		if record.request_id:
+			data["request_id"] = record.request_id
+		for key, value in record.__dict__.items():
+			if key not in _RESERVED:
+				data[key] = value
+		if record.exc_info:
+			data["exc"] = self.formatException(record.exc_info)
+		elif record.exc_text:
+			data["exc"] = record.exc_text
+		return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class JsonQueueHandler(logging.handlers.QueueHandler):
+	"""Перед очередью: трассировка форматируется в exc_text, пока exc_info ещё доступен.
+
+	Стандартный prepare() склеивает её с сообщением и обнуляет exc_info, и поле exc терялось.
+	"""
+
+	def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+		record = copy.copy(record)
+		record.msg = record.getMessage()
+		record.args = None
+		if record.exc_info:
+			record.exc_text = logging.Formatter().formatException(record.exc_info)
+		record.exc_info = None
+		return record
+
+
+class ContextFilter(logging.Filter):
+	"""Добавляет request_id и пропускает только долю записей ниже WARNING"""
+
+	def __init__(self, sample_rate: float = 1.0) -> None:
+		super().__init__()
+		self.sample_rate = sample_rate
+
+	def filter(self, record: logging.LogRecord) -> bool:
+		if record.levelno < logging.WARNING and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+			return False
+		record.request_id = request_id_var.get()
+		return True
+
+
+def setup_logging() -> None:
+	"""Логгер "backend": запись в очередь в вызывающем потоке, вывод в stdout — в отдельном потоке.
+
+	Уровень LOG_LEVEL=off отключает логирование: вызовы logger.debug/info отбрасываются
+	на проверке уровня, до форматирования сообщения.
+	"""
+	global _listener
+	if _listener is not None:
+		return
+	settings = get_settings()
+	logger = logging.getLogger("backend")
+	logger.propagate = False
+	level = settings.log_level.upper()
+	if level == "OFF":
+		logger.setLevel(logging.CRITICAL + 1)
+		return
+	logger.setLevel(getattr(logging, level, logging.INFO))
+	records: queue.SimpleQueue = queue.SimpleQueue()
+	handler = JsonQueueHandler(records)
+	handler.addFilter(ContextFilter(settings.log_sample_rate))
+	output = logging.StreamHandler(sys.stdout)
+	output.setFormatter(JsonFormatter())
+	logger.handlers = [handler]
+	_listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+	_listener.start()
+	atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+	"""Дописывает оставшиеся в очереди записи"""
+	global _listener
+	if _listener is not None:
+		_listener.stop()
+		_listener = None
+
+
+class RequestLogMiddleware:
+	"""ASGI-middleware: request id (из X-Request-ID или новый) и запись о каждом запросе"""
+
+	def __init__(self, app) -> None:
+		self.app = app
+		self.logger = logging.getLogger("backend.access")
+
+	async def __call__(self, scope, receive, send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+		headers = dict(scope.get("headers") or [])
+		rid = headers.get(b"x-request-id", b"").decode("latin-1") or uuid.uuid4().hex[:16]
+		token = request_id_var.set(rid)
+		started = time.perf_counter()
+		state = {"status": 500, "bytes": 0}
+
+		async def send_wrapper(message) -> None:
+			if message["type"] == "http.response.start":
+				state["status"] = message["status"]
+				message.setdefault("headers", [])
+				message["headers"] = [*message["headers"], (b"x-request-id", rid.encode("latin-1"))]
+			elif message["type"] == "http.response.body":
+				state["bytes"] += len(message.get("body", b""))
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_wrapper)
+		finally:
+			if self.logger.isEnabledFor(logging.INFO):
+				self.logger.info(
+					"request",
+					extra={
+						"method": scope.get("method"),
+						"path": scope.get("path"),
+						"status": state["status"],
+						"elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+						"request_bytes": int(headers.get(b"content-length", b"0") or 0),
+						"response_bytes": state["bytes"],
+					},
+				)
+			request_id_var.reset(token)
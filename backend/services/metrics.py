@@ -0,0 +1,160 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+
+# Границы корзин по умолчанию (секунды): от быстрых HTTP-ответов до долгих вызовов LLM
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+LONG_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+	parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+	if extra:
+		parts.append(extra)
+	return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+	def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> None:
+		self.name = name
+		self.help = help_text
+		self.labelnames = labelnames
+		self._values: Dict[Tuple[str, ...], float] = {}
+		self._lock = threading.Lock()
+
+	def inc(self, amount: float = 1.0, **labels: str) -> None:
+		key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+		with self._lock:
+			self._values[key] = self._values.get(key, 0.0) + amount
+
+	def render(self) -> List[str]:
+		lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+		with self._lock:
+			items = list(self._values.items())
+		for key, value in items:
+			lines.append(f"{self.name}{_labels(self.labelnames, key)} {value:g}")
+		return lines
+
+
+class Histogram:
+	def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+		self.name = name
+		self.help = help_text
+		self.labelnames = labelnames
+		self.buckets = tuple(sorted(buckets))
+		# На каждый набор меток: счётчики корзин (последняя — +Inf), сумма и количество
+		self._values: Dict[Tuple[str, ...], list] = {}
+		self._lock = threading.Lock()
+
+	def observe(self, value: float, **labels: str) -> None:
+		key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+		index = bisect_left(self.buckets, value)
+		with self._lock:
+			state = self._values.get(key)
+			if state is None:
+				state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+			state[0][index] += 1
+			state[1] += value
+			state[2] += 1
+
+	@contextmanager
+	def time(self, **labels: str) -> Iterator[None]:
+		started = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.observe(time.perf_counter() - started, **labels)
+
+	def render(self) -> List[str]:
+		lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+		with self._lock:
+			items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+		for key, counts, total, count in items:
+			cumulative = 0
+			for bound, n in zip(self.buckets, counts):
+				cumulative += n
+				le = _labels(self.labelnames, key, f'le="{bound:g}"')
+				lines.append(f"{self.name}_bucket{le} {cumulative}")
+			le = _labels(self.labelnames, key, 'le="+Inf"')
+			lines.append(f"{self.name}_bucket{le} {count}")
+			lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total:g}")
+			lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+		return lines
+
+
+class MetricsRegistry:
+	"""Метрики процесса в текстовом формате Prometheus, без внешних зависимостей"""
+
+	def __init__(self) -> None:
+		self._metrics: Dict[str, Counter | Histogram] = {}
+
+	def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+		metric = self._metrics.setdefault(name, Counter(name, help_text, labelnames))
+		assert isinstance(metric, Counter)
+		return metric
+
+	def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+		metric = self._metrics.setdefault(name, Histogram(name, help_text, labelnames, buckets))
+		assert isinstance(metric, Histogram)
+		return metric
+
+	def render(self) -> str:
+		lines: List[str] = []
+		for metric in self._metrics.values():
+			lines.extend(metric.render())
+		return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+	return _registry
+
+
+HTTP_REQUESTS = _registry.counter("http_requests_total", "HTTP-запросы по эндпоинтам", ("method", "path", "status"))
+HTTP_LATENCY = _registry.histogram("http_request_duration_seconds", "Время обработки HTTP-запроса до конца ответа", ("method", "path"))
+LLM_LATENCY = _registry.histogram("llm_request_duration_seconds", "Время одного обращения к модели", ("provider", "model", "mode", "outcome"))
+LLM_TOKENS = _registry.counter("llm_tokens_total", "Токены по данным провайдера", ("provider", "model", "type"))
+LLM_RETRIES = _registry.counter("llm_retries_total", "Повторные попытки запросов к модели", ("provider", "model"))
+LLM_RATE_LIMIT_WAIT = _registry.histogram("llm_rate_limit_wait_seconds", "Ожидание в очереди лимитера RPM/TPM", ("provider", "model"))
+LLM_HEDGES = _registry.counter("llm_hedges_total", "Запасные (хеджирующие) запросы и какой из запросов ответил первым", ("provider", "model", "winner"))
+FORMATTER_LATENCY = _registry.histogram("formatter_duration_seconds", "Время форматирования пачки кода", ("backend",))
+TEST_RUN_LATENCY = _registry.histogram("test_run_duration_seconds", "Длительность прогона тестов", ("kind", "mode"), LONG_BUCKETS)
+GITHUB_LATENCY = _registry.histogram("github_request_duration_seconds", "Время запросов к GitHub API", ("operation", "status"))
+GIT_LATENCY = _registry.histogram("git_operation_duration_seconds", "Время локальных операций git", ("operation",))
+
+
+class MetricsMiddleware:
+	"""ASGI-middleware: число и длительность запросов по шаблону маршрута (а не по фактическому пути)"""
+
+	def __init__(self, app) -> None:
+		self.app = app
+
+	async def __call__(self, scope, receive, send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+		started = time.perf_counter()
+		status = {"code": 500}
+
+		async def send_wrapper(message) -> None:
+			if message["type"] == "http.response.start":
+				status["code"] = message["status"]
+			await send(message)
+
+		try:
+			await self.app(scope, receive, send_wrapper)
+		finally:
+			route = scope.get("route")
+			path = getattr(route, "path", None) or "unmatched"
+			method = scope.get("method", "")
+			HTTP_REQUESTS.inc(method=method, path=path, status=str(status["code"]))
+			HTTP_LATENCY.observe(time.perf_counter() - started, method=method, path=path)
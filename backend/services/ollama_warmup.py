@@ -0,0 +1,187 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Set, Tuple
+from backend.services.backends import backend_urls
+from backend.services.cassette import replaying
+from backend.services.config import get_settings
+from backend.services.http_pool import get_http_registry
+from backend.services.log import get_logger
+
+
+logger = get_logger("backend.ollama")
+
+
+def keep_alive() -> int | str | None:
+	"""Значение keep_alive для запросов к Ollama: "30m", "1h", секунды или -1 (не выгружать); пусто — по умолчанию сервера"""
+	value = get_settings().ollama_keep_alive.strip()
+	if not value:
+		return None
+	try:
+		return int(value)
+	except ValueError:
+		return value
+
+
+def warmup_models() -> List[str]:
+	settings = get_settings()
+	models = [m.strip() for m in settings.ollama_warmup_models.split(",") if m.strip()]
+	return models or [settings.ollama_model]
+
+
+class _ModelStats:
+	__slots__ = ("cold_ms", "warm_ms", "load_ms", "pings", "failures", "last_error", "last_ping")
+
+	def __init__(self) -> None:
+		self.cold_ms: float | None = None
+		self.warm_ms: float | None = None
+		self.load_ms: float | None = None
+		self.pings = 0
+		self.failures = 0
+		self.last_error: str | None = None
+		self.last_ping: float | None = None
+
+	def as_dict(self) -> Dict[str, Any]:
+		return {
+			"cold_ms": self.cold_ms,
+			"warm_ms": self.warm_ms,
+			"load_ms": self.load_ms,
+			"pings": self.pings,
+			"failures": self.failures,
+			"last_error": self.last_error,
+			"last_ping": self.last_ping,
+		}
+
+
+class OllamaWarmer:
+	"""Загрузка моделей Ollama в память при старте и периодический пинг, чтобы они не выгружались.
+
+	Пинг — /api/generate без промпта: Ollama только загружает модель и продлевает keep_alive.
+	Задержка пинга считается «холодной», если модели не было в /api/ps перед пингом.
+	"""
+
+	def __init__(self) -> None:
+		self._stats: Dict[Tuple[str, str], _ModelStats] = {}
+		self._task: asyncio.Task | None = None
+
+	def _stat(self, url: str, model: str) -> _ModelStats:
+		stat = self._stats.get((url, model))
+		if stat is None:
+			stat = self._stats[(url, model)] = _ModelStats()
+		return stat
+
+	async def resident(self, url: str) -> List[Dict[str, Any]]:
+		"""Модели, загруженные в память бэкенда (/api/ps)"""
+		resp = await get_http_registry().ollama(url).get(f"{url}/api/ps", timeout=5.0)
+		resp.raise_for_status()
+		return resp.json().get("models") or []
+
+	async def _resident_names(self, url: str) -> Set[str]:
+		try:
+			return {m.get("name") or m.get("model") for m in await self.resident(url)}
+		except Exception:
+			return set()
+
+	async def ping(self, url: str, model: str, loaded: Set[str] | None = None) -> float | None:
+		"""Загружает модель (или продлевает её keep_alive); возвращает задержку в секундах"""
+		stat = self._stat(url, model)
+		if loaded is None:
+			loaded = await self._resident_names(url)
+		cold = model not in loaded and f"{model}:latest" not in loaded
+		payload: Dict[str, Any] = {"model": model, "prompt": "", "stream": False}
+		ka = keep_alive()
+		if ka is not None:
+			payload["keep_alive"] = ka
+		stat.last_ping = time.time()
+		started = time.perf_counter()
+		try:
+			resp = await get_http_registry().ollama(url).post(f"{url}/api/generate", json=payload, timeout=get_settings().ollama_warmup_timeout)
+			resp.raise_for_status()
+			data = resp.json()
+		except Exception as exc:
+			stat.failures += 1
+			stat.last_error = str(exc) or exc.__class__.__name__
+			logger.warning("ollama_warmup_failed", extra={"backend": url, "model": model, "error": stat.last_error})
+			return None
+		elapsed = time.perf_counter() - started
+		stat.pings += 1
+		stat.last_error = None
+		elapsed_ms = round(elapsed * 1000, 2)
+		if cold:
+			stat.cold_ms = elapsed_ms
+			# load_duration — время загрузки весов по данным самого Ollama (нс)
+			if data.get("load_duration"):
+				stat.load_ms = round(data["load_duration"] / 1e6, 2)
+			logger.info("ollama_model_loaded", extra={"backend": url, "model": model, "elapsed_ms": elapsed_ms})
+		else:
+			stat.warm_ms = elapsed_ms
+		return elapsed
+
+	async def warm_all(self) -> None:
+		"""Пинг всех моделей из OLLAMA_WARMUP_MODELS на всех бэкендах Ollama"""
+		models = warmup_models()
+
+		async def one(url: str) -> None:
+			loaded = await self._resident_names(url)
+			# Модели одного бэкенда грузятся по очереди: параллельная загрузка лишь делит память и диск
+			for model in models:
+				await self.ping(url, model, loaded)
+
+		await asyncio.gather(*(one(url) for url in backend_urls("ollama")))
+
+	async def _loop(self, interval: float) -> None:
+		while True:
+			await self.warm_all()
+			if interval <= 0:
+				return
+			await asyncio.sleep(interval)
+
+	def enabled(self) -> bool:
+		settings = get_settings()
+		return settings.ollama_warmup and not replaying() and (settings.ai_provider == "ollama" or bool(settings.ollama_warmup_models.strip()))
+
+	async def start(self) -> None:
+		"""Прогрев в фоне: приложение принимает запросы, не дожидаясь загрузки моделей"""
+		if self._task is None and self.enabled():
+			self._task = asyncio.create_task(self._loop(get_settings().ollama_keep_warm_interval))
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+			self._task = None
+
+	async def report(self) -> Dict[str, Any]:
+		"""Загруженные модели каждого бэкенда и задержки холодного/тёплого обращения"""
+		urls = backend_urls("ollama")
+
+		async def one(url: str) -> Dict[str, Any]:
+			item: Dict[str, Any] = {"url": url}
+			try:
+				item["resident"] = [
+					{
+						"name": m.get("name") or m.get("model"),
+						"size": m.get("size"),
+						"size_vram": m.get("size_vram"),
+						"expires_at": m.get("expires_at"),
+					}
+					for m in await self.resident(url)
+				]
+			except Exception as exc:
+				item["resident"] = None
+				item["error"] = str(exc) or exc.__class__.__name__
+			item["latency"] = {model: stat.as_dict() for (u, model), stat in self._stats.items() if u == url}
+			return item
+
+		return {
+			"keep_alive": keep_alive(),
+			"warmup_models": warmup_models(),
+			"keep_warm_interval": get_settings().ollama_keep_warm_interval,
+			"backends": await asyncio.gather(*(one(url) for url in urls)),
+		}
+
+
+_warmer = OllamaWarmer()
+
+
+def get_ollama_warmer() -> OllamaWarmer:
+	return _warmer
@@ -1,12 +1,33 @@
-from backend.services.schemas import TestCase
+import asyncio
+from typing import AsyncIterator, List
+from backend.services.schemas import TestCase, GenerateTestCodeBatchItem
 from backend.services.ai import AIClient
+from backend.services.format_service import get_formatter_service
+from backend.services.concurrency import provider_limiter
 
 
 HEADER_TS = "import { test, expect } from '@playwright/test';\n"
 HEADER_JS = "const { test, expect } = require('@playwright/test');\n"
 
 
+def suggested_filename(test_case: TestCase, language: str) -> str:
+	"""Имя файла автотеста по заголовку тест-кейса"""
+	stem = "test_" + test_case.title.lower().replace(" ", "_")
+	if language == "python":
+		return stem + ".py"
+	ext = "ts" if language == "ts" else "js"
+	return stem + f".spec.{ext}"
+
+
 class PlaywrightGenerator:
+	@staticmethod
+	def with_header(code_body: str, language: str) -> str:
+		"""Добавляет импорт @playwright/test, если модель его не сгенерировала"""
+		header = HEADER_TS if language == "ts" else HEADER_JS
+		if code_body.startswith("import ") or code_body.startswith("const {"):
+			return code_body
+		return header + "\n" + code_body.strip() + "\n"
+
 	async def generate_code_from_test_case(
 		self,
 		test_case: TestCase,
@@ -15,9 +36,120 @@ class PlaywrightGenerator:
 		base_url: str | None = None,
 	) -> str:
 		code_body = await ai_client.generate_playwright_code(test_case, language=language, base_url=base_url)
-		header = HEADER_TS if language == "ts" else HEADER_JS
-		if code_body.startswith("import ") or code_body.startswith("const {"):
-			return code_body
-		return header + "\n" + code_body.strip() + "\n"
+		return self.with_header(code_body, language)
+
+	async def generate_for_language(
+		self,
+		test_case: TestCase,
+		language: str,
+		ai_client: AIClient,
+		base_url: str | None = None,
+	) -> str:
+		"""Код автотеста для ts/js/python"""
+		if language == "python":
+			return await ai_client.generate_playwright_python_code(test_case, base_url=base_url)
+		return await self.generate_code_from_test_case(test_case, language, ai_client, base_url)
 
+	async def generate_item(
+		self,
+		index: int,
+		test_case: TestCase,
+		language: str,
+		ai_client: AIClient,
+		base_url: str | None = None,
+		format_code: bool = True,
+	) -> GenerateTestCodeBatchItem:
+		"""Код для одного тест-кейса под общим лимитом провайдера; ошибка возвращается в элементе"""
+		item = GenerateTestCodeBatchItem(
+			index=index,
+			title=test_case.title,
+			suggested_filename=suggested_filename(test_case, language),
+		)
+		try:
+			async with provider_limiter(ai_client.provider):
+				code = await self.generate_for_language(test_case, language, ai_client, base_url)
+			if format_code:
+				code = await get_formatter_service().format(code, language)
+			item.code = code
+		except Exception as exc:
+			item.error = str(exc) or exc.__class__.__name__
+		return item
+
+	async def generate_pack(
+		self,
+		start: int,
+		test_cases: List[TestCase],
+		language: str,
+		ai_client: AIClient,
+		base_url: str | None = None,
+		format_code: bool = True,
+	) -> List[GenerateTestCodeBatchItem]:
+		"""Код для нескольких тест-кейсов одним запросом к ИИ (индексы с start).
+
+		Кейсы, код которых не удалось выделить из ответа, генерируются отдельными запросами.
+		"""
+		if len(test_cases) == 1:
+			return [await self.generate_item(start, test_cases[0], language, ai_client, base_url, format_code)]
+		try:
+			async with provider_limiter(ai_client.provider):
+				codes = await ai_client.generate_playwright_code_pack(test_cases, language, base_url)
+		except Exception as exc:
+			error = str(exc) or exc.__class__.__name__
+			return [
+				GenerateTestCodeBatchItem(index=start + i, title=tc.title, suggested_filename=suggested_filename(tc, language), error=error)
+				for i, tc in enumerate(test_cases)
+			]
+
+		async def one(offset: int, test_case: TestCase, code: str | None) -> GenerateTestCodeBatchItem:
+			if code is None:
+				return await self.generate_item(start + offset, test_case, language, ai_client, base_url, format_code)
+			item = GenerateTestCodeBatchItem(
+				index=start + offset,
+				title=test_case.title,
+				suggested_filename=suggested_filename(test_case, language),
+			)
+			try:
+				if language != "python":
+					code = self.with_header(code, language)
+				if format_code:
+					code = await get_formatter_service().format(code, language)
+				item.code = code
+			except Exception as exc:
+				item.error = str(exc) or exc.__class__.__name__
+			return item
+
+		return list(await asyncio.gather(*(one(i, tc, code) for i, (tc, code) in enumerate(zip(test_cases, codes)))))
+
+	async def generate_batch(
+		self,
+		test_cases: List[TestCase],
+		language: str,
+		ai_client: AIClient,
+		base_url: str | None = None,
+		format_code: bool = True,
+		pack_size: int = 1,
+	) -> AsyncIterator[GenerateTestCodeBatchItem]:
+		"""Параллельная генерация кода для набора тест-кейсов.
 
+		Число одновременных запросов ограничено лимитом провайдера, результаты отдаются
+		в порядке готовности; ошибка одного элемента не прерывает остальные.
+		При pack_size > 1 тест-кейсы отправляются пачками по pack_size в одном запросе.
+		"""
+		if pack_size > 1:
+			tasks = [
+				asyncio.create_task(self.generate_pack(start, test_cases[start:start + pack_size], language, ai_client, base_url, format_code))
+				for start in range(0, len(test_cases), pack_size)
+			]
+		else:
+			tasks = [
+				asyncio.create_task(self.generate_item(i, tc, language, ai_client, base_url, format_code))
+				for i, tc in enumerate(test_cases)
+			]
+		try:
+			for fut in asyncio.as_completed(tasks):
+				result = await fut
+				for item in result if isinstance(result, list) else [result]:
+					yield item
+		finally:
+			for task in tasks:
+				task.cancel()
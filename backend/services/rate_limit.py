@@ -0,0 +1,224 @@
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Tuple
+from backend.services.config import get_settings
+from backend.services.log import request_id_var
+from backend.services.metrics import LLM_RATE_LIMIT_WAIT
+
+
+# Кто ставит запрос в очередь: задача из очереди, пакетный прогон или HTTP-запрос (по request id)
+caller_var: ContextVar[str | None] = ContextVar("rate_limit_caller", default=None)
+
+
+def current_caller() -> str:
+	return caller_var.get() or request_id_var.get() or "default"
+
+
+def estimate_tokens(messages: List[dict]) -> int:
+	"""Грубая оценка токенов промпта без токенизатора: ~4 символа на токен плюс служебные на сообщение"""
+	chars = sum(len(str(m.get("content", ""))) for m in messages)
+	return chars // 4 + 4 * len(messages) + 1
+
+
+class TokenBucket:
+	"""Корзина на минуту: ёмкость = лимит в минуту, пополнение равномерное. Баланс может уйти в минус
+	после поправки на фактический расход — тогда следующие запросы ждут дольше."""
+
+	def __init__(self, per_minute: float) -> None:
+		self.capacity = float(per_minute)
+		self.rate = self.capacity / 60.0
+		self.tokens = self.capacity
+		self.updated = time.monotonic()
+
+	def _refill(self) -> None:
+		now = time.monotonic()
+		self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+
+	def wait_time(self, amount: float) -> float:
+		self._refill()
+		amount = min(amount, self.capacity)
+		if self.tokens >= amount:
+			return 0.0
+		return (amount - self.tokens) / self.rate
+
+	def consume(self, amount: float) -> None:
+		self._refill()
+		# Отрицательное amount — возврат переоценённых токенов, но не выше ёмкости
+		self.tokens = min(self.capacity, self.tokens - (min(amount, self.capacity) if amount > 0 else amount))
+
+	def drain(self, seconds: float) -> None:
+		"""Пауза после 429: баланс уходит в минус на seconds секунд пополнения"""
+		self._refill()
+		self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class _Waiter:
+	__slots__ = ("caller", "tokens", "future", "queued_at")
+
+	def __init__(self, caller: str, tokens: int, future: asyncio.Future) -> None:
+		self.caller = caller
+		self.tokens = tokens
+		self.future = future
+		self.queued_at = time.monotonic()
+
+
+class ModelRateLimiter:
+	"""Планировщик запросов к одной модели: RPM и TPM, честная очередь по вызывающим (round-robin)"""
+
+	def __init__(self, provider: str, model: str, rpm: float, tpm: float) -> None:
+		self.provider = provider
+		self.model = model
+		self.rpm = TokenBucket(rpm) if rpm > 0 else None
+		self.tpm = TokenBucket(tpm) if tpm > 0 else None
+		self._queues: Dict[str, Deque[_Waiter]] = {}
+		self._callers: Deque[str] = deque()
+		self._timer: asyncio.TimerHandle | None = None
+		self._loop: asyncio.AbstractEventLoop | None = None
+		self.granted = 0
+		self.total_wait = 0.0
+		self.max_wait = 0.0
+
+	@property
+	def enabled(self) -> bool:
+		return self.rpm is not None or self.tpm is not None
+
+	def _check_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+		# Ожидающие из предыдущего (закрытого) event loop'а уже никто не ждёт
+		if self._loop is not loop:
+			self._queues = {}
+			self._callers = deque()
+			self._timer = None
+			self._loop = loop
+
+	async def acquire(self, tokens: int, caller: str | None = None) -> float:
+		"""Ждёт своей очереди и возвращает время ожидания в секундах"""
+		if not self.enabled:
+			return 0.0
+		loop = asyncio.get_running_loop()
+		self._check_loop(loop)
+		waiter = _Waiter(caller or current_caller(), tokens, loop.create_future())
+		queue = self._queues.get(waiter.caller)
+		if queue is None:
+			queue = self._queues[waiter.caller] = deque()
+			self._callers.append(waiter.caller)
+		queue.append(waiter)
+		self._dispatch()
+		try:
+			await waiter.future
+		except asyncio.CancelledError:
+			if not waiter.future.done() or waiter.future.cancelled():
+				self._remove(waiter)
+			raise
+		waited = time.monotonic() - waiter.queued_at
+		self.granted += 1
+		self.total_wait += waited
+		self.max_wait = max(self.max_wait, waited)
+		LLM_RATE_LIMIT_WAIT.observe(waited, provider=self.provider, model=self.model)
+		return waited
+
+	def settle(self, estimated: int, actual: int | None) -> None:
+		"""Поправка TPM на фактический расход токенов по ответу провайдера"""
+		if self.tpm is not None and actual:
+			self.tpm.consume(actual - estimated)
+
+	def penalize(self, seconds: float) -> None:
+		"""Провайдер ответил 429: новые запросы не отправляются ближайшие seconds секунд"""
+		for bucket in (self.rpm, self.tpm):
+			if bucket is not None:
+				bucket.drain(seconds)
+
+	def _remove(self, waiter: _Waiter) -> None:
+		queue = self._queues.get(waiter.caller)
+		if queue is not None and waiter in queue:
+			queue.remove(waiter)
+			if not queue:
+				del self._queues[waiter.caller]
+				self._callers.remove(waiter.caller)
+		self._dispatch()
+
+	def _dispatch(self) -> None:
+		if self._timer is not None:
+			self._timer.cancel()
+			self._timer = None
+		while self._callers:
+			caller = self._callers[0]
+			queue = self._queues[caller]
+			waiter = queue[0]
+			if waiter.future.done():
+				# Ожидание отменено, но ещё не убрано из очереди
+				queue.popleft()
+				self._callers.popleft()
+				if queue:
+					self._callers.append(caller)
+				else:
+					del self._queues[caller]
+				continue
+			delay = max(
+				self.rpm.wait_time(1) if self.rpm is not None else 0.0,
+				self.tpm.wait_time(waiter.tokens) if self.tpm is not None else 0.0,
+			)
+			if delay > 0:
+				# Голову очереди не обходим: иначе крупные запросы никогда не дождутся токенов
+				if self._loop is not None:
+					self._timer = self._loop.call_later(delay, self._dispatch)
+				return
+			if self.rpm is not None:
+				self.rpm.consume(1)
+			if self.tpm is not None:
+				self.tpm.consume(waiter.tokens)
+			queue.popleft()
+			self._callers.popleft()
+			if queue:
+				self._callers.append(caller)
+			else:
+				del self._queues[caller]
+			if not waiter.future.done():
+				waiter.future.set_result(None)
+
+	def stats(self) -> Dict[str, Any]:
+		return {
+			"provider": self.provider,
+			"model": self.model,
+			"rpm": self.rpm.capacity if self.rpm is not None else None,
+			"tpm": self.tpm.capacity if self.tpm is not None else None,
+			"available_requests": round(self.rpm.tokens, 1) if self.rpm is not None else None,
+			"available_tokens": round(self.tpm.tokens, 1) if self.tpm is not None else None,
+			"queue_depth": sum(len(q) for q in self._queues.values()),
+			"queued_by_caller": {caller: len(q) for caller, q in self._queues.items()},
+			"granted": self.granted,
+			"avg_wait": round(self.total_wait / self.granted, 3) if self.granted else 0.0,
+			"max_wait": round(self.max_wait, 3),
+		}
+
+
+class RateLimiterRegistry:
+	def __init__(self) -> None:
+		self._limiters: Dict[Tuple[str, str], ModelRateLimiter] = {}
+
+	@staticmethod
+	def _limits(provider: str, model: str) -> Tuple[float, float]:
+		settings = get_settings()
+		rpm, tpm = (settings.openai_rpm, settings.openai_tpm) if provider == "openai" else (settings.ollama_rpm, settings.ollama_tpm)
+		# Переопределения по моделям уже разобраны и проверены в настройках
+		custom = settings.llm_rate_limits.get(f"{provider}:{model}", {})
+		return custom.get("rpm", rpm), custom.get("tpm", tpm)
+
+	def get(self, provider: str, model: str) -> ModelRateLimiter:
+		limiter = self._limiters.get((provider, model))
+		if limiter is None:
+			rpm, tpm = self._limits(provider, model)
+			limiter = self._limiters[(provider, model)] = ModelRateLimiter(provider, model, rpm, tpm)
+		return limiter
+
+	def stats(self) -> List[Dict[str, Any]]:
+		return [limiter.stats() for limiter in self._limiters.values()]
+
+
+_registry = RateLimiterRegistry()
+
+
+def get_rate_limiters() -> RateLimiterRegistry:
+	return _registry
@@ -0,0 +1,158 @@
+import asyncio
+import email.utils
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Tuple
+import httpx
+from tenacity import RetryCallState
+
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+	"""Бэкенд временно исключён автоматом: запрос отклонён без обращения к сети"""
+
+
+def is_retryable(exc: BaseException) -> bool:
+	"""Повторять имеет смысл только временные сбои: таймауты, сеть, 429 и 5xx.
+
+	400/401/404, ошибки разбора ответа и открытый автомат повтором не исправить.
+	"""
+	if isinstance(exc, httpx.HTTPStatusError):
+		return exc.response.status_code in RETRYABLE_STATUSES
+	return isinstance(exc, (httpx.TimeoutException, httpx.TransportError))
+
+
+def retry_after_seconds(exc: BaseException | None) -> float | None:
+	"""Значение заголовка Retry-After (секунды или HTTP-дата)"""
+	if not isinstance(exc, httpx.HTTPStatusError):
+		return None
+	value = exc.response.headers.get("retry-after")
+	if not value:
+		return None
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		pass
+	try:
+		when = email.utils.parsedate_to_datetime(value)
+	except (TypeError, ValueError):
+		return None
+	return max(0.0, when.timestamp() - time.time())
+
+
+class wait_retry_after:
+	"""Стратегия ожидания tenacity: Retry-After сервера, если он есть, иначе базовая стратегия"""
+
+	def __init__(self, fallback: Callable[[RetryCallState], float], max_wait: float) -> None:
+		self.fallback = fallback
+		self.max_wait = max_wait
+
+	def __call__(self, retry_state: RetryCallState) -> float:
+		base = self.fallback(retry_state)
+		outcome = retry_state.outcome
+		server = retry_after_seconds(outcome.exception() if outcome is not None else None)
+		if server is None:
+			return base
+		return min(max(server, base), self.max_wait)
+
+
+class CircuitBreaker:
+	"""Автомат бэкенда: после N сбоев подряд запросы отклоняются сразу, через reset_timeout — один пробный"""
+
+	def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+		self.failure_threshold = max(1, failure_threshold)
+		self.reset_timeout = reset_timeout
+		self.failures = 0
+		self.opened_at: float | None = None
+		self.trial_in_flight = False
+
+	@property
+	def state(self) -> str:
+		if self.opened_at is None:
+			return "closed"
+		if time.monotonic() - self.opened_at >= self.reset_timeout:
+			return "half_open"
+		return "open"
+
+	def acquire(self) -> None:
+		state = self.state
+		if state == "open" or (state == "half_open" and self.trial_in_flight):
+			raise CircuitOpenError("Бэкенд временно недоступен (circuit breaker open)")
+		if state == "half_open":
+			self.trial_in_flight = True
+
+	def record_success(self) -> None:
+		self.failures = 0
+		self.opened_at = None
+		self.trial_in_flight = False
+
+	def release(self) -> None:
+		"""Вызов прерван (отмена) — пробная попытка освобождается, не считаясь ни успехом, ни сбоем"""
+		self.trial_in_flight = False
+
+	def record_failure(self) -> None:
+		self.failures += 1
+		self.trial_in_flight = False
+		if self.opened_at is not None or self.failures >= self.failure_threshold:
+			# Неудачная пробная попытка снова открывает автомат на полный срок
+			self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+	"""Скользящее окно задержек успешных вызовов по провайдеру и модели — для порога хеджирования"""
+
+	def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+		self.window = window
+		self.min_samples = min_samples
+		self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+	def record(self, provider: str, model: str, elapsed: float) -> None:
+		samples = self._samples.get((provider, model))
+		if samples is None:
+			samples = self._samples[(provider, model)] = deque(maxlen=self.window)
+		samples.append(elapsed)
+
+	def quantile(self, provider: str, model: str, q: float = 0.95) -> float | None:
+		samples = self._samples.get((provider, model))
+		if not samples or len(samples) < self.min_samples:
+			return None
+		ordered = sorted(samples)
+		return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def hedged(primary: Callable[[], Awaitable[Any]], backup: Callable[[], Awaitable[Any]], delay: float) -> Tuple[Any, str]:
+	"""Запускает primary; если за delay секунд ответа нет — параллельно backup.
+
+	Возвращает первый успешный результат и какой вызов победил ("primary"/"hedge");
+	проигравший вызов отменяется. Ошибка возвращается, только если упали оба.
+	"""
+	first = asyncio.ensure_future(primary())
+	pending = {first}
+	try:
+		done, pending = await asyncio.wait(pending, timeout=delay)
+		if done:
+			return first.result(), "primary"
+		second = asyncio.ensure_future(backup())
+		names = {first: "primary", second: "hedge"}
+		pending = {first, second}
+		error: BaseException | None = None
+		while pending:
+			done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+			for task in done:
+				if task.exception() is None:
+					return task.result(), names[task]
+				error = error or task.exception()
+		assert error is not None
+		raise error
+	finally:
+		for task in pending:
+			task.cancel()
+
+
+_latency = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+	return _latency
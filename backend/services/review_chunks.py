@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import json
+import re
+from typing import Dict, List, Tuple
+from backend.services.ai import AIClient
+from backend.services.concurrency import provider_limiter
+from backend.services.config import get_settings
+from backend.services.llm_cache import LLMCache
+from backend.services.schemas import ReviewSuggestion, ReviewTestResponse
+from backend.services.test_analyzer import split_units
+
+
+# Общая часть, в которой есть что-то кроме импортов (хуки, фикстуры, хелперы), проверяется отдельным фрагментом
+_IMPORT_LINE = re.compile(r"^\s*(?:import\b|from\s+\S+\s+import\b|const\s*\{[^}]*\}\s*=\s*require\(|$|//|#)")
+
+
+def _needs_review(preamble: str) -> bool:
+	return any(not _IMPORT_LINE.match(line) for line in preamble.splitlines())
+
+
+def chunk_key(provider: str, model: str | None, text: str) -> str:
+	"""Ключ ревью теста: только его текст и модель — правка общей части файла не сбрасывает кэш"""
+	raw = json.dumps({"provider": provider, "model": model, "text": text}, ensure_ascii=False, sort_keys=True)
+	return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _normalize(text: str) -> str:
+	return " ".join(text.lower().split())
+
+
+def merge_reviews(results: List[Tuple[int, str, ReviewTestResponse]], failed: int = 0) -> ReviewTestResponse:
+	"""Объединяет ревью фрагментов: номера строк — в координатах файла, повторы убираются,
+	оценка — среднее по фрагментам, взвешенное по числу строк."""
+	suggestions: List[ReviewSuggestion] = []
+	seen: set[tuple] = set()
+	weighted = 0.0
+	weight = 0
+	summaries: List[Tuple[int, str]] = []
+	for start, text, review in sorted(results, key=lambda r: r[0]):
+		size = max(1, len(text.splitlines()))
+		weighted += review.score * size
+		weight += size
+		if review.summary.strip():
+			summaries.append((review.score, review.summary.strip()))
+		for suggestion in review.suggestions:
+			line = suggestion.line
+			absolute = start + line - 1 if line is not None and 1 <= line <= size else None
+			key = (_normalize(suggestion.title), absolute) if absolute is not None else (_normalize(suggestion.title), _normalize(suggestion.comment))
+			if key in seen:
+				continue
+			seen.add(key)
+			suggestions.append(suggestion.model_copy(update={"line": absolute}))
+	score = round(weighted / weight) if weight else 0
+	# Сначала замечания по худшим фрагментам; одинаковые формулировки не повторяются
+	distinct: Dict[str, None] = {}
+	for _, summary in sorted(summaries, key=lambda s: s[0]):
+		distinct.setdefault(summary, None)
+	head = f"Проверено фрагментов: {len(results)}" + (f", не удалось проверить: {failed}" if failed else "") + "."
+	return ReviewTestResponse(
+		summary=" ".join([head, *list(distinct)[:5]]),
+		score=score,
+		suggestions=suggestions,
+		source="ai",
+	)
+
+
+_chunk_cache: LLMCache | None = None
+
+
+def get_review_chunk_cache() -> LLMCache:
+	"""Кэш готовых ревью тестов; в отличие от кэша ответов ИИ не зависит от промпта и LLM_CACHE_ENABLED"""
+	global _chunk_cache
+	if _chunk_cache is None:
+		settings = get_settings()
+		_chunk_cache = LLMCache(
+			path=settings.review_chunk_cache_path or None,
+			memory_entries=settings.llm_cache_memory_entries,
+			max_entries=settings.llm_cache_max_entries,
+			ttl=settings.llm_cache_ttl,
+		)
+	return _chunk_cache
+
+
+async def review_chunked(ai: AIClient, code: str, language: str | None = None) -> ReviewTestResponse:
+	"""Ревью большого файла по тестам: каждый тест — отдельный запрос, параллельно с лимитом провайдера"""
+	preamble, units = split_units(code, language)
+	if preamble and _needs_review(preamble):
+		units = [(1, preamble), *units]
+
+	cache = get_review_chunk_cache()
+
+	async def one(start: int, text: str) -> Tuple[int, str, ReviewTestResponse]:
+		key = chunk_key(ai.provider, ai.model, text)
+		if not ai.refresh_cache:
+			cached = await cache.get(key)
+			if cached is not None:
+				try:
+					return start, text, ReviewTestResponse.model_validate_json(cached)
+				except ValueError:
+					await cache.delete(key)
+		async with provider_limiter(ai.provider):
+			context = "" if start == 1 and text == preamble else preamble
+			review = await ai.review_test_unit(context, text)
+		await cache.set(key, review.model_dump_json())
+		return start, text, review
+
+	outcomes = await asyncio.gather(*(one(start, text) for start, text in units), return_exceptions=True)
+	results = [o for o in outcomes if not isinstance(o, BaseException)]
+	errors = [o for o in outcomes if isinstance(o, BaseException)]
+	if not results:
+		raise errors[0]
+	return merge_reviews(results, failed=len(errors))
@@ -8,6 +8,8 @@ class GenerateTestCasesRequest(BaseModel):
 	format: Optional[Literal["json", "markdown"]] = Field(default="json", description="Формат результата")
 	ai_provider: Optional[str] = Field(default=None, description="Провайдер ИИ: openai или ollama (если не указан, используется из env)")
 	ai_model: Optional[str] = Field(default=None, description="Модель ИИ (если не указана, используется из env)")
+	no_cache: bool = Field(default=False, description="Не использовать кэш ответов ИИ")
+	refresh_cache: bool = Field(default=False, description="Игнорировать кэш и перезаписать его свежим ответом")
 
 
 class TestCase(BaseModel):
@@ -22,7 +24,7 @@ class GenerateTestCasesResponse(BaseModel):
 
 
 class GenerateTestCodeRequest(BaseModel):
-	test_case: TestCase
+	test_case: Optional[TestCase] = Field(default=None, description="Тест-кейс (не нужен, если указан template)")
 	language: Optional[str] = Field(default="ts", description="ts, js или python")
 	base_url: Optional[str] = Field(default=None, description="Базовый URL приложения")
 	target_path: Optional[str] = Field(default=None, description="Куда сохранить файл (опц.)")
@@ -30,6 +32,9 @@ class GenerateTestCodeRequest(BaseModel):
 	ai_model: Optional[str] = Field(default=None, description="Модель ИИ (если не указана, используется из env)")
 	template: Optional[str] = Field(default=None, description="Имя шаблона (auth, form, list, crud)")
 	template_params: Optional[Dict[str, Any]] = Field(default=None, description="Параметры шаблона")
+	generation_mode: Optional[Literal["auto", "ai", "rules"]] = Field(default="auto", description="auto — шаблоны компилируются без ИИ, остальное через ИИ; ai — всегда ИИ; rules — только компилятор шаблонов")
+	no_cache: bool = Field(default=False, description="Не использовать кэш ответов ИИ")
+	refresh_cache: bool = Field(default=False, description="Игнорировать кэш и перезаписать его свежим ответом")
 
 
 class GenerateTestCodeResponse(BaseModel):
@@ -37,20 +42,60 @@ class GenerateTestCodeResponse(BaseModel):
 	suggested_filename: Optional[str] = None
 
 
+class GenerateTestCodeBatchRequest(BaseModel):
+	test_cases: Optional[List[TestCase]] = Field(default=None, description="Список тест-кейсов")
+	template: Optional[str] = Field(default=None, description="Имя шаблона (auth, form, list, crud) вместо test_cases")
+	template_params: Optional[Dict[str, Any]] = Field(default=None, description="Общие параметры шаблона")
+	template_matrix: Optional[List[Dict[str, Any]]] = Field(default=None, description="Наборы параметров шаблона: по одному тест-кейсу на элемент")
+	generation_mode: Optional[Literal["auto", "ai", "rules"]] = Field(default="auto", description="auto — шаблоны компилируются без ИИ, остальное через ИИ; ai — всегда ИИ; rules — только компилятор шаблонов")
+	language: Optional[str] = Field(default="ts", description="ts, js или python")
+	base_url: Optional[str] = Field(default=None, description="Базовый URL приложения")
+	target_dir: Optional[str] = Field(default=None, description="Папка для сохранения файлов (опц.)")
+	pack_size: Optional[int] = Field(default=None, ge=1, description="Сколько тест-кейсов отправлять в одном запросе к ИИ (по умолчанию CODEGEN_PACK_SIZE)")
+	stream: bool = Field(default=False, description="Отдавать результаты потоком (SSE) по мере готовности")
+	ai_provider: Optional[str] = Field(default=None, description="Провайдер ИИ: openai или ollama (если не указан, используется из env)")
+	ai_model: Optional[str] = Field(default=None, description="Модель ИИ (если не указана, используется из env)")
+	no_cache: bool = Field(default=False, description="Не использовать кэш ответов ИИ")
+	refresh_cache: bool = Field(default=False, description="Игнорировать кэш и перезаписать его свежим ответом")
+
+
+class GenerateTestCodeBatchItem(BaseModel):
+	index: int
+	title: str
+	code: Optional[str] = None
+	suggested_filename: Optional[str] = None
+	path: Optional[str] = None
+	error: Optional[str] = None
+
+
+class GenerateTestCodeBatchResponse(BaseModel):
+	items: List[GenerateTestCodeBatchItem]
+	succeeded: int
+	failed: int
+
+
 class ReviewTestRequest(BaseModel):
 	code: str
+	mode: Literal["local", "ai", "chunked"] = Field(default="local", description="local — локальный анализатор без ИИ; ai — ревью всего файла через ИИ; chunked — ИИ по каждому тесту отдельно, параллельно")
+	escalate: bool = Field(default=False, description="В режиме local дополнительно отправить в ИИ только фрагменты с найденными проблемами")
+	language: Optional[str] = Field(default=None, description="ts, js или python (по умолчанию определяется по коду)")
+	no_cache: bool = Field(default=False, description="Не использовать кэш ответов ИИ")
+	refresh_cache: bool = Field(default=False, description="Игнорировать кэш и перезаписать его свежим ответом")
 
 
 class ReviewSuggestion(BaseModel):
 	title: str
 	comment: str
 	diff: Optional[str] = None
+	line: Optional[int] = Field(default=None, description="Строка, к которой относится замечание")
+	rule: Optional[str] = Field(default=None, description="Правило локального анализатора")
 
 
 class ReviewTestResponse(BaseModel):
 	summary: str
 	score: int = Field(ge=0, le=100)
 	suggestions: List[ReviewSuggestion]
+	source: Optional[str] = Field(default=None, description="local, ai или local+ai")
 
 
 class SaveLocalRequest(BaseModel):
@@ -77,3 +122,45 @@ class SaveGithubResponse(BaseModel):
 	html_url: Optional[str] = None
 
 
+class SaveGithubFile(BaseModel):
+	path: str
+	content: str
+
+
+class SaveGithubBulkRequest(BaseModel):
+	owner: str
+	repo: str
+	files: List[SaveGithubFile] = Field(..., min_length=1)
+	message: Optional[str] = None
+	branch: Optional[str] = None
+
+
+class SaveGithubBulkFile(BaseModel):
+	path: str
+	sha: str
+
+
+class SaveGithubBulkResponse(BaseModel):
+	commit_sha: str
+	tree_sha: str
+	html_url: Optional[str] = None
+	files: List[SaveGithubBulkFile]
+
+
+class JobSubmitRequest(BaseModel):
+	kind: str = Field(..., description="Тип задачи: generate_test_cases, generate_test_code, generate_test_code_batch, review_test, run_tests, git_push, generate_demo_app")
+	payload: Dict[str, Any] = Field(default_factory=dict, description="Тело запроса соответствующего эндпоинта")
+	priority: int = Field(default=0, description="Чем больше, тем раньше задача будет выполнена")
+
+
+class JobStatusResponse(BaseModel):
+	id: str
+	kind: str
+	status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+	priority: int
+	error: Optional[str] = None
+	result: Optional[Any] = None
+	attempts: int = 0
+	created_at: float
+	started_at: Optional[float] = None
+	finished_at: Optional[float] = None
@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+from weakref import WeakKeyDictionary
+
+
+class SingleFlight:
+	"""Объединение одинаковых одновременных вызовов: первый выполняет запрос, остальные ждут его результат.
+
+	Запрос выполняется отдельной задачей, поэтому отмена одного из ожидающих не прерывает остальных;
+	когда отменяются все ожидающие, отменяется и сам запрос (он больше никому не нужен, а держит лимиты провайдера).
+	"""
+
+	def __init__(self) -> None:
+		self._inflight: "WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = WeakKeyDictionary()
+		self._waiters: Dict[asyncio.Future, int] = {}
+		self.counters: Dict[str, int] = {"calls": 0, "upstream": 0, "coalesced": 0, "abandoned": 0}
+
+	def in_flight(self) -> int:
+		return sum(len(tasks) for tasks in self._inflight.values())
+
+	async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+		self.counters["calls"] += 1
+		tasks = self._inflight.setdefault(asyncio.get_running_loop(), {})
+		task = tasks.get(key)
+		if task is not None:
+			self.counters["coalesced"] += 1
+		else:
+			self.counters["upstream"] += 1
+			task = asyncio.ensure_future(fn())
+			tasks[key] = task
+
+			def _done(t: asyncio.Task) -> None:
+				if tasks.get(key) is t:
+					del tasks[key]
+				self._waiters.pop(t, None)
+				# Ошибку получат ожидающие; помечаем её прочитанной, если ждать уже некому
+				if not t.cancelled():
+					t.exception()
+
+			task.add_done_callback(_done)
+		self._waiters[task] = self._waiters.get(task, 0) + 1
+		try:
+			return await asyncio.shield(task)
+		except asyncio.CancelledError:
+			if not task.done():
+				self._waiters[task] -= 1
+				if self._waiters[task] <= 0:
+					# Ушёл последний ожидающий: новые вызовы с тем же ключом начнут свой запрос
+					if tasks.get(key) is task:
+						del tasks[key]
+					self.counters["abandoned"] += 1
+					task.cancel()
+			raise
+
+	def stats(self) -> Dict[str, int]:
+		return {**self.counters, "in_flight": self.in_flight()}
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+	return _single_flight
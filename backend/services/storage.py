@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from backend.services.config import get_settings
+from backend.services.change_tracker import get_change_tracker
 
 
 class LocalStorage:
@@ -16,6 +17,7 @@ class LocalStorage:
 			raise ValueError("Path traversal detected")
 		full_path.parent.mkdir(parents=True, exist_ok=True)
 		full_path.write_text(content, encoding="utf-8", newline="\n")
+		get_change_tracker().record(full_path)
 		return str(full_path)
 
 
@@ -0,0 +1,282 @@
+import re
+from typing import Any, Callable, Dict, List, Tuple
+from backend.services.templates import get_template
+
+
+# Шаг теста: (действие, аргументы...). Действия описывают только стабильные локаторы —
+# getByTestId / getByRole / getByLabel / getByText, как требуют промпты в ai.py.
+Action = Tuple[Any, ...]
+
+LOGIN_BUTTON = ["Войти", "Login"]
+EMAIL_LABEL = ["Email", "E-mail"]
+PASSWORD_LABEL = ["Пароль", "Password"]
+SAVE_BUTTON = ["Сохранить", "Save"]
+
+
+def _auth_actions(params: Dict[str, Any]) -> List[Action]:
+	login_url = params.get("login_url", "/login")
+	email = params.get("email", "user@example.com")
+	password = params.get("password", "Passw0rd!")
+	success_url = params.get("success_url", "/dashboard")
+	kind = params.get("type")
+	actions: List[Action] = [("goto", login_url)]
+	if kind == "positive":
+		actions += [
+			("fill_label", EMAIL_LABEL, email),
+			("fill_label", PASSWORD_LABEL, password),
+			("click_button", LOGIN_BUTTON),
+			("expect_url", success_url),
+		]
+	elif kind == "negative_password":
+		actions += [
+			("fill_label", EMAIL_LABEL, email),
+			("fill_label", PASSWORD_LABEL, "wrongpassword"),
+			("click_button", LOGIN_BUTTON),
+			("expect_text", ["Неверные учетные данные", "Invalid credentials"]),
+			("expect_url", login_url),
+		]
+	elif kind == "negative_validation":
+		actions += [
+			("click_button", LOGIN_BUTTON),
+			("expect_text", ["Email обязателен", "Email is required"]),
+			("expect_text", ["Пароль обязателен", "Password is required"]),
+		]
+	else:
+		actions += [
+			("fill_label", EMAIL_LABEL, "invalid-email"),
+			("fill_label", PASSWORD_LABEL, password),
+			("click_button", LOGIN_BUTTON),
+			("expect_text", ["Неверный формат email", "Invalid email format"]),
+		]
+	return actions
+
+
+def _form_actions(params: Dict[str, Any]) -> List[Action]:
+	form_url = params.get("form_url", "/form")
+	fields = params.get("fields", [])
+	submit_button = params.get("submit_button", "Отправить")
+	actions: List[Action] = [("goto", form_url)]
+	if params.get("type") == "positive":
+		for field in fields:
+			actions.append(("fill_label", field.get("name", "поле"), str(field.get("value", "тестовое значение"))))
+		actions += [
+			("click_button", [submit_button]),
+			("expect_text", ["успешно", "Успешно", "success", "Success"]),
+		]
+		return actions
+	required_fields = [f for f in fields if f.get("required", False)]
+	if required_fields:
+		actions.append(("fill_label", required_fields[0]["name"], ""))
+	actions += [
+		("click_button", [submit_button]),
+		("expect_text", ["обязательн", "Обязательн", "required", "Required"]),
+	]
+	return actions
+
+
+def _list_actions(params: Dict[str, Any]) -> List[Action]:
+	list_url = params.get("list_url", "/list")
+	kind = params.get("type")
+	actions: List[Action] = [("goto", list_url)]
+	if kind == "display":
+		actions.append(("expect_count", "listitem", int(params.get("item_count", 10))))
+	elif kind == "filter":
+		value = str(params.get("filter_value", "test"))
+		actions += [
+			("fill", "filter-input", value),
+			("expect_first_contains", "listitem", value),
+		]
+	elif kind == "pagination":
+		actions += [
+			("expect_visible_role", "listitem"),
+			("click_button", ["Следующая страница", "Next"]),
+			("expect_visible_role", "listitem"),
+		]
+	else:
+		actions += [
+			("click_role_first", "columnheader"),
+			("expect_attr_first", "columnheader", "aria-sort", ["ascending", "descending"]),
+		]
+	return actions
+
+
+def _crud_actions(params: Dict[str, Any]) -> List[Action]:
+	entity = params.get("entity_name", "элемент")
+	base_url = params.get("base_url", "/items")
+	op = params.get("type", "create")
+	actions: List[Action] = [("goto", base_url)]
+	if op == "create":
+		name = f"Тестовый {entity}"
+		actions += [
+			("click_button", ["Создать", "Add"]),
+			("fill", "name-input", name),
+			("click_button", SAVE_BUTTON),
+			("expect_text", [name]),
+		]
+	elif op == "read":
+		actions += [
+			("click_role_first", "listitem"),
+			("expect_url", base_url.rstrip("/") + "/"),
+		]
+	elif op == "update":
+		name = f"Обновлённый {entity}"
+		actions += [
+			("click_role_first", "listitem"),
+			("click_button", ["Редактировать", "Edit"]),
+			("fill", "name-input", name),
+			("click_button", SAVE_BUTTON),
+			("expect_text", [name]),
+		]
+	else:
+		actions += [
+			("count", "listitem"),
+			("click_button_first", ["Удалить", "Delete"]),
+			("click_button", ["Подтвердить", "Confirm", "OK", "Да"]),
+			("expect_count_decreased", "listitem"),
+		]
+	return actions
+
+
+RULES: Dict[str, Callable[[Dict[str, Any]], List[Action]]] = {
+	"auth": _auth_actions,
+	"form": _form_actions,
+	"list": _list_actions,
+	"crud": _crud_actions,
+}
+
+
+def _js_str(value: str) -> str:
+	return "'" + value.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n") + "'"
+
+
+def _escape(text: str) -> str:
+	"""Экранирует спецсимволы регулярных выражений, общие для JS и Python"""
+	return re.sub(r"([.^$*+?()\[\]{}|\\/])", r"\\\1", text)
+
+
+def _alternatives(options: List[str]) -> str:
+	return "|".join(_escape(o) for o in options)
+
+
+def _js_regex(pattern: str) -> str:
+	return "/" + pattern + "/"
+
+
+def _py_regex(pattern: str) -> str:
+	return f"re.compile({pattern!r})"
+
+
+def _url(base_url: str | None, path: str) -> str:
+	if base_url and not path.startswith(("http://", "https://")):
+		return base_url.rstrip("/") + "/" + path.lstrip("/")
+	return path
+
+
+class TemplateCompiler:
+	"""Детерминированная генерация кода Playwright из шаблонов без обращения к LLM"""
+
+	@staticmethod
+	def supports(template_name: str | None) -> bool:
+		return bool(template_name) and template_name in RULES
+
+	def compile(self, template_name: str, params: Dict[str, Any], language: str, base_url: str | None = None) -> str:
+		template = get_template(template_name)
+		if template is None or template_name not in RULES:
+			raise ValueError(f"Шаблон '{template_name}' не поддерживается компилятором")
+		title = template.generate_test_case(params).title
+		actions = RULES[template_name](params)
+		if language == "python":
+			return self._render_python(title, actions, base_url)
+		return self._render_js(title, actions, base_url, typescript=(language == "ts"))
+
+	def _render_js(self, title: str, actions: List[Action], base_url: str | None, typescript: bool) -> str:
+		header = (
+			"import { test, expect } from '@playwright/test';"
+			if typescript
+			else "const { test, expect } = require('@playwright/test');"
+		)
+		lines = [header, "", f"test({_js_str(title)}, async ({{ page }}) => {{"]
+		for action in actions:
+			op, args = action[0], action[1:]
+			if op == "goto":
+				lines.append(f"  await page.goto({_js_str(_url(base_url, args[0]))});")
+			elif op == "fill":
+				lines.append(f"  await page.getByTestId({_js_str(args[0])}).fill({_js_str(args[1])});")
+			elif op == "fill_label":
+				label = _js_regex(_alternatives(args[0])) if isinstance(args[0], list) else _js_str(args[0])
+				lines.append(f"  await page.getByLabel({label}).fill({_js_str(args[1])});")
+			elif op == "click_button":
+				lines.append(f"  await page.getByRole('button', {{ name: {_js_regex(_alternatives(args[0]))} }}).click();")
+			elif op == "click_button_first":
+				lines.append(f"  await page.getByRole('button', {{ name: {_js_regex(_alternatives(args[0]))} }}).first().click();")
+			elif op == "click_role_first":
+				lines.append(f"  await page.getByRole({_js_str(args[0])}).first().click();")
+			elif op == "expect_url":
+				lines.append(f"  await expect(page).toHaveURL({_js_regex(_escape(args[0]))});")
+			elif op == "expect_text":
+				lines.append(f"  await expect(page.getByText({_js_regex(_alternatives(args[0]))}).first()).toBeVisible();")
+			elif op == "expect_count":
+				lines.append(f"  await expect(page.getByRole({_js_str(args[0])})).toHaveCount({int(args[1])});")
+			elif op == "expect_visible_role":
+				lines.append(f"  await expect(page.getByRole({_js_str(args[0])}).first()).toBeVisible();")
+			elif op == "expect_first_contains":
+				lines.append(f"  await expect(page.getByRole({_js_str(args[0])}).first()).toContainText({_js_str(args[1])});")
+			elif op == "expect_attr_first":
+				lines.append(
+					f"  await expect(page.getByRole({_js_str(args[0])}).first())"
+					f".toHaveAttribute({_js_str(args[1])}, {_js_regex(_alternatives(args[2]))});"
+				)
+			elif op == "count":
+				lines.append(f"  await expect(page.getByRole({_js_str(args[0])}).first()).toBeVisible();")
+				lines.append(f"  const countBefore = await page.getByRole({_js_str(args[0])}).count();")
+			elif op == "expect_count_decreased":
+				lines.append(f"  await expect(page.getByRole({_js_str(args[0])})).toHaveCount(countBefore - 1);")
+		lines.append("});")
+		return "\n".join(lines) + "\n"
+
+	def _render_python(self, title: str, actions: List[Action], base_url: str | None) -> str:
+		name = re.sub(r"\W+", "_", title.lower()).strip("_") or "generated"
+		lines = [
+			"import re",
+			"from playwright.sync_api import Page, expect",
+			"",
+			"",
+			f"def test_{name}(page: Page):",
+			f"    \"\"\"{title}\"\"\"",
+		]
+		for action in actions:
+			op, args = action[0], action[1:]
+			if op == "goto":
+				lines.append(f"    page.goto({_url(base_url, args[0])!r})")
+			elif op == "fill":
+				lines.append(f"    page.get_by_test_id({args[0]!r}).fill({args[1]!r})")
+			elif op == "fill_label":
+				label = _py_regex(_alternatives(args[0])) if isinstance(args[0], list) else repr(args[0])
+				lines.append(f"    page.get_by_label({label}).fill({args[1]!r})")
+			elif op == "click_button":
+				lines.append(f"    page.get_by_role(\"button\", name={_py_regex(_alternatives(args[0]))}).click()")
+			elif op == "click_button_first":
+				lines.append(f"    page.get_by_role(\"button\", name={_py_regex(_alternatives(args[0]))}).first.click()")
+			elif op == "click_role_first":
+				lines.append(f"    page.get_by_role({args[0]!r}).first.click()")
+			elif op == "expect_url":
+				lines.append(f"    expect(page).to_have_url({_py_regex(_escape(args[0]))})")
+			elif op == "expect_text":
+				lines.append(f"    expect(page.get_by_text({_py_regex(_alternatives(args[0]))}).first).to_be_visible()")
+			elif op == "expect_count":
+				lines.append(f"    expect(page.get_by_role({args[0]!r})).to_have_count({int(args[1])})")
+			elif op == "expect_visible_role":
+				lines.append(f"    expect(page.get_by_role({args[0]!r}).first).to_be_visible()")
+			elif op == "expect_first_contains":
+				lines.append(f"    expect(page.get_by_role({args[0]!r}).first).to_contain_text({args[1]!r})")
+			elif op == "expect_attr_first":
+				lines.append(
+					f"    expect(page.get_by_role({args[0]!r}).first)"
+					f".to_have_attribute({args[1]!r}, {_py_regex(_alternatives(args[2]))})"
+				)
+			elif op == "count":
+				lines.append(f"    expect(page.get_by_role({args[0]!r}).first).to_be_visible()")
+				lines.append(f"    count_before = page.get_by_role({args[0]!r}).count()")
+			elif op == "expect_count_decreased":
+				lines.append(f"    expect(page.get_by_role({args[0]!r})).to_have_count(count_before - 1)")
+		return "\n".join(lines) + "\n"
@@ -0,0 +1,191 @@
+import re
+from typing import Dict, List, Tuple
+from backend.services.schemas import ReviewSuggestion, ReviewTestResponse
+
+
+# Действия и проверки Playwright, которые возвращают Promise и без await не дожидаются результата
+ASYNC_ACTIONS = (
+	"goto|click|dblclick|fill|type|press|pressSequentially|check|uncheck|selectOption|hover|focus|tap|"
+	"setInputFiles|dragTo|waitForURL|waitForLoadState|waitForSelector|waitForResponse|waitForRequest|reload|goBack|goForward"
+)
+WEB_FIRST_MATCHERS = (
+	"toBeVisible|toBeHidden|toBeEnabled|toBeDisabled|toBeChecked|toBeEditable|toBeFocused|toBeAttached|toBeEmpty|"
+	"toHaveText|toContainText|toHaveValue|toHaveValues|toHaveURL|toHaveTitle|toHaveCount|toHaveAttribute|toHaveClass|toHaveCSS|toHaveId"
+)
+
+# Цепочка вызовов от переменной (page.getByRole(...).click(...)); строки с const/let/return не проверяются
+_JS_ACTION = re.compile(rf"^\s*[\w$]+(?:\.[\w$]+|\([^;]*?\))*\.({ASYNC_ACTIONS})\(")
+_JS_EXPECT = re.compile(rf"^\s*expect\((?!await ).*\)\s*(?:\.not)?\s*\.({WEB_FIRST_MATCHERS})\(")
+_CSS_LOCATOR = re.compile(r"""(?:\.locator|\.\$\$?|\.query_selector(?:_all)?|\.querySelector(?:All)?|\.waitForSelector|\.wait_for_selector)\(\s*(['"`])(.+?)\1""")
+_SLEEP = re.compile(r"\b(?:waitForTimeout|wait_for_timeout)\s*\(|\btime\.sleep\s*\(|\bsetTimeout\s*\(")
+_NON_RETRYING = re.compile(
+	r"(?:expect\(\s*await\b.*\.(?:isVisible|isHidden|isEnabled|isChecked|textContent|innerText|inputValue|getAttribute|count)\(\)"
+	r"|\bassert\b.*\.(?:is_visible|is_hidden|is_enabled|is_checked|text_content|inner_text|input_value|get_attribute|count)\(\))"
+)
+_FOCUSED = re.compile(r"\b(?:test|describe)\.only\s*\(|\btest\.describe\.only\s*\(")
+_ABSOLUTE_GOTO = re.compile(r"""\.goto\(\s*(['"`])https?://""")
+_JS_TEST = re.compile(r"""^\s*(?:test|it)(?:\.only|\.skip)?\s*\(\s*['"`]""")
+_PY_TEST = re.compile(r"^\s*(?:async\s+)?def\s+test_\w*\s*\(")
+
+# Штраф к оценке за одно срабатывание правила; больше трёх срабатываний одного правила не учитываются
+PENALTIES = {
+	"missing_await": 15,
+	"no_assertion": 15,
+	"sleep": 10,
+	"non_retrying_assertion": 8,
+	"focused_test": 10,
+	"css_xpath_locator": 6,
+	"absolute_url": 3,
+}
+
+TITLES = {
+	"missing_await": "Нет await перед действием или проверкой",
+	"no_assertion": "Тест без проверок",
+	"sleep": "Фиксированная пауза вместо ожидания",
+	"non_retrying_assertion": "Проверка без автоповтора",
+	"focused_test": "Оставлен .only",
+	"css_xpath_locator": "CSS/XPath-локатор",
+	"absolute_url": "Абсолютный URL в goto",
+}
+
+COMMENTS = {
+	"missing_await": "Без await действие выполняется параллельно со следующими шагами, а проверка может не выполниться до конца теста.",
+	"no_assertion": "Тест ничего не проверяет: добавьте expect для ожидаемого результата.",
+	"sleep": "Фиксированная пауза замедляет тест и не гарантирует готовность страницы; ждите конкретное состояние через expect(locator) или waitForURL.",
+	"non_retrying_assertion": "Значение читается один раз и не перепроверяется; используйте web-first проверку, например expect(locator).toBeVisible() / to_be_visible().",
+	"focused_test": "С .only остальные тесты файла не запускаются.",
+	"css_xpath_locator": "CSS/XPath-селекторы ломаются при изменении вёрстки; используйте getByTestId, getByRole, getByLabel или getByText.",
+	"absolute_url": "Адрес стенда зашит в тест; используйте относительный путь и baseURL из конфигурации Playwright.",
+}
+
+
+class Finding:
+	"""Срабатывание правила на строке кода (номер строки с 1)"""
+
+	__slots__ = ("rule", "line", "text", "diff")
+
+	def __init__(self, rule: str, line: int, text: str, diff: str | None = None) -> None:
+		self.rule = rule
+		self.line = line
+		self.text = text
+		self.diff = diff
+
+
+def detect_language(code: str) -> str:
+	"""python или ts/js (для анализа TypeScript и JavaScript не различаются)"""
+	if re.search(r"^\s*(?:from\s+playwright|import\s+pytest|def\s+test_)", code, re.M):
+		return "python"
+	return "ts"
+
+
+def _is_async_python(code: str) -> bool:
+	return "playwright.async_api" in code
+
+
+def _check_line(language: str, async_api: bool, number: int, line: str) -> List[Finding]:
+	findings: List[Finding] = []
+	stripped = line.strip()
+	if stripped.startswith(("//", "#", "*")):
+		return findings
+	if language != "python" or async_api:
+		if "await " not in line and not stripped.startswith(("return ", "const ", "let ", "var ")) and (_JS_ACTION.search(line) or _JS_EXPECT.search(line)):
+			findings.append(Finding("missing_await", number, stripped, f"- {stripped}\n+ await {stripped}"))
+	for match in _CSS_LOCATOR.finditer(line):
+		selector = match.group(2)
+		if not selector.startswith(("data-testid=", "[data-testid", "role=", "text=", "internal:")):
+			findings.append(Finding("css_xpath_locator", number, stripped))
+			break
+	if _SLEEP.search(line):
+		findings.append(Finding("sleep", number, stripped, f"- {stripped}"))
+	if _NON_RETRYING.search(line):
+		findings.append(Finding("non_retrying_assertion", number, stripped))
+	if _FOCUSED.search(line):
+		findings.append(Finding("focused_test", number, stripped, f"- {stripped}\n+ {stripped.replace('.only', '', 1)}"))
+	if _ABSOLUTE_GOTO.search(line):
+		findings.append(Finding("absolute_url", number, stripped))
+	return findings
+
+
+def _test_blocks(language: str, lines: List[str]) -> List[Tuple[int, int]]:
+	"""Границы тестов (номера строк с 1): от объявления теста до следующего теста или конца файла"""
+	pattern = _PY_TEST if language == "python" else _JS_TEST
+	starts = [i + 1 for i, line in enumerate(lines) if pattern.search(line)]
+	return [(start, (starts[k + 1] - 1) if k + 1 < len(starts) else len(lines)) for k, start in enumerate(starts)]
+
+
+def split_units(code: str, language: str | None = None) -> Tuple[str, List[Tuple[int, str]]]:
+	"""Общая часть файла до первого теста (импорты, хуки) и тесты по отдельности: (первая строка, текст)"""
+	language = language or detect_language(code)
+	lines = code.splitlines()
+	blocks = _test_blocks("python" if language == "python" else "ts", lines)
+	if not blocks:
+		return "", [(1, code)]
+	preamble = "\n".join(lines[: blocks[0][0] - 1])
+	return preamble, [(start, "\n".join(lines[start - 1:end])) for start, end in blocks]
+
+
+def analyze(code: str, language: str | None = None) -> List[Finding]:
+	"""Все срабатывания правил, по порядку строк"""
+	language = language or detect_language(code)
+	if language == "js":
+		language = "ts"
+	async_api = _is_async_python(code)
+	lines = code.splitlines()
+	findings: List[Finding] = []
+	for number, line in enumerate(lines, start=1):
+		findings.extend(_check_line(language, async_api, number, line))
+	assertion = re.compile(r"\bexpect\s*\(|\bassert\b" if language == "python" else r"\bexpect\s*\(")
+	for start, end in _test_blocks(language, lines):
+		if not any(assertion.search(line) for line in lines[start - 1:end]):
+			findings.append(Finding("no_assertion", start, lines[start - 1].strip()))
+	findings.sort(key=lambda f: f.line)
+	return findings
+
+
+def score(findings: List[Finding]) -> int:
+	counts: Dict[str, int] = {}
+	for finding in findings:
+		counts[finding.rule] = counts.get(finding.rule, 0) + 1
+	penalty = sum(PENALTIES.get(rule, 5) * min(count, 3) for rule, count in counts.items())
+	return max(0, 100 - penalty)
+
+
+def suggestions(findings: List[Finding]) -> List[ReviewSuggestion]:
+	"""Одно предложение на срабатывание, с номером строки"""
+	return [
+		ReviewSuggestion(
+			title=f"{TITLES.get(f.rule, f.rule)} (строка {f.line})",
+			comment=f"{COMMENTS.get(f.rule, '')} Строка: `{f.text}`",
+			diff=f.diff,
+			line=f.line,
+			rule=f.rule,
+		)
+		for f in findings
+	]
+
+
+def review_code(code: str, language: str | None = None) -> ReviewTestResponse:
+	"""Ревью без обращения к ИИ"""
+	findings = analyze(code, language)
+	if findings:
+		rules = sorted({TITLES.get(f.rule, f.rule).lower() for f in findings})
+		summary = f"Найдено проблем: {len(findings)} ({'; '.join(rules)})."
+	else:
+		summary = "Локальный анализ не нашёл типичных проблем."
+	return ReviewTestResponse(summary=summary, score=score(findings), suggestions=suggestions(findings), source="local")
+
+
+def flagged_regions(code: str, findings: List[Finding], context: int = 3) -> List[Tuple[int, int, str]]:
+	"""Фрагменты вокруг срабатываний (с context строками до и после), соседние объединяются.
+
+	Возвращает (первая строка, последняя строка, текст с номерами строк).
+	"""
+	lines = code.splitlines()
+	spans: List[List[int]] = []
+	for line in sorted({f.line for f in findings}):
+		start, end = max(1, line - context), min(len(lines), line + context)
+		if spans and start <= spans[-1][1] + 1:
+			spans[-1][1] = max(spans[-1][1], end)
+		else:
+			spans.append([start, end])
+	return [(start, end, "\n".join(f"{n:>4}| {lines[n - 1]}" for n in range(start, end + 1))) for start, end in spans]
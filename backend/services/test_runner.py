@@ -1,19 +1,62 @@
+import asyncio
+import json
 import subprocess
 import sys
 import os
+import shutil
+import signal
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
 from typing import Literal
+from backend.services.metrics import TEST_RUN_LATENCY
+
+
+# Сколько ждать завершения после SIGTERM, прежде чем убить группу процессов
+TERMINATE_GRACE = 5.0
+
+
+async def terminate_process(proc: asyncio.subprocess.Process) -> None:
+	"""SIGTERM всей группе (npx → node → браузеры), затем SIGKILL, если процессы не завершились.
+
+	Процесс должен быть запущен с start_new_session=True (на Windows завершается только сам процесс).
+	"""
+	if proc.returncode is not None:
+		return
+	try:
+		if os.name == "nt":
+			proc.terminate()
+		else:
+			os.killpg(proc.pid, signal.SIGTERM)
+	except ProcessLookupError:
+		return
+	try:
+		await asyncio.wait_for(proc.wait(), timeout=TERMINATE_GRACE)
+	except asyncio.TimeoutError:
+		try:
+			if os.name == "nt":
+				proc.kill()
+			else:
+				os.killpg(proc.pid, signal.SIGKILL)
+		except ProcessLookupError:
+			pass
+		await proc.wait()
 
 
 class TestRunner:
-	def run(self, kind: Literal["ts", "js", "python"] = "ts", cwd: str | None = None) -> dict:
+	@staticmethod
+	def command(kind: str = "ts", cwd: str | None = None) -> tuple[list[str], str]:
+		"""Команда обычного (не шардированного) прогона и рабочий каталог"""
 		if kind in ("ts", "js"):
-			cmd = ["npx", "playwright", "test"]
-			run_cwd = cwd or os.path.join("tests")
-		else:
-			cmd = [sys.executable, "-m", "pytest", "-q"]
-			run_cwd = cwd or os.path.join("python_tests")
+			return ["npx", "playwright", "test"], cwd or os.path.join("tests")
+		return [sys.executable, "-m", "pytest", "-q"], cwd or os.path.join("python_tests")
+
+	def run(self, kind: Literal["ts", "js", "python"] = "ts", cwd: str | None = None) -> dict:
+		cmd, run_cwd = self.command(kind, cwd)
 		try:
-			proc = subprocess.run(cmd, cwd=run_cwd, capture_output=True, text=True, check=False)
+			with TEST_RUN_LATENCY.time(kind=kind, mode="serial"):
+				proc = subprocess.run(cmd, cwd=run_cwd, capture_output=True, text=True, check=False)
 			return {
 				"returncode": proc.returncode,
 				"stdout": proc.stdout,
@@ -22,4 +65,199 @@ class TestRunner:
 		except Exception as exc:
 			return {"returncode": -1, "stdout": "", "stderr": str(exc)}
 
+	async def run_parallel(
+		self,
+		kind: Literal["ts", "js", "python"] = "ts",
+		cwd: str | None = None,
+		shards: int | None = None,
+		timeout: float | None = None,
+		shard_timeout: float | None = None,
+	) -> dict:
+		"""Параллельный прогон: тесты делятся на шарды, шарды запускаются одновременными подпроцессами.
+
+		Число одновременно работающих шардов ограничено количеством CPU. Результаты шардов
+		сводятся в один отчёт со статусом и длительностью каждого теста.
+		"""
+		started = time.perf_counter()
+		cpu = os.cpu_count() or 1
+		total = max(1, shards or cpu)
+		if kind in ("ts", "js"):
+			run_cwd = cwd or os.path.join("tests")
+			commands = [
+				["npx", "playwright", "test", f"--shard={i + 1}/{total}", "--reporter=json"]
+				for i in range(total)
+			]
+			parse = self._parse_playwright_report
+			report_files: list[str | None] = [None] * total
+			report_dir = None
+		else:
+			run_cwd = cwd or os.path.join("python_tests")
+			groups = self._split_python_files(run_cwd, total)
+			if not groups:
+				return self._report(kind, [], started, "Тестовые файлы не найдены")
+			report_dir = tempfile.mkdtemp(prefix="pytest_shards_")
+			report_files = [os.path.join(report_dir, f"shard_{i}.xml") for i in range(len(groups))]
+			commands = [
+				[sys.executable, "-m", "pytest", "-q", f"--junitxml={report_files[i]}", *files]
+				for i, files in enumerate(groups)
+			]
+			parse = self._parse_junit_report
+
+		limiter = asyncio.Semaphore(cpu)
+		procs: list[asyncio.subprocess.Process] = []
+
+		async def run_shard(index: int, cmd: list[str]) -> dict:
+			async with limiter:
+				shard_started = time.perf_counter()
+				result = {"index": index, "returncode": -1, "timed_out": False, "stdout": "", "stderr": "", "tests": []}
+				try:
+					proc = await asyncio.create_subprocess_exec(
+						*cmd,
+						cwd=run_cwd,
+						stdout=asyncio.subprocess.PIPE,
+						stderr=asyncio.subprocess.PIPE,
+						# Своя группа процессов: по таймауту завершаются и node, и браузеры Playwright
+						start_new_session=os.name != "nt",
+					)
+				except Exception as exc:
+					result["stderr"] = str(exc)
+					result["duration"] = round(time.perf_counter() - shard_started, 3)
+					return result
+				procs.append(proc)
+				# communicate() продолжает читать вывод после таймаута, чтобы сохранить то, что шард успел напечатать
+				communicate = asyncio.ensure_future(proc.communicate())
+				try:
+					stdout, stderr = await asyncio.wait_for(asyncio.shield(communicate), timeout=shard_timeout)
+					result["returncode"] = proc.returncode
+				except asyncio.TimeoutError:
+					await terminate_process(proc)
+					try:
+						stdout, stderr = await asyncio.wait_for(communicate, timeout=TERMINATE_GRACE)
+					except asyncio.TimeoutError:
+						# Трубы держит процесс вне группы — вывод шарда теряется, но прогон не зависает
+						stdout, stderr = b"", b""
+					result["timed_out"] = True
+				except asyncio.CancelledError:
+					# Общий таймаут или отмена прогона
+					communicate.cancel()
+					await terminate_process(proc)
+					raise
+				result["stdout"] = stdout.decode("utf-8", errors="replace")
+				result["stderr"] = stderr.decode("utf-8", errors="replace")
+				try:
+					result["tests"] = parse(result["stdout"], report_files[index], index)
+				except Exception as exc:
+					result["stderr"] += f"\nНе удалось разобрать отчёт шарда: {exc}"
+				result["duration"] = round(time.perf_counter() - shard_started, 3)
+				return result
+
+		tasks = [asyncio.create_task(run_shard(i, cmd)) for i, cmd in enumerate(commands)]
+		error = None
+		try:
+			await asyncio.wait_for(asyncio.gather(*tasks), timeout=timeout)
+		except asyncio.TimeoutError:
+			error = f"Превышен общий таймаут прогона ({timeout} c)"
+			await asyncio.gather(*(terminate_process(proc) for proc in procs))
+		finally:
+			if report_dir:
+				shutil.rmtree(report_dir, ignore_errors=True)
+		shard_results = [
+			t.result() if t.done() and not t.cancelled() else {"index": i, "returncode": -1, "timed_out": True, "stdout": "", "stderr": "", "tests": [], "duration": None}
+			for i, t in enumerate(tasks)
+		]
+		TEST_RUN_LATENCY.observe(time.perf_counter() - started, kind=kind, mode="parallel")
+		return self._report(kind, shard_results, started, error)
+
+	@staticmethod
+	def _split_python_files(cwd: str, shards: int) -> list[list[str]]:
+		"""Раскладывает тестовые файлы по шардам: самые большие файлы — в наименее загруженный шард"""
+		root = Path(cwd)
+		files = sorted(
+			{p for pattern in ("test_*.py", "*_test.py") for p in root.rglob(pattern) if "node_modules" not in p.parts},
+			key=lambda p: p.stat().st_size,
+			reverse=True,
+		)
+		if not files:
+			return []
+		count = min(shards, len(files))
+		groups: list[list[str]] = [[] for _ in range(count)]
+		sizes = [0] * count
+		for path in files:
+			i = sizes.index(min(sizes))
+			groups[i].append(str(path.relative_to(root)))
+			sizes[i] += path.stat().st_size
+		return groups
+
+	@staticmethod
+	def _parse_playwright_report(stdout: str, _report_file: str | None, shard: int) -> list[dict]:
+		start = stdout.find("{")
+		if start < 0:
+			return []
+		data = json.loads(stdout[start:])
+		tests: list[dict] = []
+
+		def walk(suite: dict, titles: list[str]) -> None:
+			path = titles + ([suite["title"]] if suite.get("title") else [])
+			for spec in suite.get("specs", []):
+				for test in spec.get("tests", []):
+					results = test.get("results", [])
+					status = results[-1].get("status") if results else test.get("status", "skipped")
+					tests.append({
+						"name": " › ".join(path[1:] + [spec.get("title", "")]),
+						"file": spec.get("file") or suite.get("file"),
+						"project": test.get("projectName"),
+						"status": status,
+						"duration": round(sum(r.get("duration", 0) for r in results) / 1000, 3),
+						"shard": shard,
+					})
+			for child in suite.get("suites", []):
+				walk(child, path)
+
+		for suite in data.get("suites", []):
+			walk(suite, [])
+		return tests
+
+	@staticmethod
+	def _parse_junit_report(_stdout: str, report_file: str | None, shard: int) -> list[dict]:
+		if not report_file or not os.path.exists(report_file):
+			return []
+		tests: list[dict] = []
+		for case in ET.parse(report_file).getroot().iter("testcase"):
+			if case.find("failure") is not None or case.find("error") is not None:
+				status = "failed"
+			elif case.find("skipped") is not None:
+				status = "skipped"
+			else:
+				status = "passed"
+			tests.append({
+				"name": f"{case.get('classname', '')}::{case.get('name', '')}",
+				"file": case.get("file"),
+				"status": status,
+				"duration": round(float(case.get("time") or 0), 3),
+				"shard": shard,
+			})
+		return tests
 
+	@staticmethod
+	def _report(kind: str, shards: list[dict], started: float, error: str | None) -> dict:
+		tests = [t for s in shards for t in s.get("tests", [])]
+		summary = {"total": len(tests), "passed": 0, "failed": 0, "skipped": 0}
+		for t in tests:
+			if t["status"] in ("passed", "expected"):
+				summary["passed"] += 1
+			elif t["status"] == "skipped":
+				summary["skipped"] += 1
+			else:
+				summary["failed"] += 1
+		summary["timed_out_shards"] = sum(1 for s in shards if s.get("timed_out"))
+		failed = error is not None or not shards or any(s["returncode"] != 0 for s in shards)
+		return {
+			"returncode": 1 if failed else 0,
+			"kind": kind,
+			"duration": round(time.perf_counter() - started, 3),
+			"summary": summary,
+			"tests": tests,
+			"shards": shards,
+			"stdout": "".join(s.get("stdout", "") for s in shards if kind == "python"),
+			"stderr": "\n".join(filter(None, [error, *(s.get("stderr", "") for s in shards)])),
+		}
@@ -0,0 +1,251 @@
+import asyncio
+import itertools
+import os
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Tuple
+from backend.services.config import get_settings
+from backend.services.log import get_logger
+from backend.services.metrics import TEST_RUN_LATENCY
+from backend.services.test_runner import TERMINATE_GRACE, TestRunner, terminate_process
+
+
+logger = get_logger("backend.test_runs")
+
+TERMINAL_STATUSES = {"succeeded", "failed", "timed_out", "cancelled", "error"}
+
+
+class TestRun:
+	"""Один прогон тестов: подпроцесс, статус и хвост вывода ограниченного размера.
+
+	Строки вывода нумеруются (seq с 1); когда вывод превышает output_limit байт, старые строки
+	отбрасываются, так что в памяти всегда остаётся конец вывода с итогами прогона.
+	"""
+
+	def __init__(self, kind: str, cwd: str, command: List[str], timeout: float | None, output_limit: int) -> None:
+		self.id = uuid.uuid4().hex
+		self.kind = kind
+		self.cwd = cwd
+		self.command = command
+		self.timeout = timeout
+		self.output_limit = max(1024, output_limit)
+		self.status = "queued"
+		self.returncode: int | None = None
+		self.error: str | None = None
+		self.created_at = time.time()
+		self.started_at: float | None = None
+		self.finished_at: float | None = None
+		self.task: asyncio.Task | None = None
+		self._lines: Deque[Tuple[int, str, str]] = deque()
+		self._size = 0
+		self._seq = 0
+		self.dropped_lines = 0
+		self.dropped_bytes = 0
+		self._changed = asyncio.Event()
+
+	@property
+	def done(self) -> bool:
+		return self.status in TERMINAL_STATUSES
+
+	def _notify(self) -> None:
+		self._changed.set()
+		self._changed = asyncio.Event()
+
+	def append(self, stream: str, text: str) -> None:
+		size = len(text.encode("utf-8", errors="replace")) + 1
+		if size > self.output_limit:
+			text = text[-self.output_limit // 4:]
+			size = len(text.encode("utf-8", errors="replace")) + 1
+		self._seq += 1
+		self._lines.append((self._seq, stream, text))
+		self._size += size
+		while self._size > self.output_limit and len(self._lines) > 1:
+			_, _, dropped = self._lines.popleft()
+			dropped_size = len(dropped.encode("utf-8", errors="replace")) + 1
+			self._size -= dropped_size
+			self.dropped_lines += 1
+			self.dropped_bytes += dropped_size
+		self._notify()
+
+	async def pump(self, stream: str, reader: asyncio.StreamReader) -> None:
+		"""Читает поток подпроцесса блоками и делит на строки (длинные строки без перевода строки не копятся)"""
+		pending = b""
+		while True:
+			chunk = await reader.read(65536)
+			if not chunk:
+				break
+			pending += chunk
+			*lines, pending = pending.split(b"\n")
+			for line in lines:
+				self.append(stream, line.decode("utf-8", errors="replace").rstrip("\r"))
+			if len(pending) > self.output_limit:
+				self.append(stream, pending.decode("utf-8", errors="replace"))
+				pending = b""
+		if pending:
+			self.append(stream, pending.decode("utf-8", errors="replace").rstrip("\r"))
+
+	async def follow(self, after: int = 0) -> AsyncIterator[Tuple[int, str, str]]:
+		"""Строки с номером больше after по мере появления; заканчивается вместе с прогоном.
+
+		Если читатель отстал и часть строк уже отброшена, продолжает с самой старой сохранённой.
+		"""
+		next_seq = after + 1
+		while True:
+			changed = self._changed
+			first = self._lines[0][0] if self._lines else self._seq + 1
+			for item in list(itertools.islice(self._lines, max(0, next_seq - first), None)):
+				next_seq = item[0] + 1
+				yield item
+			if self.done and next_seq > self._seq:
+				return
+			await changed.wait()
+
+	def output(self, stream: str) -> str:
+		return "\n".join(text for _, name, text in self._lines if name == stream)
+
+	def info(self) -> Dict[str, Any]:
+		end = self.finished_at or time.time()
+		return {
+			"id": self.id,
+			"kind": self.kind,
+			"cwd": self.cwd,
+			"command": self.command,
+			"status": self.status,
+			"returncode": self.returncode,
+			"error": self.error,
+			"timeout": self.timeout,
+			"created_at": self.created_at,
+			"started_at": self.started_at,
+			"finished_at": self.finished_at,
+			"duration": round(end - self.started_at, 3) if self.started_at else None,
+			"output": {"lines": self._seq, "dropped_lines": self.dropped_lines, "dropped_bytes": self.dropped_bytes},
+		}
+
+	def result(self) -> Dict[str, Any]:
+		"""Сведения о прогоне и сохранённый вывод; returncode/stdout/stderr — как в прежнем /tests/run"""
+		stderr = self.output("stderr")
+		if self.error:
+			stderr = "\n".join(filter(None, [stderr, self.error]))
+		return {
+			**self.info(),
+			"returncode": self.returncode if self.returncode is not None else -1,
+			"stdout": self.output("stdout"),
+			"stderr": stderr,
+		}
+
+
+class TestRunManager:
+	"""Асинхронные прогоны тестов: очередь с ограничением одновременных прогонов, таймаут и отмена"""
+
+	def __init__(self) -> None:
+		self.runs: Dict[str, TestRun] = {}
+		self._limiter: asyncio.Semaphore | None = None
+		self._loop: asyncio.AbstractEventLoop | None = None
+
+	def slot(self) -> asyncio.Semaphore:
+		"""Общий лимит прогонов (TEST_RUN_MAX_CONCURRENCY); его же занимает шардированный прогон"""
+		loop = asyncio.get_running_loop()
+		if self._limiter is None or self._loop is not loop:
+			self._limiter = asyncio.Semaphore(max(1, get_settings().test_run_max_concurrency))
+			self._loop = loop
+		return self._limiter
+
+	def get(self, run_id: str) -> TestRun | None:
+		return self.runs.get(run_id)
+
+	def list_runs(self) -> List[Dict[str, Any]]:
+		return [run.info() for run in reversed(self.runs.values())]
+
+	def start(self, kind: str = "ts", cwd: str | None = None, timeout: float | None = None) -> TestRun:
+		"""Ставит прогон в очередь и сразу возвращает его; выполняется в фоне"""
+		settings = get_settings()
+		command, run_cwd = TestRunner.command(kind, cwd)
+		run = TestRun(kind, run_cwd, command, timeout or settings.test_run_timeout or None, settings.test_run_output_limit)
+		self.runs[run.id] = run
+		self._prune(settings.test_run_history)
+		run.task = asyncio.create_task(self._execute(run))
+		return run
+
+	async def wait(self, run: TestRun) -> Dict[str, Any]:
+		"""Ждёт окончания прогона; отмена ожидающего (например, фоновой задачи) отменяет и прогон"""
+		assert run.task is not None
+		try:
+			await asyncio.shield(run.task)
+		except asyncio.CancelledError:
+			self.cancel(run.id)
+			raise
+		return run.result()
+
+	def cancel(self, run_id: str) -> TestRun | None:
+		run = self.runs.get(run_id)
+		if run is not None and not run.done and run.task is not None:
+			run.task.cancel()
+		return run
+
+	def _prune(self, history: int) -> None:
+		finished = [run_id for run_id, run in self.runs.items() if run.done]
+		for run_id in finished[: max(0, len(finished) - history)]:
+			del self.runs[run_id]
+
+	async def _execute(self, run: TestRun) -> None:
+		try:
+			async with self.slot():
+				await self._run_process(run)
+		except asyncio.CancelledError:
+			run.status = "cancelled"
+		except Exception as exc:
+			run.status = "error"
+			run.error = str(exc) or exc.__class__.__name__
+		finally:
+			run.finished_at = time.time()
+			run._notify()
+			if run.started_at is not None:
+				TEST_RUN_LATENCY.observe(run.finished_at - run.started_at, kind=run.kind, mode="serial")
+			logger.info("test_run_finished", extra={"run_id": run.id, "kind": run.kind, "status": run.status, "returncode": run.returncode})
+
+	async def _run_process(self, run: TestRun) -> None:
+		run.status = "running"
+		run.started_at = time.time()
+		run._notify()
+		proc = await asyncio.create_subprocess_exec(
+			*run.command,
+			cwd=run.cwd,
+			stdout=asyncio.subprocess.PIPE,
+			stderr=asyncio.subprocess.PIPE,
+			# Своя группа процессов, чтобы при таймауте и отмене завершались и дочерние (браузеры Playwright)
+			start_new_session=os.name != "nt",
+		)
+		assert proc.stdout is not None and proc.stderr is not None
+		pumps = asyncio.gather(run.pump("stdout", proc.stdout), run.pump("stderr", proc.stderr))
+		try:
+			await asyncio.wait_for(proc.wait(), timeout=run.timeout)
+		except asyncio.TimeoutError:
+			run.status = "timed_out"
+			run.error = f"Превышен таймаут прогона ({run.timeout} c)"
+			await terminate_process(proc)
+		except asyncio.CancelledError:
+			await terminate_process(proc)
+			raise
+		finally:
+			try:
+				await asyncio.wait_for(pumps, timeout=TERMINATE_GRACE)
+			except (asyncio.TimeoutError, asyncio.CancelledError):
+				pumps.cancel()
+			run.returncode = proc.returncode
+		if run.status == "running":
+			run.status = "succeeded" if proc.returncode == 0 else "failed"
+
+	async def stop(self) -> None:
+		"""Отменяет незавершённые прогоны (вызывается при остановке FastAPI)"""
+		tasks = [run.task for run in self.runs.values() if run.task is not None and not run.task.done()]
+		for task in tasks:
+			task.cancel()
+		await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_manager = TestRunManager()
+
+
+def get_test_run_manager() -> TestRunManager:
+	return _manager
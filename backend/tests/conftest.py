@@ -0,0 +1,48 @@
+import asyncio
+import socket
+import threading
+import time
+import pytest
+import uvicorn
+from backend.services.http_pool import get_http_registry
+
+
+@pytest.fixture
+def serve():
+	"""Поднимает ASGI-приложение заглушки (Ollama, GitHub API) на свободном порту; возвращает базовый URL"""
+	servers = []
+
+	def start(app) -> str:
+		sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		sock.bind(("127.0.0.1", 0))
+		server = uvicorn.Server(uvicorn.Config(app, log_level="warning", access_log=False, lifespan="off"))
+		thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+		thread.start()
+		servers.append((server, thread))
+		deadline = time.monotonic() + 10
+		while not server.started:
+			if time.monotonic() > deadline:
+				raise RuntimeError("stand-in server did not start")
+			time.sleep(0.01)
+		return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+	yield start
+	for server, thread in servers:
+		server.should_exit = True
+		thread.join(timeout=10)
+
+
+@pytest.fixture
+def run():
+	"""asyncio.run, после которого пулы HTTP-клиентов закрываются в том же loop'е"""
+
+	def run(coro):
+		async def main():
+			try:
+				return await coro
+			finally:
+				await get_http_registry().aclose()
+
+		return asyncio.run(main())
+
+	return run
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from backend.services.ai import AIClient
+from backend.services.backends import BackendPool, get_backend_router
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+class StandInOllama:
+	"""Один бэкенд Ollama: /api/chat (обычный и потоковый) и /api/tags с заданным статусом и задержкой"""
+
+	def __init__(self, name: str, status: int = 200, delay: float = 0.0, tags_status: int = 200) -> None:
+		self.name = name
+		self.status = status
+		self.delay = delay
+		self.tags_status = tags_status
+		self.chats = 0
+		self.app = FastAPI()
+		self._routes()
+
+	def _routes(self) -> None:
+		@self.app.get("/api/tags")
+		async def tags():
+			return JSONResponse({"models": []}, status_code=self.tags_status)
+
+		@self.app.post("/api/chat")
+		async def chat(request: Request):
+			body = await request.json()
+			self.chats += 1
+			await asyncio.sleep(self.delay)
+			if self.status != 200:
+				return JSONResponse({"error": "unavailable"}, status_code=self.status)
+			if not body.get("stream"):
+				return {"message": {"role": "assistant", "content": self.name}, "done": True}
+
+			async def lines():
+				for part in (self.name, "!"):
+					yield json.dumps({"message": {"content": part}, "done": False}) + "\n"
+				yield json.dumps({"message": {"content": ""}, "done": True}) + "\n"
+
+			return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@pytest.fixture
+def pool(serve, monkeypatch):
+	"""Пул Ollama из заглушек, подставленный в общий маршрутизатор"""
+
+	def make(*stand_ins: StandInOllama, strategy: str = "least_outstanding") -> BackendPool:
+		built = BackendPool("ollama", [serve(s.app) for s in stand_ins], strategy=strategy)
+		monkeypatch.setitem(get_backend_router().pools, "ollama", built)
+		return built
+
+	return make
+
+
+def client() -> AIClient:
+	return AIClient("ollama", model="stand-in", use_cache=False)
+
+
+def test_least_outstanding_prefers_idle_backend(pool):
+	busy, idle = StandInOllama("busy"), StandInOllama("idle")
+	built = pool(busy, idle)
+	built.backends[0].outstanding = 2
+	assert [b.url for b in built.candidates()] == [built.backends[1].url, built.backends[0].url]
+
+
+def test_ewma_prefers_faster_backend(pool, run):
+	slow, fast = StandInOllama("slow", delay=0.2), StandInOllama("fast")
+	built = pool(slow, fast, strategy="ewma")
+
+	async def warm():
+		for backend in built.backends:
+			await client()._chat_failover(built, [backend], MESSAGES, None)
+
+	run(warm())
+	assert built.backends[0].ewma_latency > built.backends[1].ewma_latency
+	assert run(client()._chat_request(MESSAGES)) == "fast"
+	assert (slow.chats, fast.chats) == (1, 2)
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_server_failure_fails_over_to_next_backend(pool, run, status):
+	broken, spare = StandInOllama("broken", status=status), StandInOllama("spare")
+	built = pool(broken, spare)
+	assert run(client()._chat_request(MESSAGES)) == "spare"
+	assert (broken.chats, spare.chats) == (1, 1)
+	assert built.backends[0].failures == 1
+	assert built.backends[1].failures == 0
+
+
+def test_client_error_is_not_failed_over(pool, run):
+	rejecting, spare = StandInOllama("rejecting", status=400), StandInOllama("spare")
+	built = pool(rejecting, spare)
+	with pytest.raises(httpx.HTTPStatusError):
+		run(client()._chat_request(MESSAGES))
+	assert spare.chats == 0
+	assert built.backends[0].failures == 0
+
+
+def test_backend_with_failed_probe_is_skipped(pool, run):
+	sick, healthy = StandInOllama("sick", tags_status=503), StandInOllama("healthy")
+	built = pool(sick, healthy)
+	run(built.probe())
+	assert not built.backends[0].healthy
+	assert run(client()._chat_request(MESSAGES)) == "healthy"
+	assert sick.chats == 0
+
+
+def test_stream_fails_over_before_first_chunk(pool, run):
+	broken, spare = StandInOllama("broken", status=503), StandInOllama("spare")
+	pool(broken, spare)
+
+	async def collect():
+		return [delta async for delta in client()._chat_stream_upstream(MESSAGES)]
+
+	assert run(collect()) == ["spare", "!"]
+	assert broken.chats == 1
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import httpx
+import pytest
+from backend.services.bulk import BulkPipeline, Checkpoint, UploadTooLargeError, spool_path, spool_upload
+from backend.services.config import get_settings
+from backend.services import schemas
+from backend.services.storage import LocalStorage
+
+
+class FakeAI:
+	def __init__(self) -> None:
+		self.calls = []
+
+	async def generate_test_cases(self, description, lang):
+		self.calls.append(description)
+		if description == "boom":
+			raise RuntimeError("model failed")
+		return [schemas.TestCase(title=description, steps=["open"], expected="ok")], None
+
+
+class FakeGenerator:
+	async def generate_item(self, index, test_case, target, ai, base_url):
+		return schemas.GenerateTestCodeBatchItem(index=index, title=test_case.title, code="test()", suggested_filename="case.spec.ts")
+
+
+def make_pipeline(tmp_path, monkeypatch, ai, checkpoint=None) -> BulkPipeline:
+	monkeypatch.setattr(get_settings(), "default_repo_root", str(tmp_path))
+	pipeline = BulkPipeline(ai, LocalStorage(), out="bulk", workers=2, checkpoint=checkpoint)
+	pipeline.generator = FakeGenerator()
+	return pipeline
+
+
+async def lines(*rows):
+	for row in rows:
+		yield row if isinstance(row, bytes) else json.dumps(row).encode("utf-8")
+
+
+def collect(pipeline: BulkPipeline, source) -> list:
+	async def scenario():
+		return [result async for result in pipeline.run(source)]
+
+	return sorted(asyncio.run(asyncio.wait_for(scenario(), 10)), key=lambda r: r["line"])
+
+
+def test_every_line_gets_a_result(tmp_path, monkeypatch):
+	pipeline = make_pipeline(tmp_path, monkeypatch, FakeAI())
+	results = collect(pipeline, lines({"id": "a", "description": "login"}, "plain text", [1, 2], 42, b"{bad", {"id": "e"}, "boom"))
+	assert [r["status"] for r in results] == ["ok", "ok", "error", "error", "error", "error", "error"]
+	assert results[0]["files"] == [str(tmp_path / "bulk/a/test_cases.json"), str(tmp_path / "bulk/a/tests/e2e/000_case.spec.ts")]
+	assert results[6]["error"] == "model failed"
+
+
+def test_checkpoint_skips_finished_items(tmp_path, monkeypatch):
+	checkpoint = Checkpoint(tmp_path / "run.jsonl")
+	ai = FakeAI()
+	collect(make_pipeline(tmp_path, monkeypatch, ai, checkpoint), lines({"id": "a", "description": "one"}, {"id": "b", "description": "boom"}))
+	assert sorted(ai.calls) == ["boom", "one"]
+
+	ai = FakeAI()
+	resumed = collect(make_pipeline(tmp_path, monkeypatch, ai, Checkpoint(tmp_path / "run.jsonl")), lines({"id": "a", "description": "one"}, {"id": "b", "description": "boom"}))
+	assert [r["status"] for r in resumed] == ["skipped", "error"]
+	assert ai.calls == ["boom"]
+
+
+def test_read_error_is_raised_instead_of_hanging(tmp_path, monkeypatch):
+	async def broken():
+		yield b'"one"'
+		raise OSError("upload broken")
+
+	with pytest.raises(OSError, match="upload broken"):
+		collect(make_pipeline(tmp_path, monkeypatch, FakeAI()), broken())
+
+
+def test_spool_upload_limit_and_unique_names(tmp_path):
+	checkpoint = Checkpoint(tmp_path / "run.jsonl")
+	first, second = spool_path(checkpoint), spool_path(checkpoint)
+	assert first != second
+
+	async def chunks():
+		for _ in range(4):
+			yield b"x" * 10
+
+	assert asyncio.run(spool_upload(chunks(), first, 40)) == 40
+	assert first.read_bytes() == b"x" * 40
+	with pytest.raises(UploadTooLargeError):
+		asyncio.run(spool_upload(chunks(), second, 39))
+	assert not second.exists()
+
+
+def test_bulk_endpoint_rejects_oversized_body(tmp_path, monkeypatch):
+	from backend.main import app
+
+	monkeypatch.setattr(get_settings(), "bulk_max_upload_bytes", 16)
+	monkeypatch.setattr(get_settings(), "bulk_checkpoint_dir", str(tmp_path))
+
+	async def post():
+		async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+			return await client.post("/generate/bulk?run_id=r1", content=b'{"description": "too long for the limit"}\n')
+
+	resp = asyncio.run(post())
+	assert resp.status_code == 413
+	assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import sys
+from backend.services.config import get_settings
+from backend.services.format_service import PrettierWorker
+
+
+# Замена процесса prettier: тот же протокол строк JSON; код "hang" остаётся без ответа
+STAND_IN = r"""
+import json, sys
+print(json.dumps({"ready": True}), flush=True)
+for line in sys.stdin:
+    req = json.loads(line)
+    if any(item["code"] == "hang" for item in req["items"]):
+        continue
+    print(json.dumps({"id": req["id"], "results": [{"formatted": item["code"].upper()} for item in req["items"]]}), flush=True)
+"""
+
+
+class StandInWorker(PrettierWorker):
+	async def _start(self) -> bool:
+		self.proc = await asyncio.create_subprocess_exec(
+			sys.executable, "-c", STAND_IN, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+		)
+		await self.proc.stdout.readline()
+		self._reader = asyncio.create_task(self._read_loop())
+		return True
+
+
+def test_timed_out_request_does_not_leak(monkeypatch):
+	monkeypatch.setattr(get_settings(), "formatter_timeout", 0.2)
+
+	async def scenario():
+		worker = StandInWorker([])
+		try:
+			assert await worker.format_many([("a", "typescript"), ("b", "babel")]) == [{"formatted": "A"}, {"formatted": "B"}]
+			try:
+				await worker.format_many([("hang", "typescript")])
+			except asyncio.TimeoutError:
+				pass
+			else:
+				raise AssertionError("expected a timeout")
+			assert worker._pending == {}
+			assert await worker.format_many([("c", "typescript")]) == [{"formatted": "C"}]
+		finally:
+			await worker.close()
+
+	asyncio.run(scenario())
+
+
+def test_worker_from_previous_loop_is_killed():
+	worker = StandInWorker([])
+	old_loop = asyncio.new_event_loop()
+	try:
+		old_loop.run_until_complete(worker.format_many([("a", "typescript")]))
+		pid = worker.proc.pid
+		worker.kill()
+		assert worker.proc is None
+		for _ in range(100):
+			old_loop.run_until_complete(asyncio.sleep(0.02))
+			if worker_exited(pid):
+				break
+		else:
+			raise AssertionError("stand-in prettier process is still alive")
+	finally:
+		old_loop.run_until_complete(asyncio.sleep(0.05))
+		old_loop.close()
+
+
+def worker_exited(pid: int) -> bool:
+	try:
+		os.kill(pid, 0)
+	except ProcessLookupError:
+		return True
+	return False
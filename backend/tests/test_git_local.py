@@ -0,0 +1,86 @@
+import asyncio
+from pathlib import Path
+from git import Repo
+from backend.services import git_local
+from backend.services.change_tracker import get_change_tracker
+from backend.services.git_local import COMMIT_ATTEMPTS, DebouncedCommitter, LocalGit
+
+
+def make_repo(tmp_path: Path) -> Path:
+	root = tmp_path / "repo"
+	repo = Repo.init(root)
+	with repo.config_writer() as config:
+		config.set_value("user", "name", "Tests")
+		config.set_value("user", "email", "tests@example.com")
+	(root / ".gitignore").write_text("*.log\n", encoding="utf-8")
+	repo.index.add([".gitignore"])
+	repo.index.commit("init")
+	return root
+
+
+def write(root: Path, name: str, text: str = "x") -> str:
+	path = root / name
+	path.parent.mkdir(parents=True, exist_ok=True)
+	path.write_text(text, encoding="utf-8")
+	get_change_tracker().record(path)
+	return str(path.resolve())
+
+
+def committed_files(root: Path) -> list:
+	return sorted(Repo(root).head.commit.stats.files)
+
+
+def test_rejected_paths(tmp_path):
+	root = make_repo(tmp_path)
+	ok = write(root, "tests/a.spec.ts")
+	ignored = write(root, "debug.log")
+	missing = str((root / "gone.txt").resolve())
+	outside = str(tmp_path / "elsewhere.txt")
+	assert LocalGit(str(root)).rejected_paths([ok, ignored, missing, outside]) == [outside, ignored, missing]
+	get_change_tracker().drain(root)
+
+
+def test_debounced_commits_batch_and_skip_ignored_files(tmp_path):
+	root = make_repo(tmp_path)
+	committer = DebouncedCommitter()
+
+	async def scenario():
+		for name in ("a.txt", "b.txt", "debug.log"):
+			write(root, name)
+			committer.schedule(str(root), 0.05, "chore: generated")
+		await committer.flush()
+
+	asyncio.run(scenario())
+	assert Repo(root).head.commit.message.strip() == "chore: generated"
+	assert committed_files(root) == ["a.txt", "b.txt"]
+	assert committer.last_result["skipped"] == [str((root / "debug.log").resolve())]
+	assert get_change_tracker().pending(root) == []
+
+
+def test_failing_commit_is_retried_then_dropped(tmp_path, monkeypatch):
+	root = make_repo(tmp_path)
+	committer = DebouncedCommitter()
+
+	def broken(self, *args, **kwargs):
+		raise RuntimeError("index.lock exists")
+
+	monkeypatch.setattr(LocalGit, "commit_paths", broken)
+	path = write(root, "a.txt")
+
+	async def attempt():
+		committer.schedule(str(root), 0.0, "chore: generated")
+		await committer.flush()
+
+	for number in range(1, COMMIT_ATTEMPTS):
+		asyncio.run(attempt())
+		assert committer.last_result["attempt"] == number
+		assert get_change_tracker().pending(root) == [path]
+	asyncio.run(attempt())
+	assert committer.last_result["dropped"] == [path]
+	assert get_change_tracker().pending(root) == []
+
+	# Следующие файлы сессии коммитятся как обычно
+	monkeypatch.undo()
+	write(root, "b.txt")
+	asyncio.run(attempt())
+	assert committed_files(root) == ["b.txt"]
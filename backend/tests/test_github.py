@@ -0,0 +1,129 @@
+import base64
+import hashlib
+import itertools
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from backend.services.github import REF_UPDATE_ATTEMPTS, GithubConflictError, GithubSaver
+
+
+class StandInGithub:
+	"""Git Data API одного репозитория: blobs, trees, commits и ref ветки main"""
+
+	def __init__(self, races: int = 0) -> None:
+		self.races = races
+		self.ids = itertools.count(1)
+		self.blobs = {}
+		self.trees = {"t0": {"README.md": "readme"}}
+		self.commits = {"c0": {"tree": "t0", "parents": []}}
+		self.head = "c0"
+		self.calls = []
+		self.app = FastAPI()
+		self._routes()
+
+	def _sha(self, prefix: str) -> str:
+		return f"{prefix}{next(self.ids)}"
+
+	def push_elsewhere(self) -> None:
+		tree = self._sha("t")
+		self.trees[tree] = {**self.trees[self.commits[self.head]["tree"]], "other.txt": "concurrent"}
+		commit = self._sha("c")
+		self.commits[commit] = {"tree": tree, "parents": [self.head]}
+		self.head = commit
+
+	def files(self) -> dict:
+		return self.trees[self.commits[self.head]["tree"]]
+
+	def _routes(self) -> None:
+		app = self.app
+		base = "/repos/acme/tests/git"
+
+		@app.middleware("http")
+		async def record(request: Request, call_next):
+			assert request.headers["authorization"] == "Bearer token"
+			self.calls.append(f"{request.method} {request.url.path.removeprefix(base)}")
+			return await call_next(request)
+
+		@app.get(base + "/ref/heads/main")
+		async def get_ref():
+			return {"object": {"sha": self.head}}
+
+		@app.get(base + "/commits/{sha}")
+		async def get_commit(sha: str):
+			return {"sha": sha, "tree": {"sha": self.commits[sha]["tree"]}}
+
+		@app.post(base + "/blobs")
+		async def create_blob(request: Request):
+			body = await request.json()
+			content = base64.b64decode(body["content"]).decode("utf-8")
+			sha = hashlib.sha1(content.encode("utf-8")).hexdigest()
+			self.blobs[sha] = content
+			return {"sha": sha}
+
+		@app.post(base + "/trees")
+		async def create_tree(request: Request):
+			body = await request.json()
+			files = dict(self.trees[body["base_tree"]])
+			files.update({item["path"]: self.blobs[item["sha"]] for item in body["tree"]})
+			sha = self._sha("t")
+			self.trees[sha] = files
+			return {"sha": sha}
+
+		@app.post(base + "/commits")
+		async def create_commit(request: Request):
+			body = await request.json()
+			sha = self._sha("c")
+			self.commits[sha] = {"tree": body["tree"], "parents": body["parents"], "message": body["message"]}
+			return {"sha": sha, "html_url": f"https://github.invalid/acme/tests/commit/{sha}"}
+
+		@app.patch(base + "/refs/heads/main")
+		async def update_ref(request: Request):
+			body = await request.json()
+			if self.races:
+				self.races -= 1
+				self.push_elsewhere()
+			if self.commits[body["sha"]]["parents"] != [self.head]:
+				return JSONResponse({"message": "Update is not a fast forward"}, status_code=422)
+			self.head = body["sha"]
+			return {"ref": "refs/heads/main", "object": {"sha": self.head}}
+
+
+FILES = {"tests/e2e/a.spec.ts": "test('a')", "tests/e2e/b.spec.ts": "test('b')", "python_tests/test_c.py": "def test_c(): pass"}
+
+
+def test_bulk_save_uploads_blobs_then_one_tree_commit_and_ref(serve, run):
+	github = StandInGithub()
+	saver = GithubSaver("token", api_base=serve(github.app))
+	result = run(saver.save_files("acme", "tests", FILES, "add tests"))
+
+	assert sorted(github.calls) == sorted(
+		["POST /blobs"] * 3 + ["GET /ref/heads/main", "GET /commits/c0", "POST /trees", "POST /commits", "PATCH /refs/heads/main"]
+	)
+	assert github.calls[-1] == "PATCH /refs/heads/main"
+	assert result["commit_sha"] == github.head
+	assert github.commits[github.head]["parents"] == ["c0"]
+	assert github.commits[github.head]["message"] == "add tests"
+	assert github.files() == {"README.md": "readme", **FILES}
+	assert [f["path"] for f in result["files"]] == list(FILES)
+
+
+def test_bulk_save_rebuilds_commit_when_branch_moved(serve, run):
+	github = StandInGithub(races=1)
+	saver = GithubSaver("token", api_base=serve(github.app))
+	result = run(saver.save_files("acme", "tests", FILES, "add tests"))
+
+	# Blobs загружаются один раз, tree и commit собираются заново от новой головы
+	assert github.calls.count("POST /blobs") == 3
+	assert github.calls.count("POST /trees") == 2
+	assert github.calls.count("PATCH /refs/heads/main") == 2
+	assert result["commit_sha"] == github.head
+	assert github.files() == {"README.md": "readme", "other.txt": "concurrent", **FILES}
+
+
+def test_bulk_save_reports_conflict_when_branch_keeps_moving(serve, run):
+	github = StandInGithub(races=REF_UPDATE_ATTEMPTS)
+	saver = GithubSaver("token", api_base=serve(github.app))
+	with pytest.raises(GithubConflictError):
+		run(saver.save_files("acme", "tests", FILES, "add tests"))
+	assert github.calls.count("PATCH /refs/heads/main") == REF_UPDATE_ATTEMPTS
+	assert "tests/e2e/a.spec.ts" not in github.files()
@@ -0,0 +1,160 @@
+import asyncio
+import sqlite3
+import time
+from backend.services.jobs import INTERRUPTED_ERROR, JobQueue, JobStore
+
+
+def make_store(tmp_path) -> JobStore:
+	return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def expire(store: JobStore, job_id: str) -> None:
+	store._db().execute("UPDATE jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+def test_claim_takes_highest_priority_first(tmp_path):
+	store = make_store(tmp_path)
+	low = store.submit("a", {"n": 1})
+	high = store.submit("a", {"n": 2}, priority=5)
+	assert store.claim("w1", 60)["id"] == high
+	job = store.claim("w1", 60)
+	assert job["id"] == low
+	assert job["status"] == "running" and job["payload"] == {"n": 1} and job["attempts"] == 1
+	assert store.claim("w1", 60) is None
+
+
+def test_finish_ignores_worker_that_lost_the_lease(tmp_path):
+	store = make_store(tmp_path)
+	job_id = store.submit("a", {})
+	store.claim("slow", 60)
+	expire(store, job_id)
+	assert store.requeue_expired({"a"}) == 1
+	assert store.claim("fresh", 60)["id"] == job_id
+	store.finish(job_id, "slow", "failed", None, "stale")
+	assert store.get(job_id)["status"] == "running"
+	store.finish(job_id, "fresh", "succeeded", {"ok": True})
+	job = store.get(job_id)
+	assert job["status"] == "succeeded" and job["result"] == {"ok": True} and job["attempts"] == 2
+
+
+def test_interrupted_jobs_requeue_only_restartable_kinds(tmp_path):
+	store = make_store(tmp_path)
+	safe = store.submit("generate", {})
+	push = store.submit("git_push", {})
+	store.claim("w1", 60)
+	store.claim("w1", 60)
+	store.requeue_worker("w1", {"generate"})
+	assert store.get(safe)["status"] == "queued"
+	interrupted = store.get(push)
+	assert interrupted["status"] == "failed" and interrupted["error"] == INTERRUPTED_ERROR
+
+
+def test_expired_job_with_cancel_request_is_cancelled(tmp_path):
+	store = make_store(tmp_path)
+	job_id = store.submit("a", {})
+	store.claim("w1", 60)
+	store.request_cancel(job_id)
+	expire(store, job_id)
+	assert store.requeue_expired({"a"}) == 0
+	assert store.get(job_id)["status"] == "cancelled"
+
+
+def test_queued_job_is_cancelled_immediately(tmp_path):
+	store = make_store(tmp_path)
+	job_id = store.submit("a", {})
+	assert store.request_cancel(job_id)["status"] == "cancelled"
+	assert store.claim("w1", 60) is None
+
+
+class FlakyStore(JobStore):
+	"""Первые попытки захвата падают, как при "database is locked" от соседнего процесса"""
+
+	def __init__(self, path: str, failures: int) -> None:
+		super().__init__(path)
+		self.failures = failures
+
+	def claim(self, worker, lease_seconds):
+		if self.failures:
+			self.failures -= 1
+			raise sqlite3.OperationalError("database is locked")
+		return super().claim(worker, lease_seconds)
+
+
+async def wait_status(queue: JobQueue, job_id: str, statuses=("succeeded", "failed", "cancelled")) -> dict:
+	for _ in range(500):
+		job = queue.store.get(job_id)
+		if job["status"] in statuses:
+			return job
+		await asyncio.sleep(0.01)
+	raise AssertionError(f"job {job_id} stuck in {job['status']}")
+
+
+def test_worker_survives_database_errors(tmp_path):
+	async def scenario():
+		queue = JobQueue(FlakyStore(str(tmp_path / "jobs.sqlite3"), failures=2), workers=1, poll_interval=0.01)
+
+		async def double(payload):
+			return payload["n"] * 2
+
+		queue.register("double", double)
+		await queue.start()
+		try:
+			job_id = await queue.submit("double", {"n": 21})
+			job = await wait_status(queue, job_id)
+		finally:
+			await queue.stop()
+		assert job["status"] == "succeeded" and job["result"] == 42
+		assert queue.store.failures == 0
+
+	asyncio.run(scenario())
+
+
+def test_stop_fails_non_restartable_running_jobs(tmp_path):
+	async def scenario():
+		queue = JobQueue(make_store(tmp_path), workers=2, poll_interval=0.01)
+
+		async def hang(payload):
+			await asyncio.sleep(60)
+
+		queue.register("generate", hang)
+		queue.register("git_push", hang, restartable=False)
+		await queue.start()
+		first = await queue.submit("generate", {})
+		second = await queue.submit("git_push", {})
+		for _ in range(500):
+			if len(queue._running) == 2:
+				break
+			await asyncio.sleep(0.01)
+		await queue.stop()
+		return queue.store.get(first), queue.store.get(second)
+
+	first, second = asyncio.run(scenario())
+	assert first["status"] == "queued"
+	assert second["status"] == "failed" and second["error"] == INTERRUPTED_ERROR
+
+
+def test_failing_and_cancelled_jobs(tmp_path):
+	async def scenario():
+		queue = JobQueue(make_store(tmp_path), workers=2, poll_interval=0.01)
+
+		async def boom(payload):
+			raise RuntimeError("boom")
+
+		async def hang(payload):
+			await asyncio.sleep(60)
+
+		queue.register("boom", boom)
+		queue.register("hang", hang)
+		await queue.start()
+		try:
+			failed = await queue.submit("boom", {})
+			hanging = await queue.submit("hang", {})
+			await wait_status(queue, hanging, ("running",))
+			await queue.cancel(hanging)
+			return await wait_status(queue, failed), await wait_status(queue, hanging)
+		finally:
+			await queue.stop()
+
+	failed, cancelled = asyncio.run(scenario())
+	assert failed["status"] == "failed" and failed["error"] == "boom"
+	assert cancelled["status"] == "cancelled"
@@ -0,0 +1,40 @@
+import json
+from backend.services.json_stream import JsonArrayItemParser
+
+RESPONSE = json.dumps(
+	{
+		"test_cases": [
+			{"title": "Вход {с фигурными} скобками", "steps": ["a", "b"], "meta": {"tags": ["x"]}},
+			{"title": "Кавычка \" и обратный слэш \\", "steps": []},
+		]
+	},
+	ensure_ascii=False,
+)
+
+
+def feed_in_chunks(text: str, size: int) -> list:
+	parser = JsonArrayItemParser()
+	items = []
+	for i in range(0, len(text), size):
+		items.extend(parser.feed(text[i:i + size]))
+	return items
+
+
+def test_items_are_yielded_whatever_the_chunk_size():
+	expected = json.loads(RESPONSE)["test_cases"]
+	for size in (1, 3, 7, len(RESPONSE)):
+		assert feed_in_chunks(RESPONSE, size) == expected
+
+
+def test_item_is_yielded_as_soon_as_it_closes():
+	parser = JsonArrayItemParser()
+	assert list(parser.feed('[{"a": 1}, {"b"')) == [{"a": 1}]
+	assert list(parser.feed(": 2}]")) == [{"b": 2}]
+
+
+def test_nested_objects_are_not_yielded_separately_and_broken_items_are_skipped():
+	parser = JsonArrayItemParser()
+	assert list(parser.feed('{"x": {"y": 1}, "items": [{"a": {"b": [{"c": 1}]}}, {"a": 1,}, {"d": 2}]}')) == [
+		{"a": {"b": [{"c": 1}]}},
+		{"d": 2},
+	]
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+import pytest
+from backend.services import llm_cache
+from backend.services.ai import AIClient, _review_score
+from backend.services.llm_cache import LLMCache
+
+MESSAGES = [{"role": "user", "content": "Сгенерируй тест-кейсы"}]
+
+
+def test_key_depends_on_every_request_field():
+	key = LLMCache.make_key("openai", "gpt-4o", MESSAGES, "json")
+	assert key == LLMCache.make_key("openai", "gpt-4o", [dict(reversed(list(MESSAGES[0].items())))], "json")
+	assert key != LLMCache.make_key("ollama", "gpt-4o", MESSAGES, "json")
+	assert key != LLMCache.make_key("openai", "gpt-4o-mini", MESSAGES, "json")
+	assert key != LLMCache.make_key("openai", "gpt-4o", MESSAGES, None)
+	assert key != LLMCache.make_key("openai", "gpt-4o", [{"role": "user", "content": "другое"}], "json")
+
+
+def test_entries_survive_a_restart_through_sqlite(tmp_path):
+	path = str(tmp_path / "cache.sqlite3")
+	asyncio.run(LLMCache(path).set("k", "value"))
+	restarted = LLMCache(path)
+	assert asyncio.run(restarted.get("k")) == "value"
+	assert asyncio.run(restarted.get("k")) == "value"
+	assert restarted.stats()["disk_hits"] == 1
+	assert restarted.stats()["memory_hits"] == 1
+
+
+def test_memory_layer_is_lru_bounded():
+	cache = LLMCache(None, memory_entries=2)
+	for key in ("a", "b"):
+		cache._set_sync(key, key)
+	assert cache._get_sync("a") == "a"
+	cache._set_sync("c", "c")
+	assert cache._get_sync("b") is None
+	assert cache._get_sync("a") == "a"
+	assert cache.stats()["memory_entries"] == 2
+
+
+def test_expired_entries_are_misses(tmp_path):
+	cache = LLMCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+	cache._set_sync("k", "old")
+	created, value = cache._memory["k"]
+	cache._memory["k"] = (created - 120, value)
+	cache._db().execute("UPDATE llm_cache SET created_at = ?", (time.time() - 120,))
+	assert cache._get_sync("k") is None
+	assert cache.stats()["disk_entries"] == 0
+
+
+def test_disk_is_trimmed_to_max_entries_by_last_access(tmp_path):
+	cache = LLMCache(str(tmp_path / "cache.sqlite3"), memory_entries=1, max_entries=2)
+	cache._set_sync("a", "a")
+	cache._set_sync("b", "b")
+	cache._memory.clear()
+	time.sleep(0.01)
+	assert cache._get_sync("a") == "a"
+	cache._set_sync("c", "c")
+	keys = {row[0] for row in cache._db().execute("SELECT key FROM llm_cache")}
+	assert keys == {"a", "c"}
+	assert cache.counters["evictions"] == 1
+
+
+def test_delete_and_clear(tmp_path):
+	cache = LLMCache(str(tmp_path / "cache.sqlite3"))
+	for key in ("a", "b"):
+		cache._set_sync(key, key)
+	asyncio.run(cache.delete("a"))
+	assert cache._get_sync("a") is None
+	cache.clear()
+	assert cache._get_sync("b") is None
+	stats = cache.stats()
+	assert stats["disk_entries"] == 0 and stats["memory_entries"] == 0
+	assert stats["misses"] == 2 and stats["hit_ratio"] == 0.0
+
+
+@pytest.mark.parametrize(
+	"value, expected",
+	[(85, 85), (85.6, 86), ("85/100", 85), ("7,5", 8), (150, 100), ("-3", 0), (float("nan"), 70), ("отлично", 70), (None, 70), (True, 70)],
+)
+def test_review_score_is_coerced_to_0_100(value, expected):
+	assert _review_score(value) == expected
+
+
+def test_unparseable_cached_answer_is_replaced(monkeypatch):
+	cache = LLMCache(None)
+	monkeypatch.setattr(llm_cache, "_cache", cache)
+	monkeypatch.setattr(llm_cache.get_settings(), "llm_cache_enabled", True)
+	ai = AIClient("ollama", model="m")
+	answer = json.dumps({"summary": "ok", "score": "90/100", "suggestions": []})
+	calls = []
+
+	async def upstream(messages, response_format=None):
+		calls.append(messages)
+		return answer
+
+	monkeypatch.setattr(ai, "_chat_upstream", upstream)
+	review = asyncio.run(ai.review_test_code("test('x', () => {});"))
+	key = next(iter(cache._memory))
+	cache._set_sync(key, "{broken")
+	assert asyncio.run(ai.review_test_code("test('x', () => {});")) == review
+	assert review.score == 90
+	assert len(calls) == 2
+	assert cache._get_sync(key) == answer
@@ -0,0 +1,35 @@
+import io
+import json
+import logging
+import logging.handlers
+import queue
+from backend.services.log import ContextFilter, JsonFormatter, JsonQueueHandler, request_id_var
+
+
+def test_exception_traceback_survives_the_queue():
+	records = queue.SimpleQueue()
+	stream = io.StringIO()
+	output = logging.StreamHandler(stream)
+	output.setFormatter(JsonFormatter())
+	handler = JsonQueueHandler(records)
+	handler.addFilter(ContextFilter())
+	logger = logging.getLogger("backend.tests.log")
+	logger.propagate = False
+	logger.handlers = [handler]
+	listener = logging.handlers.QueueListener(records, output)
+	listener.start()
+	token = request_id_var.set("req-1")
+	try:
+		try:
+			raise ValueError("broken input")
+		except ValueError:
+			logger.exception("job %s failed", "42", extra={"job_id": "42"})
+	finally:
+		request_id_var.reset(token)
+		listener.stop()
+		logger.handlers = []
+
+	data = json.loads(stream.getvalue())
+	assert data["msg"] == "job 42 failed"
+	assert data["level"] == "error" and data["request_id"] == "req-1" and data["job_id"] == "42"
+	assert data["exc"].startswith("Traceback") and "ValueError: broken input" in data["exc"]
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from backend.services.config import ConfigError, get_settings, parse_rate_limits
+from backend.services.rate_limit import ModelRateLimiter, TokenBucket, estimate_tokens
+
+
+@pytest.fixture
+def fresh_settings():
+	get_settings.cache_clear()
+	yield get_settings
+	get_settings.cache_clear()
+
+
+def test_parse_rate_limits_accepts_per_model_overrides():
+	assert parse_rate_limits("") == {}
+	assert parse_rate_limits('{"openai:gpt-4o": {"rpm": 500, "tpm": 30000}}') == {"openai:gpt-4o": {"rpm": 500.0, "tpm": 30000.0}}
+
+
+@pytest.mark.parametrize(
+	"raw, message",
+	[
+		("{bad", "некорректный JSON"),
+		("[1]", "ожидается объект"),
+		('{"gpt-4o": {"rpm": 1}}', "провайдер:модель"),
+		('{"openai:gpt-4o": {"rps": 1}}', "неизвестные поля"),
+		('{"openai:gpt-4o": {"rpm": -1}}', "неотрицательное число"),
+		('{"openai:gpt-4o": {"rpm": true}}', "неотрицательное число"),
+	],
+)
+def test_parse_rate_limits_rejects_bad_values(raw, message):
+	with pytest.raises(ConfigError, match=message):
+		parse_rate_limits(raw)
+
+
+def test_bad_rate_limits_fail_in_get_settings_not_on_import(fresh_settings, monkeypatch):
+	monkeypatch.setenv("LLM_RATE_LIMITS", '{"ollama:llama3": {"rpm": 60}}')
+	assert fresh_settings().llm_rate_limits == {"ollama:llama3": {"rpm": 60.0}}
+	fresh_settings.cache_clear()
+	monkeypatch.setenv("LLM_RATE_LIMITS", "{bad")
+	with pytest.raises(ConfigError, match="LLM_RATE_LIMITS"):
+		fresh_settings()
+
+
+def test_token_bucket_waits_for_refill_and_drains_after_429():
+	bucket = TokenBucket(60)
+	assert bucket.wait_time(60) == 0.0
+	bucket.consume(60)
+	assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+	bucket.consume(-30)
+	assert bucket.wait_time(30) == 0.0
+	bucket.drain(2)
+	assert bucket.tokens < 0
+	assert bucket.wait_time(1) == pytest.approx(3.0, abs=0.05)
+
+
+def test_estimate_tokens_grows_with_prompt():
+	short = estimate_tokens([{"role": "user", "content": "hi"}])
+	long = estimate_tokens([{"role": "user", "content": "hi" * 400}])
+	assert 0 < short < long
+
+
+def test_disabled_limiter_does_not_wait():
+	limiter = ModelRateLimiter("ollama", "m", 0, 0)
+	assert not limiter.enabled
+	assert asyncio.run(limiter.acquire(10_000)) == 0.0
+
+
+def test_callers_are_served_round_robin():
+	# Запросы у лимита 1 в 6 мс: очередь разбирается по кругу между вызывающими
+	limiter = ModelRateLimiter("ollama", "m", rpm=10_000, tpm=0)
+	limiter.rpm.tokens = 0
+	order = []
+
+	async def call(caller: str, index: int):
+		await limiter.acquire(1, caller=caller)
+		order.append(f"{caller}{index}")
+
+	async def main():
+		tasks = [asyncio.create_task(call("bulk", i)) for i in range(3)]
+		tasks.append(asyncio.create_task(call("http", 0)))
+		await asyncio.gather(*tasks)
+
+	asyncio.run(main())
+	assert order == ["bulk0", "http0", "bulk1", "bulk2"]
+	assert limiter.stats()["granted"] == 4
+	assert limiter.stats()["queue_depth"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+	limiter = ModelRateLimiter("ollama", "m", rpm=60, tpm=0)
+	limiter.rpm.tokens = 0
+
+	async def main():
+		waiter = asyncio.create_task(limiter.acquire(1, caller="gone"))
+		await asyncio.sleep(0.01)
+		assert limiter.stats()["queue_depth"] == 1
+		waiter.cancel()
+		await asyncio.gather(waiter, return_exceptions=True)
+
+	asyncio.run(main())
+	assert limiter.stats()["queue_depth"] == 0
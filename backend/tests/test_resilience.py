@@ -0,0 +1,158 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from backend.services.backends import BackendPool
+from backend.services.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, hedged, is_retryable, retry_after_seconds
+
+
+def status_error(code: int, headers: dict | None = None) -> httpx.HTTPStatusError:
+	request = httpx.Request("POST", "http://backend/api/chat")
+	return httpx.HTTPStatusError("error", request=request, response=httpx.Response(code, headers=headers, request=request))
+
+
+def half_open(breaker: CircuitBreaker) -> None:
+	breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+
+
+def test_breaker_opens_after_threshold_and_lets_one_trial_through():
+	breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+	breaker.record_failure()
+	assert breaker.state == "closed"
+	breaker.record_failure()
+	assert breaker.state == "open"
+	with pytest.raises(CircuitOpenError):
+		breaker.acquire()
+
+	half_open(breaker)
+	breaker.acquire()
+	with pytest.raises(CircuitOpenError):
+		breaker.acquire()
+	breaker.record_failure()
+	assert breaker.state == "open"
+
+	half_open(breaker)
+	breaker.acquire()
+	breaker.record_success()
+	assert breaker.state == "closed"
+
+
+def test_breaker_release_frees_the_trial_without_closing():
+	breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+	breaker.record_failure()
+	half_open(breaker)
+	breaker.acquire()
+	breaker.release()
+	assert breaker.state == "half_open"
+	breaker.acquire()
+
+
+def test_retry_classification_and_retry_after():
+	assert is_retryable(status_error(503))
+	assert is_retryable(status_error(429))
+	assert is_retryable(httpx.ConnectError("refused"))
+	assert not is_retryable(status_error(400))
+	assert not is_retryable(ValueError("bad json"))
+	assert not is_retryable(CircuitOpenError("open"))
+	assert retry_after_seconds(status_error(429, {"Retry-After": "7"})) == 7.0
+	assert retry_after_seconds(status_error(429)) is None
+
+
+def test_latency_tracker_needs_min_samples():
+	tracker = LatencyTracker(window=10, min_samples=3)
+	tracker.record("ollama", "m", 1.0)
+	tracker.record("ollama", "m", 2.0)
+	assert tracker.quantile("ollama", "m") is None
+	tracker.record("ollama", "m", 3.0)
+	assert tracker.quantile("ollama", "m") == 3.0
+	assert tracker.quantile("ollama", "other") is None
+
+
+def test_hedged_returns_backup_and_cancels_slow_primary():
+	cancelled = []
+
+	async def primary():
+		try:
+			await asyncio.sleep(10)
+		except asyncio.CancelledError:
+			cancelled.append("primary")
+			raise
+
+	async def backup():
+		return "fast"
+
+	async def main():
+		result = await hedged(primary, backup, delay=0.01)
+		await asyncio.sleep(0)
+		return result
+
+	assert asyncio.run(main()) == ("fast", "hedge")
+	assert cancelled == ["primary"]
+
+
+def test_hedged_raises_only_when_both_fail():
+	async def primary():
+		await asyncio.sleep(0.05)
+		raise ValueError("primary")
+
+	async def backup():
+		raise ValueError("backup")
+
+	with pytest.raises(ValueError, match="backup"):
+		asyncio.run(hedged(primary, backup, delay=0.01))
+
+
+def test_client_error_releases_half_open_trial_without_closing():
+	pool = BackendPool("ollama", ["http://a"], failure_threshold=1, reset_timeout=30)
+	backend = pool.backends[0]
+	backend.breaker.record_failure()
+	half_open(backend.breaker)
+
+	async def call():
+		async with pool.track(backend):
+			raise status_error(400)
+
+	with pytest.raises(httpx.HTTPStatusError):
+		asyncio.run(call())
+	assert backend.breaker.state == "half_open"
+	assert not backend.breaker.trial_in_flight
+	assert backend.outstanding == 0
+
+
+def test_candidates_skip_unhealthy_until_all_are_unhealthy():
+	pool = BackendPool("ollama", ["http://a", "http://b"], failure_threshold=1)
+	a, b = pool.backends
+	a.healthy = False
+	assert pool.candidates() == [b]
+	b.healthy = False
+	assert pool.candidates() == [a, b]
+	for backend in pool.backends:
+		backend.breaker.record_failure()
+	with pytest.raises(CircuitOpenError):
+		pool.candidates()
+
+
+def test_probe_updates_health_but_not_the_breaker(serve, run):
+	app = FastAPI()
+
+	@app.get("/api/tags")
+	async def tags():
+		return {"models": []}
+
+	up = serve(app)
+	down = FastAPI()
+
+	@down.get("/api/tags")
+	async def broken():
+		return JSONResponse({"error": "loading"}, status_code=503)
+
+	pool = BackendPool("ollama", [up, serve(down)], failure_threshold=1, reset_timeout=30)
+	healthy, sick = pool.backends
+	healthy.breaker.record_failure()
+	run(pool.probe())
+	assert healthy.healthy and healthy.probe_latency is not None
+	assert healthy.breaker.state == "open"
+	assert not sick.healthy and "503" in sick.last_error
+	assert sick.breaker.state == "closed" and sick.failures == 0
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from backend.services import review_chunks
+from backend.services.llm_cache import LLMCache
+from backend.services.review_chunks import chunk_key, merge_reviews, review_chunked
+from backend.services.schemas import ReviewSuggestion, ReviewTestResponse
+
+SPEC = """import { test, expect } from '@playwright/test';
+
+test('login', async ({ page }) => {
+  await page.goto('/login');
+  await expect(page.locator('#user')).toBeVisible();
+});
+
+test('logout', async ({ page }) => {
+  await page.goto('/logout');
+});
+"""
+
+
+class ReviewingAI:
+	"""Вместо модели: запоминает, какие тесты отправлялись на ревью"""
+
+	provider = "ollama"
+
+	def __init__(self, model: str = "m", refresh_cache: bool = False) -> None:
+		self.model = model
+		self.refresh_cache = refresh_cache
+		self.reviewed = []
+
+	async def review_test_unit(self, context: str, unit: str) -> ReviewTestResponse:
+		self.reviewed.append(unit.splitlines()[0])
+		return ReviewTestResponse(
+			summary=f"ok {len(self.reviewed)}",
+			score=80,
+			suggestions=[ReviewSuggestion(title="Локатор", comment="#id", line=2)],
+			source="ai",
+		)
+
+
+@pytest.fixture
+def chunk_cache(monkeypatch):
+	cache = LLMCache(path=None)
+	monkeypatch.setattr(review_chunks, "_chunk_cache", cache)
+	return cache
+
+
+def test_unchanged_tests_come_from_cache_even_when_preamble_changes(chunk_cache):
+	asyncio.run(review_chunked(ReviewingAI(), SPEC, "ts"))
+	edited = "import { test, expect } from '@playwright/test';\ntest.beforeEach(async ({ page }) => {});\n" + SPEC.split("\n", 1)[1].replace("/logout", "/bye")
+	ai = ReviewingAI()
+	result = asyncio.run(review_chunked(ai, edited, "ts"))
+	# Общая часть с хуком проверяется отдельно, изменённый тест — заново, неизменённый берётся из кэша
+	assert sorted(ai.reviewed) == ["import { test, expect } from '@playwright/test';", "test('logout', async ({ page }) => {"]
+	assert chunk_cache.counters["hits"] == 1
+	assert sorted(s.line for s in result.suggestions) == [2, 5, 10]
+
+
+def test_cache_key_depends_on_model_and_refresh_bypasses_reads(chunk_cache):
+	asyncio.run(review_chunked(ReviewingAI(), SPEC, "ts"))
+	other_model = ReviewingAI(model="other")
+	asyncio.run(review_chunked(other_model, SPEC, "ts"))
+	assert len(other_model.reviewed) == 2
+	refreshed = ReviewingAI(refresh_cache=True)
+	asyncio.run(review_chunked(refreshed, SPEC, "ts"))
+	assert len(refreshed.reviewed) == 2
+	assert chunk_key("ollama", "m", "x") != chunk_key("ollama", "other", "x")
+
+
+def test_broken_cache_entry_is_reviewed_again(chunk_cache):
+	unit = SPEC.split("\n\n")[1]
+	chunk_cache._set_sync(chunk_key("ollama", "m", unit), "not json")
+	ai = ReviewingAI()
+	asyncio.run(review_chunked(ai, SPEC, "ts"))
+	assert len(ai.reviewed) == 2
+
+
+def test_merge_reviews_maps_lines_and_weights_score():
+	short = ReviewTestResponse(summary="a", score=100, suggestions=[ReviewSuggestion(title="X", comment="", line=1)], source="ai")
+	long = ReviewTestResponse(summary="b", score=40, suggestions=[ReviewSuggestion(title="x ", comment="", line=99)], source="ai")
+	merged = merge_reviews([(10, "l1\nl2\nl3", long), (3, "l1", short)], failed=1)
+	assert merged.score == 55
+	assert [(s.title, s.line) for s in merged.suggestions] == [("X", 3), ("x ", None)]
+	assert merged.summary.startswith("Проверено фрагментов: 2, не удалось проверить: 1. b a")
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from backend.services.singleflight import SingleFlight
+
+
+def test_identical_concurrent_calls_share_one_upstream_call():
+	flight = SingleFlight()
+	calls = []
+
+	async def fetch():
+		calls.append(1)
+		await asyncio.sleep(0.01)
+		return "answer"
+
+	async def main():
+		return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)), flight.do("other", fetch))
+
+	assert asyncio.run(main()) == ["answer"] * 6
+	assert len(calls) == 2
+	assert flight.stats() == {"calls": 6, "upstream": 2, "coalesced": 4, "abandoned": 0, "in_flight": 0}
+
+
+def test_error_reaches_every_waiter_and_next_call_starts_fresh():
+	flight = SingleFlight()
+	attempts = []
+
+	async def failing():
+		attempts.append(1)
+		await asyncio.sleep(0.01)
+		raise ValueError("upstream down")
+
+	async def main():
+		results = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+		assert all(isinstance(r, ValueError) for r in results)
+		with pytest.raises(ValueError):
+			await flight.do("k", failing)
+
+	asyncio.run(main())
+	assert len(attempts) == 2
+
+
+def test_cancelling_one_waiter_keeps_the_call_for_the_others():
+	flight = SingleFlight()
+
+	async def slow():
+		await asyncio.sleep(0.05)
+		return "done"
+
+	async def main():
+		first = asyncio.create_task(flight.do("k", slow))
+		second = asyncio.create_task(flight.do("k", slow))
+		await asyncio.sleep(0.01)
+		first.cancel()
+		assert await second == "done"
+		assert first.cancelled()
+
+	asyncio.run(main())
+	assert flight.counters["abandoned"] == 0
+
+
+def test_call_is_cancelled_when_every_waiter_leaves():
+	flight = SingleFlight()
+
+	async def main():
+		upstream_cancelled = asyncio.Event()
+
+		async def slow():
+			try:
+				await asyncio.sleep(10)
+			except asyncio.CancelledError:
+				upstream_cancelled.set()
+				raise
+
+		waiters = [asyncio.create_task(flight.do("k", slow)) for _ in range(2)]
+		await asyncio.sleep(0.01)
+		for waiter in waiters:
+			waiter.cancel()
+		await asyncio.gather(*waiters, return_exceptions=True)
+		await asyncio.wait_for(upstream_cancelled.wait(), 1)
+		assert flight.in_flight() == 0
+
+	asyncio.run(main())
+	assert flight.counters["abandoned"] == 1
@@ -0,0 +1,59 @@
+import ast
+import pytest
+from backend.services.template_compiler import TemplateCompiler
+from backend.services.test_analyzer import analyze
+
+CASES = [
+	("auth", {"type": "positive"}),
+	("auth", {"type": "negative_password"}),
+	("auth", {"type": "negative_validation"}),
+	("auth", {"type": "invalid_email"}),
+	("form", {"type": "positive", "fields": [{"name": "Имя", "value": "O'Brien"}]}),
+	("form", {"type": "negative", "fields": [{"name": "Email", "required": True}]}),
+	("list", {"type": "display", "item_count": 3}),
+	("list", {"type": "filter", "filter_value": "a.b"}),
+	("list", {"type": "pagination"}),
+	("list", {"type": "sort"}),
+	("crud", {"type": "create", "entity_name": "заказ"}),
+	("crud", {"type": "read"}),
+	("crud", {"type": "update"}),
+	("crud", {"type": "delete"}),
+]
+
+
+@pytest.mark.parametrize("template, params", CASES)
+def test_python_output_is_valid_and_passes_the_local_analyzer(template, params):
+	code = TemplateCompiler().compile(template, params, "python")
+	ast.parse(code)
+	assert analyze(code, "python") == []
+
+
+@pytest.mark.parametrize("template, params", CASES)
+@pytest.mark.parametrize("language", ["ts", "js"])
+def test_js_output_uses_stable_locators_only(template, params, language):
+	code = TemplateCompiler().compile(template, params, language)
+	assert code.count("test(") == 1 and code.rstrip().endswith("});")
+	assert "page.locator(" not in code and "waitForTimeout" not in code
+	assert analyze(code, language) == []
+
+
+def test_output_is_deterministic_and_respects_base_url():
+	compiler = TemplateCompiler()
+	first = compiler.compile("auth", {"type": "positive"}, "ts", "https://app.example.com/")
+	assert first == compiler.compile("auth", {"type": "positive"}, "ts", "https://app.example.com/")
+	assert first.startswith("import { test, expect } from '@playwright/test';")
+	assert "page.goto('https://app.example.com/login')" in first
+	assert "toHaveURL(/\\/dashboard/)" in first
+
+
+def test_strings_are_escaped():
+	code = TemplateCompiler().compile("form", {"type": "positive", "fields": [{"name": "Имя", "value": "O'Brien"}]}, "js")
+	assert "fill('O\\'Brien')" in code
+	assert code.startswith("const { test, expect } = require('@playwright/test');")
+
+
+def test_unsupported_template_is_rejected():
+	assert not TemplateCompiler.supports(None)
+	assert not TemplateCompiler.supports("unknown")
+	with pytest.raises(ValueError, match="не поддерживается"):
+		TemplateCompiler().compile("unknown", {}, "ts")
@@ -0,0 +1,94 @@
+import pytest
+from backend.services.test_analyzer import Finding, analyze, detect_language, flagged_regions, review_code, split_units
+
+TS_SPEC = """import { test, expect } from '@playwright/test';
+
+test.only('login', async ({ page }) => {
+  await page.goto('https://staging.example.com/login');
+  page.getByRole('button', { name: 'Login' }).click();
+  await page.locator('.btn-primary').click();
+  await page.waitForTimeout(1000);
+  expect(await page.getByText('Hi').isVisible()).toBe(true);
+});
+
+test('no checks', async ({ page }) => {
+  await page.goto('/');
+});
+"""
+
+PY_SPEC = """from playwright.sync_api import Page, expect
+
+
+def test_login(page: Page):
+    page.goto("/login")
+    page.locator("//div[@id='x']").click()
+    time.sleep(2)
+    assert page.get_by_text("Hi").is_visible()
+
+
+def test_clean(page: Page):
+    page.goto("/")
+    expect(page.get_by_role("heading")).to_be_visible()
+"""
+
+
+def rules(code: str, language: str | None = None) -> list:
+	return [(f.rule, f.line) for f in analyze(code, language)]
+
+
+def test_typescript_rules_with_line_numbers():
+	assert rules(TS_SPEC) == [
+		("focused_test", 3),
+		("absolute_url", 4),
+		("missing_await", 5),
+		("css_xpath_locator", 6),
+		("sleep", 7),
+		("non_retrying_assertion", 8),
+		("no_assertion", 11),
+	]
+
+
+def test_python_rules_and_sync_api_needs_no_await():
+	assert detect_language(PY_SPEC) == "python"
+	assert rules(PY_SPEC) == [("css_xpath_locator", 6), ("sleep", 7), ("non_retrying_assertion", 8)]
+
+
+def test_fixes_are_offered_where_obvious():
+	findings = {f.rule: f for f in analyze(TS_SPEC)}
+	assert findings["missing_await"].diff == "- page.getByRole('button', { name: 'Login' }).click();\n+ await page.getByRole('button', { name: 'Login' }).click();"
+	assert findings["focused_test"].diff.endswith("+ test('login', async ({ page }) => {")
+
+
+@pytest.mark.parametrize("line", ["const p = page.goto('/');", "return page.click('#a');", "// page.click('x')"])
+def test_lines_that_are_not_statements_are_not_flagged_for_await(line):
+	assert "missing_await" not in [f.rule for f in analyze(line, "ts")]
+
+
+def test_stable_locators_are_not_flagged():
+	code = "await page.locator('[data-testid=save]').click();\nawait page.locator('role=button').click();"
+	assert analyze(code, "ts") == []
+
+
+def test_review_code_scores_and_caps_repeated_rules():
+	clean = review_code(PY_SPEC[PY_SPEC.index("def test_clean"):])
+	assert clean.score == 100 and clean.suggestions == []
+	sleepy = "\n".join(["test('x', async ({ page }) => {", *["  await page.waitForTimeout(1);"] * 5, "  await expect(page).toHaveURL('/');", "});"])
+	review = review_code(sleepy)
+	assert review.score == 70
+	assert len(review.suggestions) == 5
+	assert review.suggestions[0].line == 2 and review.suggestions[0].rule == "sleep"
+
+
+def test_flagged_regions_merge_neighbours():
+	code = "\n".join(f"line{n}" for n in range(1, 21))
+	regions = flagged_regions(code, [Finding("sleep", line, "") for line in (2, 6, 18)], context=2)
+	assert [(start, end) for start, end, _ in regions] == [(1, 8), (16, 20)]
+	assert regions[0][2].splitlines()[0] == "   1| line1"
+
+
+def test_split_units_separates_preamble_and_tests():
+	preamble, units = split_units(TS_SPEC)
+	assert preamble == "import { test, expect } from '@playwright/test';\n"
+	assert [start for start, _ in units] == [3, 11]
+	assert units[1][1].startswith("test('no checks'")
+	assert split_units("const x = 1;") == ("", [(1, "const x = 1;")])
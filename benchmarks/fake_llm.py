@@ -0,0 +1,247 @@
+"""Локальная замена провайдеров ИИ для бенчмарков.
+
+Говорит на протоколах OpenAI (/v1/chat/completions, в том числе SSE-поток) и Ollama (/api/chat,
+NDJSON-поток, /api/tags, /api/ps, /api/generate), а также отвечает на запросы GitHub API
+(/github/...), которые использует /save/github. Задержка первого токена, скорость генерации
+и доля ошибок задаются параметрами запуска:
+
+	python -m benchmarks.fake_llm --port 11500 --latency 0.2 --tokens-per-sec 200 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import time
+from typing import AsyncIterator, Dict, List
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class FakeConfig:
+	def __init__(self, latency: float = 0.05, jitter: float = 0.2, tokens_per_sec: float = 0.0, error_rate: float = 0.0, seed: int = 0) -> None:
+		self.latency = latency
+		self.jitter = jitter
+		self.tokens_per_sec = tokens_per_sec
+		self.error_rate = error_rate
+		self.random = random.Random(seed)
+
+
+TS_TEST = """import { test, expect } from '@playwright/test';
+
+test('{title}', async ({ page }) => {
+  await page.goto('/login');
+  await page.getByLabel('Email').fill('user@example.com');
+  await page.getByLabel('Пароль').fill('Passw0rd!');
+  await page.getByRole('button', { name: 'Войти' }).click();
+  await expect(page).toHaveURL(/.*dashboard/);
+});
+"""
+
+PY_TEST = """import pytest
+from playwright.sync_api import Page, expect
+
+def test_generated(page: Page):
+    page.goto('/login')
+    page.get_by_label('Email').fill('user@example.com')
+    page.get_by_role('button', name='Войти').click()
+    expect(page).to_have_url(r'.*dashboard')
+"""
+
+
+def reply(messages: List[dict]) -> str:
+	"""Правдоподобный ответ по системному промпту backend (тест-кейсы, код, ревью, демо-приложение)"""
+	system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+	user = next((m.get("content", "") for m in messages if m.get("role") == "user"), "")
+	if '"files"' in system:
+		try:
+			cases = json.loads(user).get("test_cases") or []
+		except json.JSONDecodeError:
+			cases = []
+		return json.dumps({"files": [{"index": c.get("index", i), "code": TS_TEST.replace("{title}", str(c.get("title", i)))} for i, c in enumerate(cases)]}, ensure_ascii=False)
+	if "test_cases" in system:
+		cases = [
+			{"title": f"Сценарий {i + 1}", "steps": ["Открыть /login", "Ввести данные", "Нажать 'Войти'"], "expected": "Открывается /dashboard"}
+			for i in range(3)
+		]
+		return json.dumps({"test_cases": cases}, ensure_ascii=False)
+	if "код-ревьюер" in system:
+		return json.dumps(
+			{
+				"summary": "Тест в целом стабилен.",
+				"score": 80,
+				"suggestions": [{"title": "Добавьте проверку", "comment": "Проверьте сообщение об ошибке", "diff": None, "line": 2}],
+			},
+			ensure_ascii=False,
+		)
+	if "веб-приложение" in system:
+		return "---index.html---\n<html><body><script src=\"script.js\"></script></body></html>\n---script.js---\nconsole.log('demo');\n---styles.css---\nbody { margin: 0; }\n"
+	if "Python" in system:
+		return PY_TEST
+	return TS_TEST.replace("{title}", "Сгенерированный тест")
+
+
+def create_app(config: FakeConfig) -> FastAPI:
+	app = FastAPI()
+	counters: Dict[str, int] = {"chat": 0, "stream": 0, "errors": 0, "github": 0}
+	shas = itertools.count(1)
+
+	async def first_token() -> None:
+		delay = config.latency * config.random.uniform(1 - config.jitter, 1 + config.jitter)
+		if delay > 0:
+			await asyncio.sleep(delay)
+
+	def generation_time(text: str) -> float:
+		return (len(text) / 4) / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+
+	def failure() -> JSONResponse | None:
+		if config.error_rate > 0 and config.random.random() < config.error_rate:
+			counters["errors"] += 1
+			return JSONResponse({"error": "overloaded"}, status_code=503)
+		return None
+
+	async def pieces(text: str, size: int = 16) -> AsyncIterator[str]:
+		parts = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+		pause = generation_time(text) / len(parts)
+		for part in parts:
+			if pause > 0:
+				await asyncio.sleep(pause)
+			yield part
+
+	def usage(messages: List[dict], text: str) -> tuple[int, int]:
+		return sum(len(str(m.get("content", ""))) for m in messages) // 4, len(text) // 4
+
+	@app.post("/v1/chat/completions")
+	@app.post("/chat/completions")
+	async def openai_chat(request: Request):
+		body = await request.json()
+		messages = body.get("messages") or []
+		await first_token()
+		error = failure()
+		if error is not None:
+			return error
+		text = reply(messages)
+		prompt_tokens, completion_tokens = usage(messages, text)
+		if body.get("stream"):
+			counters["stream"] += 1
+
+			async def events() -> AsyncIterator[str]:
+				async for part in pieces(text):
+					yield "data: " + json.dumps({"choices": [{"delta": {"content": part}}]}, ensure_ascii=False) + "\n\n"
+				yield "data: " + json.dumps({"choices": [], "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}}) + "\n\n"
+				yield "data: [DONE]\n\n"
+
+			return StreamingResponse(events(), media_type="text/event-stream")
+		counters["chat"] += 1
+		await asyncio.sleep(generation_time(text))
+		return {
+			"choices": [{"message": {"role": "assistant", "content": text}}],
+			"usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+		}
+
+	@app.get("/v1/models")
+	@app.get("/models")
+	async def openai_models():
+		return {"data": [{"id": "fake-model"}]}
+
+	@app.post("/api/chat")
+	async def ollama_chat(request: Request):
+		body = await request.json()
+		messages = body.get("messages") or []
+		await first_token()
+		error = failure()
+		if error is not None:
+			return error
+		text = reply(messages)
+		prompt_tokens, completion_tokens = usage(messages, text)
+		if body.get("stream"):
+			counters["stream"] += 1
+
+			async def lines() -> AsyncIterator[str]:
+				async for part in pieces(text):
+					yield json.dumps({"message": {"role": "assistant", "content": part}, "done": False}, ensure_ascii=False) + "\n"
+				yield json.dumps({"message": {"role": "assistant", "content": ""}, "done": True, "prompt_eval_count": prompt_tokens, "eval_count": completion_tokens}) + "\n"
+
+			return StreamingResponse(lines(), media_type="application/x-ndjson")
+		counters["chat"] += 1
+		await asyncio.sleep(generation_time(text))
+		return {"message": {"role": "assistant", "content": text}, "done": True, "prompt_eval_count": prompt_tokens, "eval_count": completion_tokens}
+
+	@app.get("/api/tags")
+	async def ollama_tags():
+		return {"models": [{"name": "llama3:latest"}]}
+
+	@app.get("/api/ps")
+	async def ollama_ps():
+		return {"models": [{"name": "llama3:latest", "model": "llama3:latest", "size": 0, "size_vram": 0, "expires_at": None}]}
+
+	@app.post("/api/generate")
+	async def ollama_generate():
+		await first_token()
+		return {"done": True, "load_duration": 0}
+
+	# GitHub: contents API (/save/github) и Git Data API (/save/github/bulk)
+	@app.get("/github/repos/{owner}/{repo}/contents/{path:path}")
+	async def gh_get_contents(owner: str, repo: str, path: str):
+		counters["github"] += 1
+		return JSONResponse({"message": "Not Found"}, status_code=404)
+
+	@app.put("/github/repos/{owner}/{repo}/contents/{path:path}")
+	async def gh_put_contents(owner: str, repo: str, path: str):
+		counters["github"] += 1
+		sha = f"{next(shas):040x}"
+		return {"content": {"sha": sha, "html_url": f"https://github.invalid/{owner}/{repo}/blob/main/{path}"}, "commit": {"sha": sha}}
+
+	@app.get("/github/repos/{owner}/{repo}/git/ref/heads/{branch:path}")
+	async def gh_ref(owner: str, repo: str, branch: str):
+		counters["github"] += 1
+		return {"object": {"sha": "0" * 40}}
+
+	@app.get("/github/repos/{owner}/{repo}/git/commits/{sha}")
+	async def gh_commit(owner: str, repo: str, sha: str):
+		counters["github"] += 1
+		return {"sha": sha, "tree": {"sha": "1" * 40}}
+
+	@app.post("/github/repos/{owner}/{repo}/git/blobs")
+	async def gh_blob(owner: str, repo: str, request: Request):
+		counters["github"] += 1
+		body = await request.json()
+		return {"sha": hashlib.sha1(str(body.get("content", "")).encode("utf-8")).hexdigest()}
+
+	@app.post("/github/repos/{owner}/{repo}/git/trees")
+	@app.post("/github/repos/{owner}/{repo}/git/commits")
+	async def gh_create(owner: str, repo: str):
+		counters["github"] += 1
+		sha = f"{next(shas):040x}"
+		return {"sha": sha, "html_url": f"https://github.invalid/{owner}/{repo}/commit/{sha}"}
+
+	@app.patch("/github/repos/{owner}/{repo}/git/refs/heads/{branch:path}")
+	async def gh_update_ref(owner: str, repo: str, branch: str):
+		counters["github"] += 1
+		return {"ref": f"refs/heads/{branch}"}
+
+	@app.get("/stats")
+	async def stats():
+		return {**counters, "ts": time.time()}
+
+	return app
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Фейковый LLM-сервер (OpenAI + Ollama) для бенчмарков")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=11500)
+	parser.add_argument("--latency", type=float, default=0.05, help="Задержка до первого токена, сек.")
+	parser.add_argument("--jitter", type=float, default=0.2, help="Разброс задержки, доля от --latency")
+	parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Скорость генерации (0 — ответ целиком сразу)")
+	parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 503")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+	config = FakeConfig(args.latency, args.jitter, args.tokens_per_sec, args.error_rate, args.seed)
+	uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,474 @@
+"""Бенчмарк backend и CLI на фейковом LLM-сервере, без сети и без настоящих моделей.
+
+Поднимает benchmarks.fake_llm и backend (uvicorn) отдельными процессами во временном
+каталоге (свой git-репозиторий с локальным remote, своя очередь задач), затем прогоняет каждый
+эндпоинт и конвейер CLI при растущей параллельности. По каждому сценарию и уровню параллельности:
+p50/p95/p99 задержки, запросы в секунду, ошибки и память процесса.
+
+	python -m benchmarks.run --concurrency 1,8,32 --requests 64
+	python -m benchmarks.run --baseline benchmarks/baseline.json      # сравнить с эталоном
+	python -m benchmarks.run --save-baseline                          # обновить эталон
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+import httpx
+
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = ROOT / "benchmarks" / "results" / "latest.json"
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+
+CASE = {"title": "Успешный вход", "steps": ["Открыть /login", "Ввести email и пароль", "Нажать 'Войти'"], "expected": "Открывается /dashboard"}
+TS_CODE = """import { test, expect } from '@playwright/test';
+
+test.beforeEach(async ({ page }) => {
+  await page.goto('/');
+});
+
+""" + "\n".join(
+	f"""test('case {i}', async ({{ page }}) => {{
+  await page.goto('/login');
+  await page.locator('#email').fill('user@example.com');
+  await page.waitForTimeout(500);
+  await page.getByRole('button', {{ name: 'Войти' }}).click();
+  await expect(page).toHaveURL(/dashboard/);
+}});
+"""
+	for i in range(8)
+)
+
+Call = Callable[[httpx.AsyncClient, int], Awaitable[None]]
+
+
+class Scenario:
+	"""Один сценарий нагрузки: call(client, i) выполняет i-й запрос и падает при ошибке"""
+
+	def __init__(self, name: str, call: Call, max_concurrency: int | None = None, max_requests: int | None = None) -> None:
+		self.name = name
+		self.call = call
+		# Операции над общим git-репозиторием и запуск pytest нельзя распараллеливать без ограничений
+		self.max_concurrency = max_concurrency
+		self.max_requests = max_requests
+
+
+def _check(resp: httpx.Response) -> httpx.Response:
+	if resp.status_code >= 400:
+		raise RuntimeError(f"{resp.request.method} {resp.request.url.path}: HTTP {resp.status_code} {resp.text[:200]}")
+	return resp
+
+
+def get(path: str) -> Call:
+	async def call(client: httpx.AsyncClient, i: int) -> None:
+		_check(await client.get(path))
+	return call
+
+
+def post(path: str, body: Callable[[int], Any] | Any = None, method: str = "POST") -> Call:
+	async def call(client: httpx.AsyncClient, i: int) -> None:
+		payload = body(i) if callable(body) else body
+		_check(await client.request(method, path, json=payload))
+	return call
+
+
+def stream(path: str, body: Callable[[int], Any] | Any) -> Call:
+	"""Потоковый ответ (SSE/NDJSON) читается до конца: задержка — до последнего байта"""
+	async def call(client: httpx.AsyncClient, i: int) -> None:
+		payload = body(i) if callable(body) else body
+		async with client.stream("POST", path, json=payload) as resp:
+			_check(resp)
+			async for _ in resp.aiter_bytes():
+				pass
+	return call
+
+
+def bulk(client_lines: int = 5) -> Call:
+	async def call(client: httpx.AsyncClient, i: int) -> None:
+		lines = "".join(json.dumps({"id": f"f{n}", "description": f"Фича {n}: вход по email и паролю"}, ensure_ascii=False) + "\n" for n in range(client_lines))
+		run_id = f"bench-{uuid.uuid4().hex[:8]}"
+		async with client.stream("POST", f"/generate/bulk?run_id={run_id}&target=ts", content=lines.encode("utf-8")) as resp:
+			_check(resp)
+			async for _ in resp.aiter_bytes():
+				pass
+	return call
+
+
+def job(kind: str, payload: Dict[str, Any]) -> Call:
+	"""Постановка задачи и опрос до завершения; результат забирается отдельным запросом"""
+	async def call(client: httpx.AsyncClient, i: int) -> None:
+		submitted = _check(await client.post("/jobs", json={"kind": kind, "payload": payload})).json()
+		job_id = submitted["id"]
+		while True:
+			status = _check(await client.get(f"/jobs/{job_id}")).json()["status"]
+			if status in ("succeeded", "failed", "cancelled"):
+				break
+			await asyncio.sleep(0.01)
+		if status != "succeeded":
+			raise RuntimeError(f"job {kind}: {status}")
+		_check(await client.get(f"/jobs/{job_id}/result"))
+		_check(await client.get("/jobs", params={"limit": 10}))
+	return call
+
+
+def job_cancel() -> Call:
+	async def call(client: httpx.AsyncClient, i: int) -> None:
+		submitted = _check(await client.post("/jobs", json={"kind": "generate_test_cases", "payload": {"description": f"cancel {i}", "no_cache": True}})).json()
+		_check(await client.post(f"/jobs/{submitted['id']}/cancel"))
+	return call
+
+
+def git_push() -> Call:
+	async def call(client: httpx.AsyncClient, i: int) -> None:
+		_check(await client.post("/save/local", json={"relative_path": f"bench/push_{uuid.uuid4().hex[:8]}.spec.ts", "content": TS_CODE}))
+		_check(await client.post("/git/push", json={"scope": "session", "message": f"bench {i}"}))
+	return call
+
+
+def scenarios(provider: str, tests_dir: str) -> List[Scenario]:
+	description = "Форма входа: email, пароль, кнопка 'Войти', ошибка при неверном пароле"
+	items = [
+		Scenario("index", get("/")),
+		Scenario("health", get("/health")),
+		Scenario("metrics", get("/metrics")),
+		Scenario("backends", get("/backends")),
+		Scenario("rate_limits", get("/rate-limits")),
+		Scenario("cache_stats", get("/cache/stats")),
+		Scenario("llm_stats", get("/llm/stats")),
+		Scenario("formatter_stats", get("/formatter/stats")),
+		Scenario("templates", get("/templates")),
+		Scenario("git_pending", get("/git/pending")),
+		Scenario("test_cases", post("/generate/test-cases", lambda i: {"description": f"{description} #{i}"})),
+		Scenario("test_cases_stream", stream("/generate/test-cases/stream", lambda i: {"description": f"{description} #{i}"})),
+		Scenario("test_code", post("/generate/test-code", {"test_case": CASE, "language": "ts"})),
+		Scenario("test_code_python", post("/generate/test-code", {"test_case": CASE, "language": "python"})),
+		Scenario("test_code_template", post("/generate/test-code", {"template": "auth", "template_params": {"type": "positive"}})),
+		Scenario("test_code_stream", stream("/generate/test-code/stream", {"test_case": CASE, "language": "ts"})),
+		Scenario("test_code_batch", post("/generate/test-code/batch", {"test_cases": [{**CASE, "title": f"Кейс {n}"} for n in range(5)], "language": "ts"})),
+		Scenario("test_code_batch_packed", post("/generate/test-code/batch", {"test_cases": [{**CASE, "title": f"Кейс {n}"} for n in range(5)], "language": "ts", "pack_size": 5})),
+		Scenario("bulk", bulk()),
+		Scenario("review_local", post("/review/test", {"code": TS_CODE})),
+		Scenario("review_escalate", post("/review/test", {"code": TS_CODE, "escalate": True})),
+		Scenario("review_ai", post("/review/test", {"code": TS_CODE, "mode": "ai"})),
+		Scenario("review_chunked", post("/review/test", {"code": TS_CODE, "mode": "chunked"})),
+		Scenario("save_local", post("/save/local", lambda i: {"relative_path": f"bench/save_{uuid.uuid4().hex[:8]}.spec.ts", "content": TS_CODE})),
+		Scenario("demo_app", post("/generate/demo-app", lambda i: {"description": description, "out_dir": f"bench/demo_{i % 4}"})),
+		Scenario("save_github", post("/save/github", lambda i: {"owner": "bench", "repo": "bench", "path": f"tests/t{i}.spec.ts", "content": TS_CODE})),
+		Scenario("save_github_bulk", post("/save/github/bulk", {"owner": "bench", "repo": "bench", "files": [{"path": f"tests/t{n}.spec.ts", "content": TS_CODE} for n in range(5)]})),
+		Scenario("jobs", job("review_test", {"code": TS_CODE})),
+		Scenario("jobs_cancel", job_cancel()),
+		Scenario("git_push", git_push(), max_concurrency=1),
+		Scenario("tests_run", post("/tests/run", {"kind": "python", "cwd": tests_dir}), max_concurrency=4, max_requests=8),
+		Scenario("cache_clear", post("/cache", method="DELETE"), max_concurrency=1),
+	]
+	if provider == "ollama":
+		items += [
+			Scenario("ollama_models", get("/ollama/models")),
+			Scenario("ollama_warmup", post("/ollama/warmup"), max_concurrency=4),
+		]
+	return items
+
+
+def percentile(ordered: List[float], q: float) -> float:
+	"""Перцентиль по ближайшему рангу (ordered отсортирован по возрастанию)"""
+	if not ordered:
+		return 0.0
+	rank = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+	return ordered[rank]
+
+
+def rss_mb(pid: int) -> float | None:
+	"""Текущая резидентная память процесса (Linux, /proc)"""
+	try:
+		for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+			if line.startswith("VmRSS:"):
+				return round(int(line.split()[1]) / 1024, 1)
+	except OSError:
+		return None
+	return None
+
+
+def summarize(name: str, concurrency: int, latencies: List[float], errors: int, wall: float, memory: Dict[str, Any]) -> Dict[str, Any]:
+	ordered = sorted(latencies)
+	return {
+		"scenario": name,
+		"concurrency": concurrency,
+		"requests": len(latencies) + errors,
+		"errors": errors,
+		"p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+		"p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+		"p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+		"rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+		**memory,
+	}
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, concurrency: int, requests: int, server_pid: int, warmup: int = 1) -> Dict[str, Any]:
+	# Разовые затраты первого вызова (запуск воркера форматирования, пулы соединений) в замер не попадают
+	for i in range(warmup):
+		try:
+			await scenario.call(client, -1 - i)
+		except Exception:
+			pass
+	latencies: List[float] = []
+	errors: List[str] = []
+	counter = iter(range(requests))
+
+	async def worker() -> None:
+		for i in counter:
+			started = time.perf_counter()
+			try:
+				await scenario.call(client, i)
+			except Exception as exc:
+				errors.append(str(exc) or exc.__class__.__name__)
+				continue
+			latencies.append(time.perf_counter() - started)
+
+	before = rss_mb(server_pid)
+	started = time.perf_counter()
+	await asyncio.gather(*(worker() for _ in range(concurrency)))
+	wall = time.perf_counter() - started
+	after = rss_mb(server_pid)
+	memory = {"rss_mb": after, "rss_delta_mb": round(after - before, 1) if after is not None and before is not None else None}
+	result = summarize(scenario.name, concurrency, latencies, len(errors), wall, memory)
+	if errors:
+		result["first_error"] = errors[0][:300]
+	return result
+
+
+def run_cli(env: Dict[str, str], cases_file: Path, concurrency: int, requests: int) -> Dict[str, Any]:
+	"""Конвейер CLI (--cases-file): concurrency процессов одновременно, задержка — время процесса целиком"""
+	latencies: List[float] = []
+	errors: List[str] = []
+	pending = list(range(requests))
+	running: Dict[subprocess.Popen, float] = {}
+	started = time.perf_counter()
+	while pending or running:
+		while pending and len(running) < concurrency:
+			i = pending.pop(0)
+			cmd = [sys.executable, "-m", "backend.cli", "--cases-file", str(cases_file), "--target", "ts", "--out", f"bench_cli/{i}"]
+			running[subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)] = time.perf_counter()
+		for proc, begun in list(running.items()):
+			if proc.poll() is None:
+				continue
+			del running[proc]
+			if proc.returncode == 0:
+				latencies.append(time.perf_counter() - begun)
+			else:
+				errors.append((proc.stderr.read() if proc.stderr else b"").decode("utf-8", "replace")[-300:])
+			if proc.stderr:
+				proc.stderr.close()
+		time.sleep(0.005)
+	wall = time.perf_counter() - started
+	# ru_maxrss дочерних процессов — пик по всем завершённым CLI-процессам (КБ в Linux)
+	peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+	result = summarize("cli_pipeline", concurrency, latencies, len(errors), wall, {"rss_mb": round(peak, 1), "rss_delta_mb": None})
+	if errors:
+		result["first_error"] = errors[0]
+	return result
+
+
+def free_port() -> int:
+	with socket.socket() as sock:
+		sock.bind(("127.0.0.1", 0))
+		return sock.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 30.0) -> None:
+	deadline = time.monotonic() + timeout
+	while time.monotonic() < deadline:
+		try:
+			if httpx.get(url, timeout=1.0).status_code < 500:
+				return
+		except httpx.HTTPError:
+			pass
+		time.sleep(0.1)
+	raise RuntimeError(f"Сервер не ответил за {timeout} с: {url}")
+
+
+def prepare_workdir(workdir: Path) -> Dict[str, Path]:
+	"""Git-репозиторий с локальным bare remote (для /git/push), тесты для /tests/run и тест-кейсы для CLI"""
+	repo = workdir / "repo"
+	remote = workdir / "remote.git"
+	repo.mkdir()
+	git_env = {**os.environ, "GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@localhost", "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@localhost"}
+	for cmd, cwd in (
+		(["git", "init", "-q", "--bare", str(remote)], workdir),
+		(["git", "init", "-q", "-b", "main"], repo),
+		(["git", "remote", "add", "origin", str(remote)], repo),
+		(["git", "commit", "-q", "--allow-empty", "-m", "init"], repo),
+		(["git", "push", "-q", "origin", "main"], repo),
+	):
+		subprocess.run(cmd, cwd=cwd, env=git_env, check=True, capture_output=True)
+	tests = workdir / "pytests"
+	tests.mkdir()
+	(tests / "test_bench.py").write_text("def test_ok():\n    assert 1 + 1 == 2\n", encoding="utf-8")
+	cases = workdir / "cases.json"
+	cases.write_text(json.dumps({"test_cases": [{**CASE, "title": f"Кейс {n}"} for n in range(5)]}, ensure_ascii=False), encoding="utf-8")
+	return {"repo": repo, "tests": tests, "cases": cases}
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+	"""Регрессии относительно эталона: p95 выросла или RPS упал больше чем на max_regression"""
+	reference = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+	regressions: List[str] = []
+	print(f"\nСравнение с эталоном ({baseline.get('meta', {}).get('created', '?')}), допуск {max_regression:.0%}:")
+	for r in results:
+		ref = reference.get((r["scenario"], r["concurrency"]))
+		if ref is None:
+			continue
+		p95_change = (r["p95_ms"] - ref["p95_ms"]) / ref["p95_ms"] if ref["p95_ms"] else 0.0
+		rps_change = (r["rps"] - ref["rps"]) / ref["rps"] if ref["rps"] else 0.0
+		worse = p95_change > max_regression or rps_change < -max_regression or r["errors"] > ref["errors"]
+		mark = "РЕГРЕССИЯ" if worse else ""
+		print(f"  {r['scenario']:<24} c={r['concurrency']:<3} p95 {p95_change:+7.1%}  rps {rps_change:+7.1%}  {mark}")
+		if worse:
+			regressions.append(f"{r['scenario']} c={r['concurrency']}")
+	return regressions
+
+
+def print_header() -> None:
+	print(f"\n{'scenario':<24} {'c':>3} {'n':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rps':>9} {'rss MB':>8}")
+
+
+def print_row(r: Dict[str, Any]) -> None:
+	rss = "" if r.get("rss_mb") is None else f"{r['rss_mb']:.1f}"
+	print(f"{r['scenario']:<24} {r['concurrency']:>3} {r['requests']:>5} {r['errors']:>4} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['rps']:>9.1f} {rss:>8}", flush=True)
+
+
+async def drive(base_url: str, items: List[Scenario], levels: List[int], requests: int, server_pid: int, warmup: int) -> List[Dict[str, Any]]:
+	results: List[Dict[str, Any]] = []
+	limits = httpx.Limits(max_connections=max(levels) * 2, max_keepalive_connections=max(levels) * 2)
+	print_header()
+	async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+		for scenario in items:
+			for level in levels:
+				if scenario.max_concurrency is not None and level > scenario.max_concurrency:
+					continue
+				count = max(level, min(requests, scenario.max_requests or requests))
+				result = await run_scenario(client, scenario, level, count, server_pid, warmup)
+				results.append(result)
+				print_row(result)
+	return results
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Бенчмарк эндпоинтов backend и конвейера CLI на фейковом LLM")
+	parser.add_argument("--provider", choices=["ollama", "openai"], default="ollama")
+	parser.add_argument("--concurrency", default="1,4,16", help="Уровни параллельности через запятую")
+	parser.add_argument("--requests", type=int, default=32, help="Запросов на сценарий и уровень (не меньше уровня параллельности)")
+	parser.add_argument("--warmup", type=int, default=1, help="Прогревочных запросов перед замером каждого сценария")
+	parser.add_argument("--scenarios", default="", help="Только эти сценарии (через запятую); cli_pipeline — конвейер CLI")
+	parser.add_argument("--cli-requests", type=int, default=4, help="Запусков CLI на уровень параллельности")
+	parser.add_argument("--latency", type=float, default=0.05, help="Задержка фейкового LLM до первого токена, сек.")
+	parser.add_argument("--tokens-per-sec", type=float, default=2000.0, help="Скорость генерации фейкового LLM")
+	parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов 503 от фейкового LLM")
+	parser.add_argument("--cache", action="store_true", help="Не отключать кэш ответов ИИ (по умолчанию выключен, чтобы мерить путь до модели)")
+	parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Куда записать результаты (JSON)")
+	parser.add_argument("--baseline", help="Эталон для сравнения; при регрессии код выхода 1")
+	parser.add_argument("--save-baseline", action="store_true", help=f"Записать результаты как эталон ({DEFAULT_BASELINE.relative_to(ROOT)})")
+	parser.add_argument("--max-regression", type=float, default=0.25, help="Допустимое ухудшение p95 и RPS относительно эталона")
+	parser.add_argument("--keep", action="store_true", help="Не удалять временный каталог")
+	args = parser.parse_args()
+
+	levels = sorted({int(x) for x in args.concurrency.split(",") if x.strip()})
+	selected = {s.strip() for s in args.scenarios.split(",") if s.strip()}
+	workdir = Path(tempfile.mkdtemp(prefix="bench-"))
+	paths = prepare_workdir(workdir)
+	fake_port, api_port = free_port(), free_port()
+	fake_url = f"http://127.0.0.1:{fake_port}"
+	env = {
+		**os.environ,
+		"AI_PROVIDER": args.provider,
+		"OLLAMA_BASE_URL": fake_url,
+		"OLLAMA_BASE_URLS": "",
+		"OPENAI_BASE_URL": f"{fake_url}/v1",
+		"OPENAI_BASE_URLS": "",
+		"OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench"),
+		"GITHUB_API_BASE": f"{fake_url}/github",
+		"GITHUB_TOKEN": "bench",
+		"DEFAULT_REPO_ROOT": str(paths["repo"]),
+		"JOBS_DB_PATH": str(workdir / "jobs.sqlite3"),
+		"BULK_CHECKPOINT_DIR": str(workdir / "bulk"),
+		"LLM_CACHE_PATH": str(workdir / "llm_cache.sqlite3"),
+		"LLM_CACHE_ENABLED": "true" if args.cache else "false",
+		"GIT_COMMIT_DEBOUNCE": "0",
+		"LOG_LEVEL": "off",
+		"GIT_AUTHOR_NAME": "bench",
+		"GIT_AUTHOR_EMAIL": "bench@localhost",
+		"GIT_COMMITTER_NAME": "bench",
+		"GIT_COMMITTER_EMAIL": "bench@localhost",
+	}
+	fake = subprocess.Popen(
+		[sys.executable, "-m", "benchmarks.fake_llm", "--port", str(fake_port), "--latency", str(args.latency),
+		 "--tokens-per-sec", str(args.tokens_per_sec), "--error-rate", str(args.error_rate)],
+		cwd=ROOT,
+	)
+	api = subprocess.Popen(
+		[sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(api_port), "--log-level", "warning", "--no-access-log"],
+		cwd=ROOT,
+		env=env,
+	)
+	results: List[Dict[str, Any]] = []
+	try:
+		wait_ready(f"{fake_url}/stats")
+		wait_ready(f"http://127.0.0.1:{api_port}/health")
+		items = [s for s in scenarios(args.provider, str(paths["tests"])) if not selected or s.name in selected]
+		results = asyncio.run(drive(f"http://127.0.0.1:{api_port}", items, levels, args.requests, api.pid, args.warmup))
+		if not selected or "cli_pipeline" in selected:
+			for level in levels:
+				result = run_cli({**env, "DEFAULT_REPO_ROOT": str(workdir / "cli")}, paths["cases"], level, max(level, args.cli_requests))
+				results.append(result)
+				print_row(result)
+	finally:
+		for proc in (api, fake):
+			proc.terminate()
+			try:
+				proc.wait(timeout=10)
+			except subprocess.TimeoutExpired:
+				proc.kill()
+		if not args.keep:
+			shutil.rmtree(workdir, ignore_errors=True)
+
+	report = {
+		"meta": {
+			"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"provider": args.provider,
+			"concurrency": levels,
+			"requests": args.requests,
+			"warmup": args.warmup,
+			"fake_llm": {"latency": args.latency, "tokens_per_sec": args.tokens_per_sec, "error_rate": args.error_rate},
+			"cache": args.cache,
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"cpus": os.cpu_count(),
+		},
+		"results": results,
+	}
+	output = Path(args.output)
+	output.parent.mkdir(parents=True, exist_ok=True)
+	output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+	print(f"\nРезультаты: {output}")
+	if args.save_baseline:
+		DEFAULT_BASELINE.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+		print(f"Эталон обновлён: {DEFAULT_BASELINE}")
+	if args.baseline:
+		regressions = compare(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.max_regression)
+		if regressions:
+			print("Регрессии: " + ", ".join(regressions))
+			sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()